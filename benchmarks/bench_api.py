@@ -0,0 +1,137 @@
+"""Localhost load test for the triage API (epidemiccare.api).
+
+    python benchmarks/bench_api.py [seconds] [connections] [workers]
+
+Starts the API in a subprocess on a free port, then:
+
+* single: `connections` keep-alive clients, spread over several client
+  processes, POST /triage back to back for `seconds`; reports requests/s and
+  latency percentiles.
+* bulk: one client streams 100,000 NDJSON records to /triage/bulk and reads
+  results while still sending; reports records/s and time to first result.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from epidemiccare import STEPS  # noqa: E402
+from synthetic import synthetic_records  # noqa: E402
+
+BULK_RECORDS = 100_000
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def read_response(reader: asyncio.StreamReader) -> bytes:
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = int(head.lower().split(b"content-length:", 1)[1].split(b"\r\n", 1)[0])
+    return await reader.readexactly(length)
+
+
+async def client(port: int, bodies, deadline: float, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    i = 0
+    while time.perf_counter() < deadline:
+        body = bodies[i % len(bodies)]; i += 1
+        t0 = time.perf_counter()
+        writer.write(b"POST /triage HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                     b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+        json.loads(await read_response(reader))
+        latencies.append(time.perf_counter() - t0)
+    writer.close()
+
+
+def single_worker(port: int, connections: int, seconds: float, seed: int, out):
+    bodies = [json.dumps(r).encode() for r in synthetic_records(500, STEPS, seed=seed)]
+    latencies = []
+
+    async def run():
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(client(port, bodies, deadline, latencies) for _ in range(connections)))
+
+    asyncio.run(run())
+    out.put(latencies)
+
+
+async def bulk(port: int, records):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"POST /triage/bulk HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/x-ndjson\r\n"
+                 b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+    t0 = time.perf_counter()
+
+    async def send():
+        for i in range(0, len(records), 200):
+            data = b"".join(json.dumps(r).encode() + b"\n" for r in records[i:i + 200])
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+            await writer.drain()
+            await asyncio.sleep(0)  # let the reader see results while we are still sending
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    sender = asyncio.create_task(send())
+    await reader.readuntil(b"\r\n\r\n")
+    first, lines = None, 0
+    while True:
+        size = int(await reader.readuntil(b"\r\n"), 16)
+        if size == 0:
+            break
+        lines += (await reader.readexactly(size + 2)).count(b"\n") - 1
+        if first is None:
+            first = time.perf_counter() - t0
+    await sender
+    writer.close()
+    return lines, time.perf_counter() - t0, first
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    port = free_port()
+    server = subprocess.Popen([sys.executable, "-m", "epidemiccare.api", "--port", str(port), "--workers", str(workers)],
+                              cwd=ROOT, stdout=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port)).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+
+        procs = max(1, min(os.cpu_count() or 1, 4, connections))
+        out = multiprocessing.Queue()
+        clients = [multiprocessing.Process(target=single_worker, args=(port, connections // procs, seconds, i, out))
+                   for i in range(procs)]
+        for c in clients:
+            c.start()
+        latencies = [x for _ in clients for x in out.get()]
+        for c in clients:
+            c.join()
+        q = statistics.quantiles(latencies, n=100)
+        print(f"single  workers={workers} connections={connections} requests={len(latencies)} "
+              f"rps={len(latencies) / seconds:,.0f}  p50={q[49] * 1e3:.2f}ms p95={q[94] * 1e3:.2f}ms p99={q[98] * 1e3:.2f}ms")
+
+        records = synthetic_records(BULK_RECORDS, STEPS, seed=random.randrange(1000))
+        lines, elapsed, first = asyncio.run(bulk(port, records))
+        assert lines == len(records), (lines, len(records))
+        print(f"bulk    records={lines} records/s={lines / elapsed:,.0f}  first result after {first * 1e3:.1f}ms")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
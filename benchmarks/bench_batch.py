@@ -0,0 +1,44 @@
+"""Batch triage vs. per-patient scoring.
+
+    python benchmarks/bench_batch.py [rows]
+
+Scores `rows` synthetic intake records (default 1,000,000) with the column-wise
+batch functions, times the per-patient functions on a sample and extrapolates,
+and checks both give identical results on that sample.
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from epidemiccare import STEPS, assess_risk, generate_diagnosis  # noqa: E402
+from epidemiccare.batch import assess_risk_batch, diagnosis_row, generate_diagnosis_batch  # noqa: E402
+from synthetic import synthetic_records  # noqa: E402
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sample = synthetic_records(min(rows, 20_000), STEPS)
+    df = pd.DataFrame((sample * (rows // len(sample) + 1))[:rows])
+
+    t0 = time.perf_counter()
+    for r in sample:
+        assess_risk(r); generate_diagnosis(r)
+    per_patient = (time.perf_counter() - t0) / len(sample) * rows
+
+    t0 = time.perf_counter()
+    levels, scores, detail = assess_risk_batch(df)
+    ranked = generate_diagnosis_batch(df)
+    batch = time.perf_counter() - t0
+
+    for i, r in enumerate(sample):
+        level, score, d = assess_risk(r)
+        assert (levels[i], scores[i], {k: detail[k][i] for k in d}) == (level, score, d), i
+        assert diagnosis_row(*ranked, i) == generate_diagnosis(r), i
+
+    print(f"rows={rows}  per-patient≈{per_patient:.2f}s (extrapolated)  batch={batch:.2f}s  speedup={per_patient / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
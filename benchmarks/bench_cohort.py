@@ -0,0 +1,63 @@
+"""Cohort CLI memory vs. input size.
+
+    python benchmarks/bench_cohort.py [max_rows]
+
+Writes synthetic CSV and NDJSON archives of growing size, runs
+`python -m epidemiccare.cohort` on each in a fresh interpreter and reports
+records/s and peak RSS. Peak RSS should stay flat as the files grow.
+"""
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from epidemiccare import STEPS  # noqa: E402
+from synthetic import synthetic_symptoms  # noqa: E402
+
+KEYS = [s["key"] for s in STEPS]
+RUN = ("import resource, runpy, sys; sys.argv = ['cohort', *sys.argv[1:]]; "
+       "runpy.run_module('epidemiccare.cohort', run_name='__main__'); "
+       "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stderr)")
+
+
+def write_archive(path: str, rows: int):
+    rng = random.Random(rows)
+    with open(path, "w", newline="") as f:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(f, KEYS)
+            writer.writeheader()
+            for _ in range(rows):
+                writer.writerow(synthetic_symptoms(rng, STEPS))
+        else:
+            for _ in range(rows):
+                f.write(json.dumps(synthetic_symptoms(rng, STEPS)) + "\n")
+
+
+def main():
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    sizes = [n for n in (100_000, 500_000, 2_000_000, 10_000_000) if n <= max_rows] or [max_rows]
+    print(f"{'format':>7} {'rows':>11} {'MB':>8} {'seconds':>8} {'records/s':>11} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in ("csv", "ndjson"):
+            for rows in sizes:
+                path = os.path.join(tmp, f"intake.{ext}")
+                write_archive(path, rows)
+                t0 = time.perf_counter()
+                done = subprocess.run([sys.executable, "-c", RUN, path, "--json"], cwd=ROOT,
+                                      capture_output=True, text=True, check=True)
+                elapsed = time.perf_counter() - t0
+                assert json.loads(done.stdout)["records"] == rows
+                peak_mb = int(done.stderr.split()[-1]) / 1024  # ru_maxrss is KiB on Linux
+                print(f"{ext:>7} {rows:>11,} {os.path.getsize(path) / 2**20:>8.0f} {elapsed:>8.1f} "
+                      f"{rows / elapsed:>11,.0f} {peak_mb:>12.0f}")
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Columnar export/import vs. the per-record store API, and memory-mapped reads.
+
+    python benchmarks/bench_columnar.py [patients] [days]
+
+Fills a temporary store through save_consultation/add_checkin, which is the
+only way to pre-load history without epidemiccare.columnar, and times it.
+Then:
+- Exports the store to Arrow and to Parquet (time, file sizes).
+- Imports each export into an empty store.
+- Opens the check-ins three ways: the store's rows as Python tuples, Parquet
+  decoded, and Arrow memory-mapped.
+- Runs the dashboard aggregation from the store and from the Arrow archive.
+
+Memory is the growth in anonymous RSS (RssAnon, Linux): pages of a mapped
+file are page cache, not process memory.
+"""
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from epidemiccare import STEPS, assess_risk, generate_diagnosis  # noqa: E402
+from epidemiccare.columnar import export_store, import_files, open_table, table_path  # noqa: E402
+from epidemiccare.dashboard import archive_progress, cohort_progress  # noqa: E402
+from epidemiccare.progress import CHECKIN_SYMPTOMS  # noqa: E402
+from epidemiccare.session import TriageResult  # noqa: E402
+from epidemiccare.store import ProgressStore  # noqa: E402
+from synthetic import synthetic_checkins, synthetic_symptoms  # noqa: E402
+
+
+def rss_anon_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def timed(label, fn):
+    before = rss_anon_mb()
+    t0 = time.perf_counter()
+    out = fn()
+    print(f"  {label:<34} {time.perf_counter() - t0:8.2f}s  {rss_anon_mb() - before:+8.1f} MB")
+    return out
+
+
+def size_mb(directory, kind, fmt):
+    return os.path.getsize(table_path(directory, kind, fmt)) / 2**20
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    rng = random.Random(0)
+    end = datetime.date.today() - datetime.timedelta(days=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"patients={n:,} check-ins={n * days:,}")
+        source = ProgressStore(os.path.join(tmp, "source.db"), batch_size=4096)
+
+        def fill():
+            for i in range(n):
+                symptoms = synthetic_symptoms(rng, STEPS)
+                source.save_consultation(f"{i:032x}", symptoms, TriageResult(*assess_risk(symptoms), generate_diagnosis(symptoms, top_k=3)), end)
+                for checkin in synthetic_checkins(days, CHECKIN_SYMPTOMS, seed=i, end=end):
+                    source.add_checkin(f"{i:032x}", *checkin)
+            source.flush()
+        timed("per-record save/add_checkin", fill)
+
+        for fmt in ("arrow", "parquet"):
+            out = os.path.join(tmp, fmt)
+            timed(f"export {fmt}", lambda: export_store(source, out, fmt))
+            print(f"  {'':<34} consultations {size_mb(out, 'consultations', fmt):.1f} MB, "
+                  f"check-ins {size_mb(out, 'checkins', fmt):.1f} MB")
+            target = ProgressStore(os.path.join(tmp, f"{fmt}.db"))
+            timed(f"import {fmt}", lambda: import_files(target, [table_path(out, k, fmt) for k in ("consultations", "checkins")]))
+
+        arrow = os.path.join(tmp, "arrow")
+        rows = timed("open: store rows (Python tuples)", source.all_checkins)
+        del rows
+        table = timed("open: parquet (decoded)", lambda: open_table(table_path(os.path.join(tmp, "parquet"), "checkins", "parquet")))
+        del table
+        table = timed("open: arrow (memory-mapped)", lambda: open_table(table_path(arrow, "checkins")))
+        timed("  sum of ratings from the map", lambda t=table: t.column("rating").to_numpy().sum(dtype="int64"))
+        del table
+
+        timed("dashboard from the store", lambda: cohort_progress(source))
+        timed("dashboard from the arrow archive", lambda: archive_progress(arrow))
+
+
+if __name__ == "__main__":
+    main()
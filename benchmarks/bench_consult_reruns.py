@@ -0,0 +1,46 @@
+"""Count script executions for a full consultation.
+
+    python benchmarks/bench_consult_reruns.py
+
+Drives the app headlessly with Streamlit's AppTest: open Home, click
+"Start Consultation", answer all STEPS. Each answer should cost exactly one
+script execution (the app's `script_runs` counter), so the expected total is
+len(STEPS) + 2.
+"""
+import os
+import time
+
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app.py")
+ANSWERS = {"name": "Ada", "age": 64, "conditions": "asthma", "fever": "Yes", "cough_breathing": "Yes",
+           "body_aches": "No", "loss_taste_smell": "Not sure", "fatigue": "Yes",
+           "other_symptoms": "sore throat and chills", "spo2": 93}
+
+
+def answer(at, key, value):
+    widgets = list(at.text_input) + list(at.number_input) + list(at.radio)
+    next(w for w in widgets if w.key == f"in_{key}").set_value(value)
+    next(b for b in at.button if b.label == "Submit").click()
+    return at.run()
+
+
+def main():
+    at = AppTest.from_file(APP, default_timeout=30)
+    at.session_state["voice_enabled"] = False
+    t0 = time.perf_counter()
+    at.run()
+    next(b for b in at.button if b.label.startswith("Start Consultation")).click()
+    at.run()
+    for key, value in ANSWERS.items():
+        answer(at, key, value)
+    elapsed = time.perf_counter() - t0
+    assert not at.exception, at.exception
+    assert at.session_state["treatment_plan"], "consultation did not finish"
+
+    runs = at.session_state["script_runs"]
+    print(f"steps={len(ANSWERS)}  script_runs={runs} (expected {len(ANSWERS) + 2})  wall={elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
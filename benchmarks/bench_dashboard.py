@@ -0,0 +1,67 @@
+"""Clinician dashboard: aggregation time and chart payload, raw vs. LTTB-downsampled.
+
+    python benchmarks/bench_dashboard.py [max_patients]
+
+Fills a temporary store with patients who have 1-365 daily check-ins, then
+times cohort_progress and compares the Arrow bytes sent to the browser by
+charting every raw check-in with those sent by the downsampled series (the
+per-patient trends plus the two cohort series).
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from epidemiccare.dashboard import POINT_BUDGET, cohort_progress  # noqa: E402
+from epidemiccare.progress import CHECKIN_SYMPTOMS  # noqa: E402
+from epidemiccare.store import ProgressStore  # noqa: E402
+from synthetic import synthetic_checkins  # noqa: E402
+
+
+def arrow_bytes(df: pd.DataFrame) -> int:
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(df)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+
+def fill(store: ProgressStore, first: int, last: int, rng: random.Random):
+    for p in range(first, last):
+        patient = f"{p:032x}"
+        store.save_consultation(patient, {"name": f"patient-{p}"}, {"risk": rng.choice(["low", "medium", "high"]),
+                                "score": 0, "detail": {}, "possible": []}, None)
+        for checkin in synthetic_checkins(rng.randint(1, 365), CHECKIN_SYMPTOMS, seed=p):
+            store.add_checkin(patient, *checkin)
+    store.flush()
+
+
+def main():
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    sizes = [n for n in (100, 500, 2_000, 10_000) if n <= top] or [top]
+    rng = random.Random(0)
+    print(f"budget={POINT_BUDGET} points per series")
+    print(f"{'patients':>8} {'check-ins':>10} {'aggregate s':>12} {'points sent':>12} {'raw KB':>9} {'sent KB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ProgressStore(os.path.join(tmp, "bench.db"))
+        have = 0
+        for n in sizes:
+            fill(store, have, n, rng)
+            have = n
+            t0 = time.perf_counter()
+            view = cohort_progress(store)
+            elapsed = time.perf_counter() - t0
+            raw = pd.DataFrame(store.all_checkins(), columns=["patient", "date", "rating", "taken"])
+            sent = pd.concat([s.to_frame().assign(patient=p) for p, s in view.trends.items()])
+            sent_bytes = arrow_bytes(sent) + arrow_bytes(view.severity.to_frame()) + arrow_bytes(view.adherence.to_frame())
+            print(f"{n:>8,} {view.checkins:>10,} {elapsed:>12.2f} {view.points:>12,} "
+                  f"{arrow_bytes(raw) / 1024:>9,.0f} {sent_bytes / 1024:>9,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Websocket bytes and delta messages per rerun, page by page.
+
+    python benchmarks/bench_deltas.py [--app streamlit_app.py] [--out deltas.json]
+
+Starts the app with `streamlit run` and opens one session as a browser would,
+keeping the browser's message cache (see bench_load.Session). It then visits
+Home, Resources, Consultation, Treatment Plan and Progress through the sidebar
+navigation. The consultation is answered in between, so the last two pages
+have a plan to show. Each page is measured on the rerun that opens it and on
+a second rerun with nothing changed, as a widget interaction would cause.
+Static pages should cost little on the second rerun: their elements are
+either small or sent as cache references. After each page it also reports
+the browser's message cache: entries and their bytes. The hashes go to the
+server with every rerun. Pass --app a copy of an older
+streamlit_app.py, placed in the repository root, to compare.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+
+from websockets.asyncio.client import connect
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_load import ROOT, STEPS, Session, free_port, start_server, step_values, wait_ready  # noqa: E402
+from synthetic import synthetic_symptoms  # noqa: E402
+
+PAGES = [("home", "Home"), ("resources", "Resources"), ("consult", "Consultation"),
+         ("plan", "Treatment Plan"), ("progress", "Progress")]
+
+
+async def measure(url: str):
+    results = []
+    async with connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+        session = Session(ws)
+        await session.rerun()
+        for name, label in PAGES:
+            if name == "plan":  # answer the consultation, so the plan and progress pages have content
+                symptoms = synthetic_symptoms(random.Random(0), STEPS)
+                for step in STEPS:
+                    await session.rerun(step_values(step, symptoms[step["key"]]))
+            if name != "home":
+                await session.rerun({("radio", "Navigation"): label})
+            first = session.received
+            await session.rerun()
+            cache = {"entries": len(session.cache), "bytes": sum(m.ByteSize() for m, _ in session.cache.values())}
+            results.append({"page": name, "first": first, "rerun": session.received, "cache": cache})
+    return results
+
+
+async def run(app: str):
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        server = start_server(port, os.path.join(tmp, "deltas.db"), app)
+        try:
+            await wait_ready(url, server)
+            return await measure(url)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "streamlit_app.py"), help="app script to serve")
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(os.path.abspath(args.app)))
+    print(f"{'page':<10} {'first: bytes':>12} {'deltas':>6}   {'rerun: bytes':>12} {'deltas':>6}   {'cache: entries':>14} {'bytes':>7}")
+    for r in results:
+        print(f"{r['page']:<10} {r['first']['bytes']:>12,} {r['first']['deltas']:>6}   "
+              f"{r['rerun']['bytes']:>12,} {r['rerun']['deltas']:>6}   {r['cache']['entries']:>14} {r['cache']['bytes']:>7,}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"app": os.path.relpath(args.app, ROOT), "results": results}, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
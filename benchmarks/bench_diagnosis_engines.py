@@ -0,0 +1,94 @@
+"""Rule-based vs. probabilistic diagnosis as the catalogue grows.
+
+    python benchmarks/bench_diagnosis_engines.py [max_diseases]
+
+For each catalogue size, a synthetic catalogue is written and loaded through
+EPIDEMICCARE_CATALOGUE in a fresh interpreter. Each disease lists 1-4 STEPS
+symptom keys and 2-6 keywords from a shared vocabulary. The script reports:
+
+- the probabilistic engine's compile time and matrix size
+- the time per patient: generate_diagnosis vs. ProbabilisticEngine.generate_diagnosis, top 3
+- the time per record over a batch: generate_diagnosis_batch vs. predict_batch, top 3
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+SYMPTOM_KEYS = ["fever", "cough_breathing", "body_aches", "loss_taste_smell", "fatigue"]
+
+PROBE = """
+import json, sys, time
+sys.path[:0] = [{root!r}, {here!r}]
+from epidemiccare import CATALOGUE, STEPS, generate_diagnosis
+from epidemiccare.batch import generate_diagnosis_batch, records_to_columns
+from epidemiccare.probabilistic import ProbabilisticEngine
+from synthetic import long_other, synthetic_records
+import random
+
+t0 = time.perf_counter()
+engine = ProbabilisticEngine(CATALOGUE)
+compile_s = time.perf_counter() - t0
+rng = random.Random(1)
+keywords = [kw for info in CATALOGUE.diseases.values() for kw in info["keywords"]]
+records = synthetic_records(300, STEPS, seed=2)
+for r in records:
+    r["other_symptoms"] = long_other(rng, keywords, 30)
+batch = records_to_columns(synthetic_records({batch}, STEPS, seed=3))
+
+def per_call(fn, items, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(items)
+
+def per_row(fn):
+    t0 = time.perf_counter()
+    fn(batch, top_k=3)
+    return (time.perf_counter() - t0) / {batch}
+
+print(json.dumps({{
+    "compile": compile_s,
+    "mb": (engine._answers.nbytes + engine._keywords.nbytes) / 2**20,
+    "rules": per_call(lambda r: generate_diagnosis(r, top_k=3), records),
+    "prob": per_call(lambda r: engine.generate_diagnosis(r, top_k=3), records),
+    "rules_batch": per_row(generate_diagnosis_batch),
+    "prob_batch": per_row(engine.predict_batch),
+}}))
+"""
+
+
+def synthetic_catalogue(n: int, rng: random.Random):
+    vocabulary = [f"sign{i}" for i in range(max(50, min(4 * n, 4000)))]
+    return {f"Condition {i}": {"symptom_keys": rng.sample(SYMPTOM_KEYS, rng.randint(1, 4)),
+                               "keywords": rng.sample(vocabulary, rng.randint(2, 6)),
+                               "description": "", "precautions": []} for i in range(n)}
+
+
+def main():
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rng = random.Random(0)
+    print(f"{'diseases':>8} {'compile s':>9} {'matrix MB':>9} {'rules µs':>9} {'prob µs':>8}"
+          f" {'rules batch µs/row':>18} {'prob batch µs/row':>17}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [n for n in (10, 100, 1_000, 5_000, 10_000, 20_000) if n <= top]:
+            path = os.path.join(tmp, f"catalogue-{n}.json")
+            with open(path, "w") as f:
+                json.dump(synthetic_catalogue(n, rng), f)
+            env = {**os.environ, "EPIDEMICCARE_CATALOGUE": path}
+            code = PROBE.format(root=ROOT, here=HERE, batch=2_000)
+            r = json.loads(subprocess.run([sys.executable, "-c", code], env=env, capture_output=True,
+                                          text=True, check=True).stdout)
+            print(f"{n:>8,} {r['compile']:>9.2f} {r['mb']:>9.1f} {r['rules'] * 1e6:>9.0f} {r['prob'] * 1e6:>8.0f}"
+                  f" {r['rules_batch'] * 1e6:>18.1f} {r['prob_batch'] * 1e6:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
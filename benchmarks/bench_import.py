@@ -0,0 +1,45 @@
+"""Cold-start import time: the Streamlit-free core vs. the whole app.
+
+    python benchmarks/bench_import.py [runs]
+
+Each sample is a fresh interpreter, so nothing is shared between runs. The
+app is imported in bare mode (no server), which still pays for Streamlit
+itself; the core must not pull in Streamlit, pandas or NumPy at all.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+PROBE = """
+import sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print(elapsed, ",".join(m for m in ("streamlit", "pandas", "numpy") if m in sys.modules))
+"""
+
+
+def sample(module: str):
+    env = {**os.environ, "PYTHONPATH": ROOT, "PYTHONDONTWRITEBYTECODE": "1"}
+    out = subprocess.run([sys.executable, "-c", PROBE.format(module=module)], env=env, cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), out[1] if len(out) > 1 else ""
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    for module in ("epidemiccare", "streamlit_app"):
+        results = [sample(module) for _ in range(runs)]
+        times = [t for t, _ in results]
+        heavy = results[-1][1] or "none"
+        print(f"import {module:<14} median={statistics.median(times) * 1e3:8.1f} ms  "
+              f"min={min(times) * 1e3:8.1f} ms  heavy modules loaded: {heavy}")
+        if module == "epidemiccare":
+            assert heavy == "none", f"the core must stay Streamlit/pandas/NumPy-free, got {heavy}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Keyword matching cost vs. catalogue size.
+
+    python benchmarks/bench_keywords.py
+
+Builds synthetic catalogues with 10 .. 10,000 keywords and times one
+`other_symptoms` lookup with the old per-keyword `re.search` loop and with
+KeywordIndex. The index should stay roughly flat as keywords grow.
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from epidemiccare.keywords import KeywordIndex  # noqa: E402
+
+TEXT = "severe headache since monday, some nausea and a rash on both arms; mild chills at night"
+SYLLABLES = ["ra", "sh", "ne", "co", "gh", "ly", "mph", "or", "bi", "tal", "se", "ve", "pa", "in", "ku", "dro"]
+
+
+def synthetic_catalogue(n_keywords, per_disease=5, seed=0):
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < n_keywords:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        words.add(word if rng.random() < 0.7 else word + " " + rng.choice(SYLLABLES) * 2)
+    words = sorted(words)
+    return {f"Condition {i}": {"keywords": words[i:i + per_disease]} for i in range(0, len(words), per_disease)}
+
+
+def legacy_hits(diseases, text):
+    counts = {}
+    for disease, info in diseases.items():
+        n = sum(1 for kw in info["keywords"] if re.search(rf"\b{re.escape(kw)}\b", text))
+        if n:
+            counts[disease] = n
+    return counts
+
+
+def per_call(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main():
+    print(f"{'keywords':>8}  {'re.search loop (µs)':>20}  {'KeywordIndex (µs)':>18}  {'index build (ms)':>16}")
+    for n in (10, 100, 1_000, 10_000):
+        diseases = synthetic_catalogue(n)
+        t0 = time.perf_counter()
+        index = KeywordIndex(diseases)
+        build_ms = (time.perf_counter() - t0) * 1e3
+        assert index.hits(TEXT) == legacy_hits(diseases, TEXT)
+        legacy = per_call(lambda: legacy_hits(diseases, TEXT), max(3, 20_000 // n))
+        indexed = per_call(lambda: index.hits(TEXT), 2_000)
+        print(f"{n:>8}  {legacy:>20.1f}  {indexed:>18.1f}  {build_ms:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
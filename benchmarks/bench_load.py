@@ -0,0 +1,327 @@
+"""Concurrent users through the full consultation flow, against a real server.
+
+    python benchmarks/bench_load.py [--users 1,2,4,8,16,32] [--flows 2] [--out load.json]
+                                    [--compare baseline.json] [--threshold 0.25]
+
+Starts `streamlit run streamlit_app.py` on a free port with a temporary store.
+Then, for each concurrency level, drives that many simulated users at once
+over Streamlit's websocket, as a browser would. Each user opens a fresh
+session and makes one rerun per step: home, "Start Consultation", the 10
+STEPS answers, "View Treatment Plan", "Start Progress Tracking" and a daily
+check-in. It does `--flows` such flows in a row.
+
+AppTest is not used: it runs the script in-process on a global Runtime, so it
+cannot hold concurrent sessions.
+
+Reported per level:
+- flows/s and steps/s.
+- p50/p95/p99 step latency: from sending a rerun until its script_finished.
+- The server's peak resident memory while the level ran (Linux only).
+- Mean websocket bytes per rerun, and the most message hashes a session sent
+  with one rerun (the server holds that set for the rerun; the browser holds
+  the messages).
+
+Saturation is the first level after which throughput grows by less than 10%.
+Past it, more users only add latency. Results are JSON. With --compare, a level
+whose p95 is more than `threshold` slower than the baseline, or whose flows/s
+is more than `threshold` lower, is reported, and the exit status is 1.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import streamlit
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.asyncio.client import connect
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP = os.path.join(ROOT, "streamlit_app.py")
+sys.path.insert(0, ROOT)
+from epidemiccare import STEPS  # noqa: E402
+from epidemiccare.progress import CHECKIN_SYMPTOMS  # noqa: E402
+from synthetic import synthetic_symptoms  # noqa: E402
+
+SATURATION_GAIN = 0.10  # throughput growth below which another level counts as saturated
+
+
+class Session:
+    """One browser tab: a websocket session that reruns the script with widget values."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.query_string = ""
+        self.widgets = {}  # (element type, label or key) -> widget id, from the last run
+        # the browser's message cache: hash -> [message, reruns since last sent]; its hashes go
+        # with every rerun, and the server sends a cached element back as a reference
+        self.cache = {}
+        self.max_cache_age = 2
+        self.received = {"bytes": 0, "messages": 0, "deltas": 0}  # for the last rerun
+
+    async def rerun(self, values=None) -> float:
+        """Rerun with `values` ({(element type, label or key): value}); returns the seconds taken."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query_string
+        for (kind, name), value in (values or {}).items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = self.widgets[kind, name]
+            if kind == "button":
+                state.trigger_value = True
+            elif kind == "slider":
+                state.double_array_value.data.append(value)
+            elif kind == "multiselect":
+                state.string_array_value.data.extend(value)
+            elif kind == "checkbox":
+                state.bool_value = value
+            elif kind == "number_input":
+                state.double_value = value
+            else:  # text_input, radio
+                state.string_value = value
+        msg.rerun_script.cached_message_hashes.extend(self.cache)
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        widgets, received = {}, {"bytes": 0, "messages": 0, "deltas": 0}
+        while True:
+            raw = await self.ws.recv()
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            received["bytes"] += len(raw)
+            received["messages"] += 1
+            if fwd.WhichOneof("type") == "ref_hash":
+                entry = self.cache[fwd.ref_hash]
+                entry[1] = 0
+                fwd = entry[0]
+            elif fwd.metadata.cacheable:
+                self.cache[fwd.hash] = [fwd, 0]
+            kind = fwd.WhichOneof("type")
+            received["deltas"] += kind == "delta"
+            if kind == "new_session":
+                self.max_cache_age = fwd.new_session.config.max_cached_message_age
+            elif kind == "page_info_changed":
+                self.query_string = fwd.page_info_changed.query_string
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                etype = element.WhichOneof("type")
+                if etype == "exception":
+                    raise RuntimeError(f"app raised {element.exception.type}: {element.exception.message}")
+                widget_id = getattr(getattr(element, etype), "id", "")
+                if widget_id:
+                    key = widget_id.rsplit("-", 1)[-1]  # "$$ID-<hash>-<key>"; "None" without a key
+                    widgets[etype, getattr(element, etype).label if key == "None" else key] = widget_id
+            elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                if fwd.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("app failed to compile")
+                elapsed = time.perf_counter() - t0
+                self.widgets, self.received = widgets, received
+                for h, entry in list(self.cache.items()):
+                    entry[1] += 1
+                    if entry[1] > self.max_cache_age:
+                        del self.cache[h]
+                return elapsed
+
+
+def step_values(step, answer):
+    kind = {"text": "text_input", "number": "number_input", "choice": "radio"}[step["kind"]]
+    values = {("button", "Submit"): True}
+    if answer is not None:  # an unset number keeps the widget's default
+        values[kind, f"in_{step['key']}"] = float(answer) if step["kind"] == "number" else str(answer)
+    return values
+
+
+async def flow(url: str, rng: random.Random, latencies: list):
+    """One user from home to a saved check-in; appends (step, seconds, bytes, cached hashes sent) to `latencies`."""
+    symptoms = synthetic_symptoms(rng, STEPS)
+    async with connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+        session = Session(ws)
+
+        async def rerun(name, values=None):
+            hashes = len(session.cache)
+            seconds = await session.rerun(values)
+            latencies.append((name, seconds, session.received["bytes"], hashes))
+
+        await rerun("home")
+        await rerun("start", {("button", "Start Consultation ➜"): True})
+        for step in STEPS:
+            await rerun(f"step[{step['key']}]", step_values(step, symptoms[step["key"]]))
+        await rerun("plan", {("button", "View Treatment Plan ➜"): True})
+        await rerun("progress", {("button", "Start Progress Tracking"): True})
+        await rerun("checkin", {
+            ("slider", "checkin_rating"): float(rng.randint(1, 10)),
+            ("multiselect", "checkin_symptoms"): rng.sample(CHECKIN_SYMPTOMS, rng.randint(0, 3)),
+            ("checkbox", "checkin_taken"): rng.random() < 0.8,
+            ("button", "Save Today's Progress"): True})
+        if ("slider", "checkin_rating") in session.widgets:  # the form is only drawn until today's check-in is saved
+            raise RuntimeError("check-in was not saved")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, db: str, app: str = APP) -> subprocess.Popen:
+    env = dict(os.environ, EPIDEMICCARE_DB=db)
+    env.pop("EPIDEMICCARE_METRICS", None)
+    return subprocess.Popen([sys.executable, "-m", "streamlit", "run", app, "--server.headless", "true",
+                             "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+async def wait_ready(url: str, server: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            async with connect(url, subprotocols=["streamlit"]):
+                return
+        except OSError:
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("server did not start: " + server.stderr.read().decode()[-2000:]) from None
+            await asyncio.sleep(0.2)
+
+
+def rss_mb(pid: int):
+    """Resident memory of `pid` in MB, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+async def level(url: str, pid: int, users: int, flows: int, seed: int):
+    latencies, peak = [], [rss_mb(pid)]
+
+    async def user(u):
+        rng = random.Random(seed * 10_000 + u)
+        for _ in range(flows):
+            await flow(url, rng, latencies)
+
+    async def sample_memory():
+        while True:
+            peak.append(rss_mb(pid))
+            await asyncio.sleep(0.1)
+
+    sampler = asyncio.create_task(sample_memory())
+    t0 = time.perf_counter()
+    try:
+        await asyncio.gather(*(user(u) for u in range(users)))
+    finally:
+        elapsed = time.perf_counter() - t0
+        sampler.cancel()
+    samples = sorted(s for _, s, _, _ in latencies)
+    by_step = {}
+    for step, s, _, _ in latencies:
+        by_step.setdefault(step, []).append(s)
+    memory = [m for m in peak if m is not None]
+    return {"name": f"load[users={users}]", "unit": "s", "users": users, "flows": users * flows, "steps": len(samples),
+            "seconds": elapsed, "flows_per_s": users * flows / elapsed, "steps_per_s": len(samples) / elapsed,
+            "median": statistics.median(samples), "p95": percentile(samples, 0.95), "p99": percentile(samples, 0.99),
+            "max": samples[-1], "rss_mb": max(memory) if memory else None,
+            "rerun_bytes": statistics.mean(b for _, _, b, _ in latencies),
+            "cached_hashes": max(h for _, _, _, h in latencies),
+            "step_median": {step: statistics.median(v) for step, v in by_step.items()}}
+
+
+def saturation(results):
+    """The first level whose next level adds less than SATURATION_GAIN throughput; None if throughput still grows."""
+    for r, nxt in zip(results, results[1:]):
+        if nxt["flows_per_s"] < r["flows_per_s"] * (1 + SATURATION_GAIN):
+            return r["users"]
+    return None
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        old = baseline.get(r["name"])
+        if not old:
+            continue
+        if r["p95"] > old["p95"] * (1 + threshold):
+            regressions.append(f"{r['name']} p95: {old['p95'] * 1e3:.1f}ms -> {r['p95'] * 1e3:.1f}ms")
+        if r["flows_per_s"] < old["flows_per_s"] * (1 - threshold):
+            regressions.append(f"{r['name']} flows/s: {old['flows_per_s']:.2f} -> {r['flows_per_s']:.2f}")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+async def run_levels(levels, flows):
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        server = start_server(port, os.path.join(tmp, "load.db"))
+        try:
+            await wait_ready(url, server)
+            await flow(url, random.Random(-1), [])  # warm-up: imports, caches and the store's tables
+            results = []
+            for i, users in enumerate(levels):
+                r = await level(url, server.pid, users, flows, seed=i)
+                print(f"users={users:<4} {r['flows_per_s']:6.2f} flows/s {r['steps_per_s']:7.1f} steps/s  "
+                      f"p50 {r['median'] * 1e3:6.1f}ms  p95 {r['p95'] * 1e3:7.1f}ms  p99 {r['p99'] * 1e3:7.1f}ms  "
+                      f"rss {r['rss_mb'] or 0:.0f}MB  {r['rerun_bytes']:,.0f}B/rerun", file=sys.stderr)
+                results.append(r)
+            return results
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", default="1,2,4,8,16,32", help="comma-separated concurrency levels (default 1,2,4,8,16,32)")
+    parser.add_argument("--flows", type=int, default=2, help="flows per user at each level (default 2)")
+    parser.add_argument("--out", help="write results JSON here instead of stdout")
+    parser.add_argument("--compare", help="baseline results JSON to check against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p95 slowdown or throughput drop vs. baseline (default 0.25)")
+    args = parser.parse_args()
+
+    levels = [int(u) for u in args.users.split(",")]
+    results = asyncio.run(run_levels(levels, args.flows))
+    saturated = saturation(results)
+    print(f"saturation: {f'{saturated} users' if saturated else 'not reached'}", file=sys.stderr)
+
+    report = {"meta": {"timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                       "git": git_revision(), "python": platform.python_version(),
+                       "streamlit": streamlit.__version__, "machine": platform.machine(), "cpus": os.cpu_count(),
+                       "flows_per_user": args.flows, "saturation_users": saturated},
+              "results": results}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for line in regressions:
+            print("REGRESSION", line, file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Instrumentation overhead: metrics off vs. on.
+
+    python benchmarks/bench_metrics.py
+
+Times the consultation's scoring path (assess_risk_lookup, generate_diagnosis
+top 3, build_treatment_plan) and a page-render timer block in fresh
+interpreters with EPIDEMICCARE_METRICS unset and set to 1. With metrics off
+the scoring functions must be the undecorated originals.
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+PROBE = """
+import json, os, random, sys, time
+sys.path[:0] = [{root!r}, {bench!r}]
+from epidemiccare import STEPS, build_treatment_plan, generate_diagnosis, metrics
+from epidemiccare.risk_table import assess_risk_lookup, get_risk_results
+from synthetic import synthetic_records
+
+get_risk_results()
+records = synthetic_records(2000, STEPS, seed=1)
+hist = metrics.histogram("bench_seconds", "bench")
+
+def pipeline():
+    for r in records:
+        risk, _, _ = assess_risk_lookup(r)
+        possible = generate_diagnosis(r, top_k=3)
+        build_treatment_plan(risk, possible[0][0])
+
+def timers():
+    for _ in range(len(records)):
+        with metrics.timer(hist, page="page_home"):
+            pass
+
+out = {{"wrapped": hasattr(generate_diagnosis, "__wrapped__")}}
+for name, fn in (("pipeline", pipeline), ("timer", timers)):
+    fn()
+    best = float("inf")
+    for _ in range(7):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    out[name] = best / len(records)
+print(json.dumps(out))
+"""
+
+
+def sample(enabled: bool):
+    env = {k: v for k, v in os.environ.items() if not k.startswith("EPIDEMICCARE_METRICS")}
+    if enabled:
+        env.update(EPIDEMICCARE_METRICS="1", EPIDEMICCARE_METRICS_PORT="0")
+    code = PROBE.format(root=ROOT, bench=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout)
+
+
+def main():
+    off, on = sample(False), sample(True)
+    assert not off["wrapped"] and on["wrapped"]
+    for name, what in (("pipeline", "scoring path per consultation"), ("timer", "timer() block")):
+        print(f"{what:<32} off={off[name] * 1e6:7.2f} µs  on={on[name] * 1e6:7.2f} µs  (+{(on[name] - off[name]) * 1e6:.2f} µs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Treatment-plan construction before and after the precomputed plan table.
+
+    python benchmarks/bench_plans.py
+
+Times the old build-a-fresh-dict-per-call implementation against
+build_treatment_plan, and checks both return the same plan for every
+(risk, top_disease) combination.
+"""
+import itertools
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from epidemiccare import DISEASES, build_treatment_plan  # noqa: E402
+from epidemiccare.plans import BASE_PLANS  # noqa: E402
+
+
+def legacy_build_treatment_plan(risk: str, top_disease: Optional[str]) -> Dict:
+    plans = {risk: {**p, "medication": list(p["medication"])} for risk, p in BASE_PLANS.items()}
+    plan = plans[risk].copy()
+
+    if top_disease == "COVID-19":
+        plan["monitoring"] += " Consider pulse-ox checks if available."
+        plan["isolation"] = "Isolate at home; typical isolation ~10 days from symptom onset (follow local guidance)."
+    elif top_disease == "Influenza":
+        plan["medication"].insert(0, "Antivirals can help if started early — consult promptly.")
+    elif top_disease == "Dengue Fever":
+        plan["medication"].append("Avoid NSAIDs unless advised by a clinician.")
+        plan["monitoring"] = "Hydrate well; seek care urgently for bleeding, severe abdominal pain, persistent vomiting, or drowsiness."
+    elif top_disease == "Mpox (Monkeypox)":
+        plan["isolation"] = "Avoid close contact; cover lesions; isolate until lesions crust/heal."
+
+    return plan
+
+
+def main(repeat=20_000):
+    combos = list(itertools.product(BASE_PLANS, [None, *DISEASES]))
+    for risk, disease in combos:
+        assert build_treatment_plan(risk, disease).as_dict() == legacy_build_treatment_plan(risk, disease)
+
+    for name, fn in (("legacy (dict per call)", legacy_build_treatment_plan), ("plan table", build_treatment_plan)):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for risk, disease in combos:
+                fn(risk, disease)
+        print(f"{name:>24}: {(time.perf_counter() - t0) / (repeat * len(combos)) * 1e6:.2f} µs/plan")
+
+
+if __name__ == "__main__":
+    main()
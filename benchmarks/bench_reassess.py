@@ -0,0 +1,55 @@
+"""Nightly re-assessment cost vs. how many patients checked in since the last run.
+
+    python benchmarks/bench_reassess.py [patients]
+
+Fills a temporary store with `patients` consultations, each with a week of
+check-ins, and runs the queue empty. It then adds a check-in for 0%, 0.1%,
+1% and 10% of the patients, and times a run after each. The run time should
+follow the number of queued patients, not the size of the store.
+"""
+import datetime
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from epidemiccare import STEPS, assess_risk, generate_diagnosis  # noqa: E402
+from epidemiccare.progress import CHECKIN_SYMPTOMS  # noqa: E402
+from epidemiccare.reassess import run  # noqa: E402
+from epidemiccare.session import TriageResult  # noqa: E402
+from epidemiccare.store import ProgressStore  # noqa: E402
+from synthetic import synthetic_checkins, synthetic_symptoms  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(0)
+    today = datetime.date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ProgressStore(os.path.join(tmp, "bench.db"), batch_size=4096)
+        for i in range(n):
+            symptoms = synthetic_symptoms(rng, STEPS)
+            store.save_consultation(f"{i:032x}", symptoms, TriageResult(*assess_risk(symptoms), generate_diagnosis(symptoms, top_k=3)), None)
+            for checkin in synthetic_checkins(7, CHECKIN_SYMPTOMS, seed=i, end=today - datetime.timedelta(days=1)):
+                store.add_checkin(f"{i:032x}", *checkin)
+        store.flush()
+        run(store, log=io.StringIO())  # the initial backlog
+        print(f"patients={n:,}")
+        print(f"{'checked in':>10} {'queued':>8} {'seconds':>8} {'patients/s':>11}")
+        for share in (0, 0.001, 0.01, 0.1):
+            for i in rng.sample(range(n), int(n * share)):
+                store.add_checkin(f"{i:032x}", today, rng.randint(1, 10), rng.sample(CHECKIN_SYMPTOMS, 2), True)
+            queued = len(store.queued(limit=n))
+            t0 = time.perf_counter()
+            counts = run(store, log=io.StringIO())
+            elapsed = time.perf_counter() - t0
+            assert counts["reassessed"] == queued
+            rate = f"{queued / elapsed:>11,.0f}" if queued else f"{'-':>11}"
+            print(f"{share:>10.1%} {queued:>8,} {elapsed:>8.3f} {rate}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Re-triage throughput vs. worker processes.
+
+    python benchmarks/bench_retriage.py [rows] [max_workers]
+
+Writes a synthetic NDJSON archive and re-triages it with 1, 2, 4, ...
+workers up to `max_workers` (default: all cores). Reports records/s, speedup
+and parallel efficiency per worker count. It also checks that the output is
+byte-identical across worker counts.
+"""
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from epidemiccare import STEPS  # noqa: E402
+from epidemiccare.retriage import retriage  # noqa: E402
+from synthetic import synthetic_symptoms  # noqa: E402
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    counts = sorted({1, *(2 ** i for i in range(1, 8) if 2 ** i <= max_workers), max_workers})
+    print(f"cores={os.cpu_count()} rows={rows:,}")
+    print(f"{'workers':>7} {'seconds':>8} {'records/s':>11} {'speedup':>8} {'efficiency':>10}")
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, "archive.ndjson")
+        with open(archive, "w") as f:
+            for i in range(rows):
+                f.write(json.dumps({"id": i, **synthetic_symptoms(rng, STEPS)}) + "\n")
+        # enough shards for the largest pool to stay busy
+        shard_mb = max(0.25, os.path.getsize(archive) / 2**20 / (8 * max(counts)))
+        base, digest = None, None
+        for workers in counts:
+            out = os.path.join(tmp, f"out-{workers}.ndjson")
+            t0 = time.perf_counter()
+            retriage([archive], out, workers=workers, shard_mb=shard_mb, log=io.StringIO())
+            elapsed = time.perf_counter() - t0
+            with open(out, "rb") as f:
+                h = hashlib.sha256(f.read()).hexdigest()
+            assert digest in (None, h), "output differs between worker counts"
+            digest, base = h, base or elapsed
+            print(f"{workers:>7} {elapsed:>8.2f} {rows / elapsed:>11,.0f} {base / elapsed:>7.2f}x {base / elapsed / workers:>9.0%}")
+            os.remove(out)
+
+
+if __name__ == "__main__":
+    main()
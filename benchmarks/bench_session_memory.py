@@ -0,0 +1,102 @@
+"""Bytes per session: the old dict/list session state vs. the compact records.
+
+    python benchmarks/bench_session_memory.py [sessions]
+
+Builds `sessions` sessions of each kind for several chat lengths and
+measures the Python heap they keep with tracemalloc. The dialogue is
+generated inside the measurement, so answer strings count. Catalogue, STEPS
+and plan objects exist before measuring starts, so they count once per
+process rather than once per session. "old" is what the app held before: chat_history as a list
+of (sender, message) tuples, an HTML cache of every full chat page, and
+treatment_plan as a dict restored from the store (JSON copies of each
+diagnosis' description and precautions). "compact" is ChatLog,
+visible-pages-only HTML and TriageResult. Spilled chat is reported
+separately, since it lives on disk.
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from epidemiccare import STEPS, assess_risk, build_treatment_plan, generate_diagnosis  # noqa: E402
+from epidemiccare.session import ChatLog, TriageResult, intern_message  # noqa: E402
+from synthetic import synthetic_symptoms  # noqa: E402
+
+CHAT_PAGE_SIZE = 50  # as in streamlit_app
+for _msg in ("Thanks. I'm analyzing your answers…", "(skipped)"):
+    intern_message(_msg)
+
+
+def render(sender, message):
+    who = '<div class="ec-doctor"><b>Dr. AI:</b> ' if sender == "doctor" else '<div class="ec-user"><b>You:</b> '
+    return f"{who}{message}</div>"
+
+
+def conversation(rng, messages):
+    """The consultation dialogue, repeated until `messages` long; answers are fresh strings, as widgets return them."""
+    out = []
+    while len(out) < messages:
+        symptoms = synthetic_symptoms(rng, STEPS)
+        for step in STEPS:
+            answer = str(symptoms[step["key"]] or "(skipped)")
+            out += [("doctor", step["prompt"]), ("user", "".join(list(answer)))]
+    return out[:messages], symptoms
+
+
+def old_session(seed, messages):
+    history, symptoms = conversation(random.Random(seed), messages)
+    pages = ["\n".join(render(s, m) for s, m in history[i:i + CHAT_PAGE_SIZE])
+             for i in range(0, len(history) // CHAT_PAGE_SIZE * CHAT_PAGE_SIZE, CHAT_PAGE_SIZE)]
+    risk, score, detail = assess_risk(symptoms)
+    possible = generate_diagnosis(symptoms, top_k=3)
+    # what load_consultation hands back: every string and list is a fresh JSON copy
+    restored = {"risk": "".join(list(risk)), "score": score, "detail": json.loads(json.dumps(detail)),
+                "possible": [tuple(p) for p in json.loads(json.dumps(possible))]}
+    restored["plan"] = build_treatment_plan(risk, possible[0][0])
+    return {"chat_history": history, "chat_page_html": pages, "treatment_plan": restored}
+
+
+def compact_session(seed, messages, spill_dir):
+    dialogue, symptoms = conversation(random.Random(seed), messages)
+    history = ChatLog(spill_dir=spill_dir)
+    for sender, message in dialogue:
+        history.append(sender, message)
+    full = len(history) // CHAT_PAGE_SIZE
+    pages = {full - 1: "\n".join(render(s, m) for s, m in history[(full - 1) * CHAT_PAGE_SIZE:full * CHAT_PAGE_SIZE])} if full else {}
+    risk, score, detail = assess_risk(symptoms)
+    result = TriageResult("".join(list(risk)), score, json.loads(json.dumps(detail)),
+                          [tuple(p) for p in json.loads(json.dumps(generate_diagnosis(symptoms, top_k=3)))])
+    return {"chat_history": history, "chat_page_html": pages, "treatment_plan": result}
+
+
+def measure(build, inputs):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [build(*args) for args in inputs]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(inputs), sessions
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{'messages':>8} {'old B/session':>14} {'compact B/session':>18} {'saved':>7} {'spilled to disk B':>18}")
+    with tempfile.TemporaryDirectory() as spill_dir:
+        for messages in (20, 200, 2_000):
+            inputs = [(seed, messages) for seed in range(n)]
+            old, _ = measure(old_session, inputs)
+            compact, sessions = measure(lambda seed, m: compact_session(seed, m, spill_dir), inputs)
+            for old_s, new_s in zip((old_session(*a) for a in inputs[:5]), sessions[:5]):
+                assert list(new_s["chat_history"]) == old_s["chat_history"]
+                assert new_s["treatment_plan"]["possible"] == old_s["treatment_plan"]["possible"]
+            disk = sum(os.path.getsize(os.path.join(spill_dir, f)) for f in os.listdir(spill_dir)) / n
+            print(f"{messages:>8,} {old:>14,.0f} {compact:>18,.0f} {1 - compact / old:>6.0%} {disk:>18,.0f}")
+            for s in sessions:
+                s["chat_history"].close()
+
+
+if __name__ == "__main__":
+    main()
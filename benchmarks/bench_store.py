@@ -0,0 +1,58 @@
+"""ProgressStore throughput under many concurrent patients.
+
+    python benchmarks/bench_store.py [patients] [threads]
+
+Each thread plays a share of the patients: one "already checked in?" lookup
+followed by a check-in, for 30 days. Reports writes/s, lookup latency and
+that every check-in landed.
+"""
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from epidemiccare.store import ProgressStore  # noqa: E402
+
+DAYS = 30
+
+
+def main():
+    patients = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ProgressStore(os.path.join(tmp, "bench.db"))
+        start = datetime.date(2025, 1, 1)
+        lookups = [[] for _ in range(threads)]
+
+        def worker(t):
+            for day in range(DAYS):
+                date = start + datetime.timedelta(days=day)
+                for p in range(t, patients, threads):
+                    pid = f"patient-{p}"
+                    t0 = time.perf_counter()
+                    if not store.has_checkin(pid, date):
+                        lookups[t].append(time.perf_counter() - t0)
+                        store.add_checkin(pid, date, 5, ["Cough"], True)
+
+        t0 = time.perf_counter()
+        pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+        for th in pool:
+            th.start()
+        for th in pool:
+            th.join()
+        store.flush()
+        elapsed = time.perf_counter() - t0
+
+        lat = sorted(x for per in lookups for x in per)
+        assert len(store.checkins("patient-0")) == DAYS
+        print(f"patients={patients} threads={threads} checkins={patients * DAYS} "
+              f"writes/s={patients * DAYS / elapsed:,.0f} lookup p50={statistics.median(lat) * 1e6:.0f}µs "
+              f"p99={lat[int(len(lat) * 0.99)] * 1e6:.0f}µs")
+
+
+if __name__ == "__main__":
+    main()
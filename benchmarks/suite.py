@@ -0,0 +1,165 @@
+"""Benchmark suite: scoring functions and full-script page renders.
+
+    python benchmarks/suite.py [--out results.json] [--compare baseline.json] [--threshold 0.25]
+
+Times assess_risk, generate_diagnosis (short and long `other_symptoms`),
+build_treatment_plan, and full renders of every page through Streamlit's
+headless AppTest runner (reruns of a live session): Home, Consultation at several steps, Treatment
+Plan, and Progress with 1-365 days of history. Results are JSON. With
+--compare, any case whose median is more than `threshold` slower than the
+baseline is reported and the exit status is 1.
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import streamlit
+import streamlit.logger
+
+streamlit.logger.set_log_level("error")  # AppTest runs the app without a server
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP = os.path.join(ROOT, "streamlit_app.py")
+sys.path.insert(0, ROOT)
+from epidemiccare import DISEASES, STEPS, assess_risk, build_treatment_plan, generate_diagnosis  # noqa: E402
+from epidemiccare.plans import BASE_PLANS  # noqa: E402
+from epidemiccare.progress import CHECKIN_SYMPTOMS, ProgressSeries  # noqa: E402
+from epidemiccare.risk_table import assess_risk_lookup  # noqa: E402
+from epidemiccare.session import ChatLog, TriageResult  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from synthetic import long_other, synthetic_checkins, synthetic_symptoms  # noqa: E402
+
+
+def measure(fn, repeat, inner=1):
+    """Per-call seconds for `repeat` samples of `inner` calls each."""
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(inner):
+            fn()
+        samples.append((time.perf_counter() - t0) / inner)
+    samples.sort()
+    return {"n": repeat * inner, "median": statistics.median(samples), "mean": statistics.fmean(samples),
+            "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))], "min": samples[0]}
+
+
+def scoring_cases(rng):
+    keywords = [kw for info in DISEASES.values() for kw in info["keywords"]]
+    short = [synthetic_symptoms(rng, STEPS) for _ in range(200)]
+    long = [synthetic_symptoms(rng, STEPS, other=long_other(rng, keywords)) for _ in range(20)]
+    plans = [(risk, d) for risk in BASE_PLANS for d in (None, *DISEASES)]
+    it = {"short": itertools.cycle(short), "long": itertools.cycle(long), "plan": itertools.cycle(plans)}
+    yield "assess_risk", lambda: assess_risk(next(it["short"])), 50, 200
+    yield "assess_risk_lookup", lambda: assess_risk_lookup(next(it["short"])), 50, 200
+    yield "generate_diagnosis[short]", lambda: generate_diagnosis(next(it["short"])), 50, 200
+    yield "generate_diagnosis[long]", lambda: generate_diagnosis(next(it["long"])), 30, 20
+    yield "build_treatment_plan", lambda: build_treatment_plan(*next(it["plan"])), 50, 200
+
+
+def _consult_state(rng, step):
+    symptoms = synthetic_symptoms(rng, STEPS)
+    state = {"page": "consult", "voice_enabled": False, "current_idx": step, "chat_history": ChatLog(),
+             "symptoms": {s["key"]: symptoms[s["key"]] for s in STEPS[:step]}}
+    for s in STEPS[:step]:
+        state["chat_history"].append("doctor", s["prompt"])
+        state["chat_history"].append("user", str(symptoms[s["key"]]))
+    if step == len(STEPS):
+        state["treatment_plan"] = _plan(symptoms)
+    return state
+
+
+def _plan(symptoms):
+    return TriageResult(*assess_risk(symptoms), generate_diagnosis(symptoms, top_k=3))
+
+
+def page_cases(rng):
+    yield "page_home", {"page": "home"}
+    for step in (0, 5, len(STEPS)):
+        yield f"page_consult[step={step}]", _consult_state(rng, step)
+    yield "page_plan", {"page": "plan", "treatment_plan": _plan(synthetic_symptoms(rng, STEPS))}
+    for days in (1, 30, 90, 365):
+        progress = ProgressSeries()
+        for checkin in synthetic_checkins(days, CHECKIN_SYMPTOMS, seed=days):
+            progress.append(*checkin)
+        progress.start_date = progress.dates[0].item()
+        yield f"page_progress[days={days}]", {"page": "progress", "progress_data": progress,
+                                               "treatment_plan": _plan(synthetic_symptoms(rng, STEPS))}
+    yield "page_resources", {"page": "resources"}
+
+
+def render(state):
+    # one session per case; the first (warm-up) run starts it, samples time reruns
+    at = AppTest.from_file(APP, default_timeout=60)
+    for k, v in state.items():
+        at.session_state[k] = v
+
+    def run():
+        at.run()
+        assert not at.exception, at.exception
+    return run
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        old = baseline.get(r["name"])
+        if old and r["median"] > old["median"] * (1 + threshold):
+            regressions.append(f"{r['name']}: {old['median'] * 1e6:.1f}µs -> {r['median'] * 1e6:.1f}µs")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", help="write results JSON here instead of stdout")
+    parser.add_argument("--compare", help="baseline results JSON to check against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median slowdown vs. baseline (default 0.25)")
+    parser.add_argument("--renders", type=int, default=10, help="rerun samples per page (default 10)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    results = []
+    for name, fn, repeat, inner in scoring_cases(rng):
+        results.append({"name": name, "unit": "s", **measure(fn, repeat, inner)})
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["EPIDEMICCARE_DB"] = os.path.join(tmp, "bench.db")
+        for name, state in page_cases(rng):
+            results.append({"name": name, "unit": "s", **measure(render(state), args.renders)})
+
+    report = {"meta": {"timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                       "git": git_revision(), "python": platform.python_version(),
+                       "streamlit": streamlit.__version__, "machine": platform.machine()},
+              "results": results}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for line in regressions:
+            print("REGRESSION", line, file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
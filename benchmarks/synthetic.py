@@ -0,0 +1,49 @@
+"""Synthetic patients and progress histories shaped like the app's STEPS schema."""
+import datetime
+import random
+from typing import Dict, List, Optional
+
+SHORT_OTHER = ["", "", "headache", "sore throat and chills", "Rash on arms, some nausea", "runny nose, sneezing"]
+FILLER = ["woke up tired", "mild discomfort", "since tuesday", "worse at night", "after work", "on and off",
+          "took paracetamol", "feels warm", "not eating much", "slept badly"]
+CONDITIONS = ["", "", "", "asthma", "type 2 diabetes", "hypertension", "COPD"]
+
+
+def long_other(rng: random.Random, keywords: List[str], words: int = 400) -> str:
+    """A few hundred words of free text with some catalogue keywords mixed in."""
+    parts = []
+    while sum(len(p.split()) for p in parts) < words:
+        parts.append(rng.choice(keywords) if rng.random() < 0.15 else rng.choice(FILLER))
+    return ", ".join(parts)
+
+
+def synthetic_symptoms(rng: random.Random, steps: List[Dict], other: Optional[str] = None) -> Dict:
+    """One completed consultation: every STEPS key answered within its declared range/choices."""
+    out = {}
+    for step in steps:
+        key = step["key"]
+        if step["kind"] == "choice":
+            out[key] = rng.choice(step["choices"])
+        elif step["kind"] == "number":
+            out[key] = None if key == "spo2" and rng.random() < 0.4 else rng.randint(step.get("min", 0), step.get("max", 120))
+        elif key == "name":
+            out[key] = f"patient-{rng.randrange(10**6)}"
+        elif key == "conditions":
+            out[key] = rng.choice(CONDITIONS)
+        else:
+            out[key] = rng.choice(SHORT_OTHER) if other is None else other
+    return out
+
+
+def synthetic_records(n: int, steps: List[Dict], seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    return [synthetic_symptoms(rng, steps) for _ in range(n)]
+
+
+def synthetic_checkins(days: int, symptoms: List[str], seed: int = 0, end: Optional[datetime.date] = None):
+    """(date, rating, symptoms, taken) for `days` consecutive days ending yesterday."""
+    rng = random.Random(seed)
+    end = end or datetime.date.today() - datetime.timedelta(days=1)
+    for i in range(days):
+        date = end - datetime.timedelta(days=days - 1 - i)
+        yield date, rng.randint(1, 10), rng.sample(symptoms, rng.randint(0, 3)), rng.random() < 0.8
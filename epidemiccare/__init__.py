@@ -0,0 +1,19 @@
+"""EpidemicCare triage core: scoring, diagnosis and care plans without Streamlit.
+
+Importing the package pulls in only the standard library. The NumPy/pandas
+parts (``risk_table``, ``batch``, ``progress``, ``probabilistic``) and the SQLite ``store`` are
+imported on demand from their own modules.
+"""
+from .catalogue import CATALOGUE, DISEASES, Catalogue, load_catalogue
+from .engines import get_engine, register_engine
+from .plans import TreatmentPlan, build_treatment_plan
+from .steps import STEPS
+from .triage import (AGE_POINTS, CONDITIONS_POINTS, RISK_FACTORS, RISK_LEVELS, RISK_WEIGHTS, SPO2_POINTS,
+                     assess_risk, generate_diagnosis, not_sure_points, risk_level)
+
+__all__ = [
+    "STEPS", "CATALOGUE", "DISEASES", "Catalogue", "load_catalogue",
+    "AGE_POINTS", "CONDITIONS_POINTS", "RISK_WEIGHTS", "SPO2_POINTS", "RISK_LEVELS", "RISK_FACTORS",
+    "not_sure_points", "risk_level", "assess_risk", "generate_diagnosis", "get_engine", "register_engine",
+    "TreatmentPlan", "build_treatment_plan",
+]
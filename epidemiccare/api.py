@@ -0,0 +1,245 @@
+"""Asynchronous HTTP triage API for machine-submitted intake forms.
+
+    python -m epidemiccare.api [--host 127.0.0.1] [--port 8765] [--workers 1]
+
+Endpoints (JSON in, JSON out, HTTP/1.1 keep-alive):
+
+    GET  /health        {"status": "ok"}
+    POST /triage        one intake record (the `STEPS` answers as an object)
+                        -> risk, score, detail, top-3 diagnoses and care plan
+    POST /triage/bulk   NDJSON, one record per line -> NDJSON, one result per
+                        line, streamed back (chunked) while the request body
+                        is still being read
+
+Each bulk result carries `line` (1-based input line) and, when the record
+has one, its `id`. A line that cannot be scored yields `{"line", "error"}`
+and the stream carries on. The service runs on the standard library only
+(unless EPIDEMICCARE_DIAGNOSIS selects the NumPy engine; see `engines`);
+`--workers` starts that many processes sharing the port (SO_REUSEPORT).
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from .engines import get_engine
+from .plans import TreatmentPlan, build_treatment_plan
+from .steps import STEPS
+from .triage import assess_risk
+
+MAX_BODY = 1 << 20  # single-record bodies, and each bulk line
+TOP_K = 3
+_TEXT_KEYS = [s["key"] for s in STEPS if s["kind"] == "text"]
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 422: "Unprocessable Entity"}
+_plan_dicts: Dict[TreatmentPlan, Dict] = {}  # plans are shared immutables, so their JSON form is too
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def triage(record: Dict) -> Dict:
+    """The consultation pipeline for one intake record, as a JSON-ready dict."""
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    for key in _TEXT_KEYS:
+        if not isinstance(record.get(key) or "", str):
+            raise ValueError(f"{key!r} must be a string")
+    risk, score, detail = assess_risk(record)
+    possible = get_engine()(record, top_k=TOP_K)
+    plan = build_treatment_plan(risk, possible[0][0] if possible else None)
+    plan_dict = _plan_dicts.get(plan)
+    if plan_dict is None:
+        plan_dict = _plan_dicts[plan] = plan.as_dict()
+    result = {"risk": risk, "score": score, "detail": detail,
+              "possible": [{"disease": d, "match": m, "description": desc, "precautions": p, "weight": w}
+                           for d, m, desc, p, w in possible],
+              "plan": plan_dict}
+    if "id" in record:
+        result = {"id": record["id"], **result}
+    return result
+
+
+# -------------------- HTTP --------------------
+async def _read_head(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, str, Dict[str, str]]]:
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None  # client closed between requests
+    except asyncio.LimitOverrunError:
+        raise HTTPError(413, "request head too large")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    length = headers.get("content-length")
+    if length is not None and not (length.isascii() and length.isdigit()):
+        raise HTTPError(400, f"invalid Content-Length {length!r}")
+    return method, target.split("?", 1)[0], version, headers
+
+
+async def _body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> AsyncIterator[bytes]:
+    """The request body as it arrives, for both Content-Length and chunked uploads."""
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";", 1)[0], 16)
+            if size == 0:
+                await reader.readuntil(b"\r\n")  # no trailers are sent by the clients we serve
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    remaining = int(headers.get("content-length", 0))
+    while remaining:
+        chunk = await reader.read(min(remaining, 1 << 16))
+        if not chunk:
+            raise asyncio.IncompleteReadError(b"", remaining)
+        remaining -= len(chunk)
+        yield chunk
+
+
+def _response(status: int, body: bytes, keep_alive: bool, content_type: str = "application/json") -> bytes:
+    return (f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode("latin-1") + body
+
+
+def _json_line(obj: Dict) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode() + b"\n"
+
+
+async def _single(reader, writer, headers, keep_alive):
+    body = b""
+    async for chunk in _body(reader, headers):
+        body += chunk
+        if len(body) > MAX_BODY:
+            raise HTTPError(413, f"body exceeds {MAX_BODY} bytes")
+    try:
+        record = json.loads(body)
+    except ValueError as e:
+        raise HTTPError(400, f"invalid JSON: {e}")
+    try:
+        result = triage(record)
+    except ValueError as e:
+        raise HTTPError(422, str(e))
+    writer.write(_response(200, _json_line(result), keep_alive))
+
+
+async def _bulk(reader, writer, headers, keep_alive):
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n"
+                 + (b"Connection: keep-alive\r\n\r\n" if keep_alive else b"Connection: close\r\n\r\n"))
+    pending = b""
+    lineno = 0
+
+    def score(line: bytes) -> bytes:
+        try:
+            result = triage(json.loads(line))
+        except ValueError as e:  # json.JSONDecodeError is a ValueError too
+            return _json_line({"line": lineno, "error": str(e)})
+        return _json_line({"line": lineno, **result})
+
+    async for chunk in _body(reader, headers):
+        *lines, pending = (pending + chunk).split(b"\n")
+        if len(pending) > MAX_BODY:
+            raise HTTPError(413, f"line exceeds {MAX_BODY} bytes")
+        out = []
+        for line in lines:
+            lineno += 1
+            if line.strip():
+                out.append(score(line))
+        if out:
+            # one chunk per body read: results leave as soon as their input arrived
+            data = b"".join(out)
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+            await writer.drain()
+    if pending.strip():
+        lineno += 1
+        data = score(pending)
+        writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+    writer.write(b"0\r\n\r\n")
+
+
+ROUTES = {"/triage": _single, "/triage/bulk": _bulk}
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            streaming = False
+            try:
+                head = await _read_head(reader)
+                if head is None:
+                    break
+                method, path, version, headers = head
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                expected = "GET" if path == "/health" else "POST"
+                if path != "/health" and path not in ROUTES:
+                    raise HTTPError(404, f"no route {path}")
+                if method != expected:
+                    raise HTTPError(405, f"{method} not allowed on {path}")
+                if path == "/health":
+                    writer.write(_response(200, b'{"status":"ok"}\n', keep_alive))
+                else:
+                    streaming = path == "/triage/bulk"
+                    await ROUTES[path](reader, writer, headers, keep_alive)
+            except HTTPError as e:
+                if streaming:
+                    break  # status line already sent; dropping the connection is the only signal left
+                writer.write(_response(e.status, _json_line({"error": str(e)}), False))
+                keep_alive = False
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass  # client went away or sent an unparseable chunk header
+    finally:
+        writer.close()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, reuse_port: bool = False):
+    get_engine()  # compile the diagnosis engine before the first request
+    server = await asyncio.start_server(handle, host, port, reuse_port=reuse_port, backlog=1024)
+    async with server:
+        await server.serve_forever()
+
+
+def _run(host: str, port: int, reuse_port: bool):
+    try:
+        asyncio.run(serve(host, port, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("EPIDEMICCARE_API_PORT", 8765)))
+    parser.add_argument("--workers", type=int, default=1, help="processes sharing the port (Linux/BSD)")
+    args = parser.parse_args(argv)
+    print(f"EpidemicCare triage API on http://{args.host}:{args.port} ({args.workers} worker(s))", flush=True)
+    if args.workers == 1:
+        _run(args.host, args.port, False)
+        return
+    procs = [multiprocessing.Process(target=_run, args=(args.host, args.port, True)) for _ in range(args.workers)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Column-wise scoring of whole intake tables with NumPy and pandas."""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .catalogue import CATALOGUE, DISEASES
+from .risk_table import RISK_LEVEL_NAMES, RISK_RADIX, get_risk_table
+from .steps import STEPS
+from .triage import AGE_POINTS, RISK_FACTORS, RISK_WEIGHTS, SPO2_POINTS
+
+# Column-wise versions of assess_risk / generate_diagnosis for re-scoring whole
+# intake tables. `data` is a DataFrame or a mapping of column name -> array with
+# one column per STEPS key; a missing column, None or NaN all mean "key absent",
+# i.e. the same as symptoms.get(key) returning None on the exported dict.
+def records_to_columns(records: List[Dict]) -> Dict[str, np.ndarray]:
+    """Turn exported `symptoms` dicts into the column mapping the batch functions take."""
+    cols = {}
+    for step in STEPS:
+        col = np.empty(len(records), dtype=object)
+        col[:] = [r.get(step["key"]) for r in records]
+        cols[step["key"]] = col
+    return cols
+
+def _batch_len(data) -> int:
+    if isinstance(data, pd.DataFrame):
+        return len(data)
+    return len(next(iter(data.values()))) if data else 0
+
+def _batch_column(data, key: str, n: int) -> pd.Series:
+    if key not in data:
+        return pd.Series(np.full(n, None, dtype=object))
+    col = data[key]
+    return col if isinstance(col, pd.Series) else pd.Series(np.asarray(col))
+
+def _numeric_column(col: pd.Series) -> np.ndarray:
+    # assess_risk only scores int/float values, so anything else becomes NaN (0 points)
+    if col.dtype.kind in "biuf":
+        return col.to_numpy(dtype=np.float64, na_value=np.nan)
+    if isinstance(col.dtype, pd.StringDtype):
+        return np.full(len(col), np.nan)
+    return np.fromiter((v if isinstance(v, (int, float)) else np.nan for v in col.to_numpy(dtype=object)), dtype=np.float64, count=len(col))
+
+def _truthy_column(col: pd.Series) -> np.ndarray:
+    if col.dtype.kind in "biuf":
+        return col.fillna(0).to_numpy(dtype=bool)
+    if isinstance(col.dtype, pd.StringDtype):
+        return (col.fillna("").str.len() > 0).to_numpy(dtype=bool)
+    values = col.to_numpy(dtype=object)
+    return values.astype(bool) & ~pd.isna(values)
+
+def _answer_columns(col: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    return (col == "Yes").to_numpy(dtype=bool, na_value=False), (col == "Not sure").to_numpy(dtype=bool, na_value=False)
+
+def _band_column(values: np.ndarray, bands: List[Tuple[int, int]], below: bool) -> np.ndarray:
+    # column-wise _band; NaN never matches a band
+    conds = [values < t if below else values >= t for t, _ in bands]
+    return np.select(conds, range(len(bands)), default=len(bands))
+
+def risk_code_batch(data) -> np.ndarray:
+    n = _batch_len(data)
+    code = _band_column(_numeric_column(_batch_column(data, "age", n)), AGE_POINTS, below=False)
+    code = code * 2 + _truthy_column(_batch_column(data, "conditions", n))
+    for k in RISK_WEIGHTS:
+        yes, unsure = _answer_columns(_batch_column(data, k, n))
+        code = code * 3 + np.select([yes, unsure], [1, 2], default=0)
+    return code * RISK_RADIX[-1] + _band_column(_numeric_column(_batch_column(data, "spo2", n)), SPO2_POINTS, below=True)
+
+def assess_risk_batch(data) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    """Column-wise assess_risk: returns (levels, scores, detail) with one array per detail factor."""
+    rows = get_risk_table()[risk_code_batch(data)].astype(np.int64)
+    levels = np.asarray(RISK_LEVEL_NAMES, dtype=object)[rows[:, -1]]
+    return levels, rows[:, -2], {k: rows[:, i] for i, k in enumerate(RISK_FACTORS)}
+
+def _keyword_hits_batch(other: np.ndarray, names: List[str]) -> np.ndarray:
+    # score each distinct free-text answer once, then broadcast back to the rows
+    codes, uniques = pd.factorize(pd.Series(other, dtype=object).fillna(""))
+    hits = np.zeros((len(uniques), len(names)), dtype=np.int64)
+    col = {disease: j for j, disease in enumerate(names)}
+    for u, text in enumerate(uniques):
+        for disease, n in CATALOGUE.keywords.hits(text.lower()).items():
+            hits[u, col[disease]] = n
+    out = np.zeros((len(codes), len(names)), dtype=np.int64)
+    found = codes >= 0
+    out[found] = hits[codes[found]]
+    return out
+
+def generate_diagnosis_batch(data, top_k: Optional[int] = None) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """Column-wise generate_diagnosis.
+
+    Returns (names, ranked, match_pct, weight): `ranked[i]` lists indexes into
+    `names` best first, and `match_pct` / `weight` are given in that same ranked
+    order, so row i is generate_diagnosis(record_i)[:top_k] in array form.
+    """
+    n = _batch_len(data)
+    names = list(DISEASES)
+    sym_keys = list(dict.fromkeys(k for d in names for k in DISEASES[d]["symptom_keys"]))
+    key_counts = np.zeros((len(sym_keys), len(names)))
+    for j, disease in enumerate(names):
+        for k in DISEASES[disease]["symptom_keys"]:
+            key_counts[sym_keys.index(k), j] += 1
+    n_keys = np.array([len(DISEASES[d]["symptom_keys"]) or 1 for d in names], dtype=np.float64)
+
+    yes = np.zeros((n, len(sym_keys))); unsure = np.zeros((n, len(sym_keys)))
+    for i, k in enumerate(sym_keys):
+        yes[:, i], unsure[:, i] = _answer_columns(_batch_column(data, k, n))
+    matches = yes @ key_counts + 0.5 * (unsure @ key_counts)
+    weight = (2 * yes @ key_counts + unsure @ key_counts).astype(np.int64)
+    weight += _keyword_hits_batch(_batch_column(data, "other_symptoms", n), names)
+    match_pct = np.minimum(100, np.round(100 * (matches / n_keys))).astype(np.int64)
+
+    ranked = np.argsort(-weight, axis=1, kind="stable")[:, :top_k]
+    return names, ranked, np.take_along_axis(match_pct, ranked, axis=1), np.take_along_axis(weight, ranked, axis=1)
+
+def diagnosis_row(names: List[str], ranked: np.ndarray, match_pct: np.ndarray, weight: np.ndarray, i: int) -> List[Tuple]:
+    """Row i of generate_diagnosis_batch's output in generate_diagnosis's tuple format."""
+    return [(names[j], int(p), DISEASES[names[j]]["description"], DISEASES[names[j]]["precautions"], int(w))
+            for j, p, w in zip(ranked[i], match_pct[i], weight[i])]
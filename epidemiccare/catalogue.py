@@ -0,0 +1,94 @@
+"""The disease catalogue and the inverted indexes diagnosis is scored from."""
+import csv
+import json
+import os
+from typing import Dict, List
+
+from .keywords import KeywordIndex
+from .steps import STEPS
+
+BUILTIN_DISEASES: Dict[str, Dict] = {
+    "Influenza": {
+        "symptom_keys": ["fever", "cough_breathing", "body_aches", "fatigue"],
+        "keywords": ["sore throat", "chills", "body aches", "myalgia", "congestion"],
+        "description": "A viral infection affecting the respiratory system.",
+        "precautions": ["Rest", "Fluids", "Over-the-counter symptom relief as directed", "Consult a clinician if symptoms worsen"]
+    },
+    "COVID-19": {
+        "symptom_keys": ["fever", "cough_breathing", "loss_taste_smell", "fatigue"],
+        "keywords": ["sore throat", "congestion", "headache", "chills"],
+        "description": "An infectious disease caused by SARS-CoV-2.",
+        "precautions": ["Isolate when ill", "Rest and hydrate", "Consult a clinician", "Consider pulse-ox monitoring if available"]
+    },
+    "Dengue Fever": {
+        "symptom_keys": ["fever", "body_aches", "fatigue"],
+        "keywords": ["rash", "severe headache", "retro-orbital pain", "nausea", "vomiting"],
+        "description": "A mosquito-borne viral illness common in tropical regions.",
+        "precautions": ["Hydration", "Rest", "Avoid NSAIDs unless advised", "Seek medical care if bleeding or severe pain occurs"]
+    },
+    "Common Cold": {
+        "symptom_keys": ["cough_breathing", "fatigue"],
+        "keywords": ["runny nose", "sneezing", "congestion", "sore throat"],
+        "description": "A mild viral infection of the upper respiratory tract.",
+        "precautions": ["Rest", "Hydration", "Symptom relief as directed"]
+    },
+    "Mpox (Monkeypox)": {
+        "symptom_keys": ["fever", "fatigue"],
+        "keywords": ["rash", "lesions", "swollen lymph nodes", "lymphadenopathy", "chills"],
+        "description": "A viral disease that can cause rash and systemic symptoms.",
+        "precautions": ["Avoid close contact", "Cover lesions", "Consult a clinician", "Isolation until lesions crust and heal"]
+    }
+}
+
+def load_catalogue(path: str) -> Dict[str, Dict]:
+    """Read a disease catalogue shaped like DISEASES from a .json or .csv file.
+
+    JSON is either {name: info} or a list of {"name": ..., **info}. CSV has a
+    `name` column plus one column per field, list fields separated by ";".
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            raw = {}
+            for row in csv.DictReader(f):
+                raw[row["name"]] = {k: [x.strip() for x in v.split(";") if x.strip()] if k in ("symptom_keys", "keywords", "precautions") else v
+                                    for k, v in row.items() if v is not None}
+    else:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        raw = {d["name"]: d for d in data} if isinstance(data, list) else data
+
+    step_keys = {s["key"] for s in STEPS}
+    diseases = {}
+    for name, info in raw.items():
+        unknown = [k for k in info.get("symptom_keys", []) if k not in step_keys]
+        if unknown:
+            raise ValueError(f"{path}: {name!r} uses unknown symptom keys {unknown}")
+        diseases[name] = {
+            "symptom_keys": list(info.get("symptom_keys", [])),
+            "keywords": list(info.get("keywords", [])),
+            "description": info.get("description", ""),
+            "precautions": list(info.get("precautions", [])),
+        }
+    return diseases
+
+class Catalogue:
+    """A disease catalogue plus the inverted indexes generate_diagnosis scores from.
+
+    `by_symptom` maps each symptom key to the diseases listing it and `keywords`
+    maps free text to keyword hits, so a consultation only touches diseases that
+    match at least one answer.
+    """
+
+    def __init__(self, diseases: Dict[str, Dict]):
+        self.diseases = diseases
+        self.position = {d: i for i, d in enumerate(diseases)}
+        self.by_symptom: Dict[str, List[str]] = {}
+        for disease, info in diseases.items():
+            for k in info["symptom_keys"]:
+                self.by_symptom.setdefault(k, []).append(disease)
+        self.keywords = KeywordIndex(diseases)
+
+# Loaded once per process, on first import; EPIDEMICCARE_CATALOGUE swaps in a file.
+_path = os.environ.get("EPIDEMICCARE_CATALOGUE")
+CATALOGUE = Catalogue(load_catalogue(_path) if _path else BUILTIN_DISEASES)
+DISEASES = CATALOGUE.diseases
@@ -0,0 +1,166 @@
+"""Population summaries of archived intake files, streamed in bounded memory.
+
+    python -m epidemiccare.cohort intake.csv [archive.ndjson.gz ...] [--chunk-size 50000] [--json]
+
+Files are read CSV/NDJSON/Parquet (by extension, or --format) one chunk at a
+time, scored column-wise with the batch engine, and folded into running
+totals; no chunk is kept once it has been counted, so memory depends on
+--chunk-size, not on file size. Each record is a consultation's answers, one
+column per STEPS key; other columns are ignored.
+
+The report gives the risk-level distribution, the mean score and mean points
+per assess_risk factor, how often each disease ranks first in
+generate_diagnosis (records with no matching symptom or keyword count as "no
+match"), and SpO₂ counts in the assess_risk bands.
+"""
+import argparse
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .batch import assess_risk_batch, generate_diagnosis_batch
+from .catalogue import DISEASES
+from .risk_table import RISK_LEVEL_NAMES
+from .steps import STEPS
+from .triage import RISK_FACTORS, SPO2_POINTS
+
+KEYS = [s["key"] for s in STEPS]
+_NUMBER_KEYS = {s["key"] for s in STEPS if s["kind"] == "number"}
+_SPO2_EDGES = sorted(t for t, _ in SPO2_POINTS)
+SPO2_BUCKETS = ([f"<{_SPO2_EDGES[0]}"] + [f"{lo}–{hi - 1}" for lo, hi in zip(_SPO2_EDGES, _SPO2_EDGES[1:])]
+                + [f"≥{_SPO2_EDGES[-1]}", "not given"])
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "ndjson", ".parquet": "parquet", ".pq": "parquet"}
+
+
+def detect_format(path: str) -> str:
+    root, ext = os.path.splitext(path.lower())
+    if ext in (".gz", ".bz2", ".xz", ".zst", ".zip"):  # pandas decompresses CSV/NDJSON transparently
+        ext = os.path.splitext(root)[1]
+    if ext not in FORMATS:
+        raise ValueError(f"cannot tell the format of {path!r}; pass --format")
+    return FORMATS[ext]
+
+
+def read_chunks(source, chunk_size: int = 50_000, fmt: Optional[str] = None, extra: Sequence[str] = ()) -> Iterator[pd.DataFrame]:
+    """Yield `source` as DataFrames of at most `chunk_size` records.
+
+    `source` is a path or, for CSV/NDJSON, a binary file object (then `fmt` is
+    required). Only STEPS columns and the `extra` ones are kept; in CSV the
+    `extra` columns are read as text.
+    """
+    fmt = fmt or detect_format(source)
+    keep = [*KEYS, *extra]
+    if fmt == "csv":
+        # answers and extra columns (ids) stay strings even when a chunk happens to hold only digits or blanks
+        dtype = {k: "string" for k in keep if k not in _NUMBER_KEYS}
+        with pd.read_csv(source, chunksize=chunk_size, usecols=lambda c: c in keep, dtype=dtype) as reader:
+            yield from reader
+    elif fmt == "ndjson":
+        with pd.read_json(source, lines=True, chunksize=chunk_size, dtype=False) as reader:
+            for chunk in reader:
+                yield chunk[[k for k in keep if k in chunk.columns]]
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq  # ships with streamlit; only needed for Parquet input
+
+        parquet = pq.ParquetFile(source)
+        columns = [k for k in keep if k in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"unknown format {fmt!r}")
+
+
+def _text_column(col: pd.Series) -> pd.Series:
+    # generate_diagnosis lower()s the free text, so make sure it is text
+    return col if isinstance(col.dtype, pd.StringDtype) else col.astype("string")
+
+
+def score_chunks(chunks: Iterable[pd.DataFrame]) -> Iterator[Tuple[int, np.ndarray, Dict[str, np.ndarray], np.ndarray, np.ndarray]]:
+    """Per chunk: (records, level index, detail points, top disease index or -1, SpO₂ bucket index)."""
+    level_index = {name: i for i, name in enumerate(RISK_LEVEL_NAMES)}
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        if "other_symptoms" in chunk:
+            chunk = chunk.assign(other_symptoms=_text_column(chunk["other_symptoms"]))
+        levels, _, detail = assess_risk_batch(chunk)
+        _, ranked, _, weight = generate_diagnosis_batch(chunk, top_k=1)
+        top = np.where(weight[:, 0] > 0, ranked[:, 0], -1)
+        spo2 = pd.to_numeric(chunk["spo2"], errors="coerce").to_numpy(dtype=np.float64) if "spo2" in chunk else np.full(len(chunk), np.nan)
+        buckets = np.where(np.isnan(spo2), len(_SPO2_EDGES) + 1, np.searchsorted(_SPO2_EDGES, spo2, side="right"))
+        codes = pd.Series(levels).map(level_index).to_numpy(dtype=np.int64)
+        yield len(chunk), codes, detail, top, buckets
+
+
+class CohortSummary:
+    """Running totals over scored chunks; O(catalogue size) memory whatever the input size."""
+
+    def __init__(self):
+        self.records = 0
+        self.levels = np.zeros(len(RISK_LEVEL_NAMES), dtype=np.int64)
+        self.points = dict.fromkeys(RISK_FACTORS, 0)
+        self.top = np.zeros(len(DISEASES) + 1, dtype=np.int64)  # last slot: no match
+        self.spo2 = np.zeros(len(SPO2_BUCKETS), dtype=np.int64)
+
+    def update(self, records: int, levels: np.ndarray, detail: Dict[str, np.ndarray], top: np.ndarray, buckets: np.ndarray):
+        self.records += records
+        self.levels += np.bincount(levels, minlength=len(self.levels))
+        for k in RISK_FACTORS:
+            self.points[k] += int(detail[k].sum())
+        self.top += np.bincount(np.where(top < 0, len(DISEASES), top), minlength=len(self.top))
+        self.spo2 += np.bincount(buckets, minlength=len(self.spo2))
+
+    def as_dict(self) -> Dict:
+        n = self.records or 1
+        names = list(DISEASES)
+        order = np.argsort(-self.top[:-1], kind="stable")
+        return {
+            "records": self.records,
+            "risk_levels": {name: int(c) for name, c in zip(RISK_LEVEL_NAMES, self.levels)},
+            "mean_score": sum(self.points.values()) / n,
+            "mean_points": {k: v / n for k, v in self.points.items()},
+            "top_disease": {**{names[i]: int(self.top[i]) for i in order if self.top[i]}, "no match": int(self.top[-1])},
+            "spo2": {label: int(c) for label, c in zip(SPO2_BUCKETS, self.spo2)},
+        }
+
+    def format(self) -> str:
+        d = self.as_dict()
+        n = d["records"] or 1
+        lines = [f"Consultations: {d['records']:,}", "", "Risk level"]
+        lines += [f"  {k:<20}{v:>12,}  {v / n:6.1%}" for k, v in reversed(list(d["risk_levels"].items()))]
+        lines += ["", f"Mean score: {d['mean_score']:.2f}", "Mean points per factor"]
+        lines += [f"  {k:<20}{v:>12.3f}" for k, v in d["mean_points"].items()]
+        lines += ["", "Top disease"]
+        lines += [f"  {k:<20}{v:>12,}  {v / n:6.1%}" for k, v in d["top_disease"].items()]
+        lines += ["", "SpO₂ (%)"]
+        lines += [f"  {k:<20}{v:>12,}  {v / n:6.1%}" for k, v in d["spo2"].items()]
+        return "\n".join(lines)
+
+
+def summarize(paths: List[str], chunk_size: int = 50_000, fmt: Optional[str] = None) -> CohortSummary:
+    summary = CohortSummary()
+    for path in paths:
+        for scored in score_chunks(read_chunks(path, chunk_size, fmt)):
+            summary.update(*scored)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("paths", nargs="+", metavar="FILE")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())), help="override detection by extension")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="records per chunk (bounds memory)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    try:
+        summary = summarize(args.paths, args.chunk_size, args.format)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    print(json.dumps(summary.as_dict(), indent=2, ensure_ascii=False) if args.json else summary.format())
+
+
+if __name__ == "__main__":
+    main()
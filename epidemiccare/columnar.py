@@ -0,0 +1,275 @@
+"""Patient progress and triage results as columnar Arrow files.
+
+    python -m epidemiccare.columnar [--db epidemiccare.db] export DIR [--format arrow|parquet]
+    python -m epidemiccare.columnar [--db epidemiccare.db] import FILE [FILE ...]
+
+An export is two files in DIR, `consultations` and `checkins`:
+
+- consultations: `patient`, one column per STEPS key, `risk`, `score`,
+  `detail` (assess_risk points, a struct with one field per RISK_FACTORS
+  entry), `possible` (a list of (disease, match_pct, weight) structs) and
+  `start_date`. The answers are top-level columns, so a Parquet export is
+  valid input to `epidemiccare.cohort` and `epidemiccare.retriage`.
+- checkins: `patient`, `date`, `rating`, `symptoms` (a list of strings) and
+  `taken`, in patient then date order.
+
+`.arrow` is the Arrow IPC file format, uncompressed. `open_table`
+memory-maps it, so the columns are views of the file's pages: a
+multi-gigabyte history opens at once and is neither read into memory nor
+turned into Python objects. `.parquet` is smaller and more portable, but it
+is decoded on read.
+
+Import takes whole record batches. Nothing builds a per-record dict:
+- Symptom lists become JSON once per distinct list.
+- `possible` JSON is joined by Arrow string kernels.
+- SQLite builds the symptoms and detail objects from plain columns.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .catalogue import CATALOGUE
+from .progress import ProgressSeries
+from .steps import STEPS
+from .store import ProgressStore
+from .triage import RISK_FACTORS
+
+KEYS = [s["key"] for s in STEPS]
+_NUMBER_KEYS = {s["key"] for s in STEPS if s["kind"] == "number"}
+BATCH_ROWS = 65_536
+FORMATS = {".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow", ".parquet": "parquet", ".pq": "parquet"}
+_SEP = "\x1f"  # joins a symptom list into one dictionary-encodable string; never typed by a user
+
+POSSIBLE = pa.struct([("disease", pa.string()), ("match_pct", pa.int16()), ("weight", pa.int32())])
+CONSULTATIONS_SCHEMA = pa.schema(
+    [("patient", pa.string())]
+    + [(k, pa.int16() if k in _NUMBER_KEYS else pa.string()) for k in KEYS]
+    + [("risk", pa.string()), ("score", pa.int32()),
+       ("detail", pa.struct([(k, pa.int32()) for k in RISK_FACTORS])),
+       ("possible", pa.list_(POSSIBLE)), ("start_date", pa.date32())])
+CHECKINS_SCHEMA = pa.schema([("patient", pa.string()), ("date", pa.date32()), ("rating", pa.int8()),
+                             ("symptoms", pa.list_(pa.string())), ("taken", pa.bool_())])
+SCHEMAS = {"consultations": CONSULTATIONS_SCHEMA, "checkins": CHECKINS_SCHEMA}
+# columns the store cannot fill in; a null in any of them rejects the batch
+REQUIRED = {"consultations": ("patient", "risk", "score"), "checkins": ("patient", "date", "rating")}
+
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path.lower())[1]
+    if ext not in FORMATS:
+        raise ValueError(f"cannot tell the format of {path!r}; use .arrow or .parquet")
+    return FORMATS[ext]
+
+
+def table_path(directory: str, kind: str, fmt: str = "arrow") -> str:
+    return os.path.join(directory, f"{kind}.{fmt}")
+
+
+def open_table(path: str) -> pa.Table:
+    """The table in `path`; Arrow IPC files are memory-mapped, not read."""
+    if detect_format(path) == "arrow":
+        return pa.ipc.open_file(pa.memory_map(path)).read_all()  # buffers keep the mapping alive
+    import pyarrow.parquet as pq
+
+    return pq.read_table(path, memory_map=True)
+
+
+def table_kind(schema: pa.Schema) -> str:
+    names = set(schema.names)
+    if {"patient", "date", "rating"} <= names:
+        return "checkins"
+    if {"patient", "risk", "score"} <= names:
+        return "consultations"
+    raise ValueError(f"not a consultations or checkins table: columns {schema.names}")
+
+
+def to_ipc_bytes(table: pa.Table) -> bytes:
+    """`table` as an Arrow IPC file in memory, e.g. for a download."""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# ---- one session ----
+def checkins_table(patient: str, series: ProgressSeries) -> pa.Table:
+    """A patient's ProgressSeries as a checkins table, straight from its arrays."""
+    rows, cols = np.nonzero(series.occurrence)
+    offsets = np.r_[0, np.cumsum(np.bincount(rows, minlength=len(series)))].astype(np.int32)
+    symptoms = pa.ListArray.from_arrays(pa.array(offsets), pa.array(series.symptoms, pa.string()).take(pa.array(cols)))
+    return pa.Table.from_arrays([pa.array([patient] * len(series), pa.string()), pa.array(series.dates, pa.date32()),
+                                 pa.array(series.ratings, pa.int8()), symptoms, pa.array(series.taken, pa.bool_())],
+                                schema=CHECKINS_SCHEMA)
+
+
+def consultation_table(patient: str, symptoms: Dict, result, start_date=None) -> pa.Table:
+    """One consultation (a TriageResult or its dict form) as a one-row consultations table."""
+    row = {"patient": patient, **{k: symptoms.get(k) for k in KEYS}, "risk": result["risk"], "score": result["score"],
+           "detail": result["detail"], "start_date": start_date,
+           "possible": [{"disease": d, "match_pct": pct, "weight": w} for d, pct, _, _, w in result["possible"]]}
+    return pa.Table.from_pylist([row], schema=CONSULTATIONS_SCHEMA)
+
+
+# ---- store -> batches ----
+def _dates(iso: Sequence) -> pa.Array:
+    return pa.array(iso, pa.string()).cast(pa.date32())
+
+
+def consultation_batches(store: ProgressStore, batch: int = BATCH_ROWS) -> Iterator[pa.RecordBatch]:
+    n, f = len(KEYS), len(RISK_FACTORS)
+    for rows in store.export_consultations(batch):
+        cols = list(zip(*rows))
+        possible = [json.loads(p) for p in cols[3 + n + f]]
+        flat = [e for p in possible for e in p]  # generate_diagnosis tuples: (disease, pct, description, precautions, weight)
+        offsets = pa.array(np.r_[0, np.cumsum([len(p) for p in possible])].astype(np.int32))
+        elements = pa.StructArray.from_arrays(
+            [pa.array([e[0] for e in flat], pa.string()), pa.array([e[1] for e in flat], pa.int16()),
+             pa.array([e[4] for e in flat], pa.int32())], fields=list(POSSIBLE))
+        detail = pa.StructArray.from_arrays([pa.array(c, pa.int32()) for c in cols[3 + n:3 + n + f]], fields=list(CONSULTATIONS_SCHEMA.field("detail").type))
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(cols[0], pa.string()),
+             *(pa.array(c, CONSULTATIONS_SCHEMA.field(k).type) for k, c in zip(KEYS, cols[1:1 + n])),
+             pa.array(cols[1 + n], pa.string()), pa.array(cols[2 + n], pa.int32()), detail,
+             pa.ListArray.from_arrays(offsets, elements), _dates(cols[4 + n + f])], schema=CONSULTATIONS_SCHEMA)
+
+
+def checkin_batches(store: ProgressStore, batch: int = BATCH_ROWS) -> Iterator[pa.RecordBatch]:
+    for rows in store.export_checkins(batch):
+        patient, date, rating, symptoms, taken = zip(*rows)
+        text = pa.array(symptoms, pa.string()).dictionary_encode()  # few distinct lists: parse each once
+        lists = pa.array([json.loads(s) for s in text.dictionary.to_pylist()], pa.list_(pa.string()))
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(patient, pa.string()), _dates(date), pa.array(rating, pa.int8()), lists.take(text.indices),
+             pa.array(np.array(taken, dtype=bool))], schema=CHECKINS_SCHEMA)
+
+
+def export_store(store: ProgressStore, directory: str, fmt: str = "arrow", batch: int = BATCH_ROWS) -> Dict[str, int]:
+    """Write the store's consultations and check-ins to `directory`; returns rows written per table."""
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    for kind, batches in (("consultations", consultation_batches(store, batch)), ("checkins", checkin_batches(store, batch))):
+        path, schema = table_path(directory, kind, fmt), SCHEMAS[kind]
+        if fmt == "arrow":
+            writer = pa.ipc.new_file(path + ".tmp", schema)
+        else:
+            import pyarrow.parquet as pq
+
+            writer = pq.ParquetWriter(path + ".tmp", schema)
+        counts[kind] = 0
+        with writer:
+            for b in batches:
+                writer.write_batch(b)
+                counts[kind] += b.num_rows
+        os.replace(path + ".tmp", path)  # a reader never opens a half-written file
+    return counts
+
+
+# ---- batches -> store ----
+def _conform(batch: pa.RecordBatch, schema: pa.Schema) -> List[pa.Array]:
+    """`batch`'s columns in `schema`'s order and types; missing columns are nulls."""
+    return [batch.column(f.name).cast(f.type) if f.name in batch.schema.names else pa.nulls(batch.num_rows, f.type)
+            for f in schema]
+
+
+def _symptoms_json(lists: pa.Array) -> pa.Array:
+    joined = pc.binary_join(lists, _SEP).dictionary_encode()
+    text = [json.dumps(s.split(_SEP)) if s else "[]" for s in joined.dictionary.to_pylist()]
+    return pc.fill_null(pa.array(text, pa.string()).take(joined.indices), "[]")
+
+
+def _possible_json(possible: pa.ListArray) -> pa.Array:
+    # each element is '["<disease>",<pct>,"<description>",[<precautions>],<weight>]', as save_consultation writes it
+    values = possible.values
+    disease = values.field("disease").dictionary_encode()
+    head, tail = [], []
+    for name in disease.dictionary.to_pylist():
+        info = CATALOGUE.diseases.get(name, {"description": "", "precautions": []})
+        head.append(json.dumps(name))
+        tail.append(json.dumps(info["description"]) + "," + json.dumps(info["precautions"]))
+    elements = pc.binary_join_element_wise(
+        pa.array(head, pa.string()).take(disease.indices), pc.cast(pc.fill_null(values.field("match_pct"), 0), pa.string()),
+        pa.array(tail, pa.string()).take(disease.indices), pc.cast(pc.fill_null(values.field("weight"), 0), pa.string()), ",")
+    elements = pc.binary_join_element_wise("[", elements, "]", "")
+    joined = pc.binary_join(pa.ListArray.from_arrays(possible.offsets, elements), ",")
+    return pc.binary_join_element_wise("[", pc.fill_null(joined, ""), "]", "")
+
+
+def _iso(dates: pa.Array) -> List:
+    return pc.strftime(dates, "%Y-%m-%d").to_pylist()
+
+
+def _check_required(kind: str, cols: List[pa.Array]):
+    for f, col in zip(SCHEMAS[kind], cols):
+        if f.name in REQUIRED[kind] and col.null_count:
+            row = pc.index(pc.is_null(col), True).as_py()
+            raise ValueError(f"{kind}: {col.null_count:,} rows have no {f.name!r} (first at row {row} of the batch)")
+
+
+def import_batch(store: ProgressStore, batch: pa.RecordBatch, kind: Optional[str] = None) -> int:
+    """Write one consultations or checkins record batch to `store`; returns its rows.
+
+    Raises ValueError, and writes nothing, if a REQUIRED column has nulls.
+    """
+    kind = kind or table_kind(batch.schema)
+    cols = _conform(batch, SCHEMAS[kind])
+    _check_required(kind, cols)
+    if kind == "checkins":
+        patient, date, rating, symptoms, taken = cols
+        rows = list(zip(patient.to_pylist(), _iso(date), rating.to_pylist(), _symptoms_json(symptoms).to_pylist(),
+                        pc.fill_null(taken, False).to_pylist()))
+        store.import_checkins(rows)
+    else:
+        n = len(KEYS)
+        detail = cols[3 + n]
+        points = [pc.fill_null(detail.field(k), 0).to_pylist() for k in RISK_FACTORS]
+        rows = list(zip(*(c.to_pylist() for c in cols[:3 + n]), *points,
+                        _possible_json(cols[4 + n]).to_pylist(), _iso(cols[5 + n])))
+        store.import_consultations(rows)
+    return len(rows)
+
+
+def import_files(store: ProgressStore, paths: Sequence[str], batch: int = BATCH_ROWS) -> Dict[str, int]:
+    """Import exported tables (either kind, Arrow or Parquet); returns rows imported per table.
+
+    Consultations go first, so check-ins that queue patients for re-assessment find them.
+    """
+    tables = sorted(((open_table(p), p) for p in paths), key=lambda t: table_kind(t[0].schema) != "consultations")
+    counts = dict.fromkeys(SCHEMAS, 0)
+    for table, _ in tables:
+        kind = table_kind(table.schema)
+        for b in table.to_batches(max_chunksize=batch):
+            counts[kind] += import_batch(store, b, kind)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--db", default=os.environ.get("EPIDEMICCARE_DB", "epidemiccare.db"))
+    parser.add_argument("--batch", type=int, default=BATCH_ROWS, help="rows per record batch and per transaction")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="write consultations and check-ins to DIR")
+    exp.add_argument("directory")
+    exp.add_argument("--format", choices=["arrow", "parquet"], default="arrow")
+    imp = sub.add_parser("import", help="load exported consultations/check-ins files into the store")
+    imp.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    store = ProgressStore(args.db)
+    t0 = time.perf_counter()
+    if args.command == "export":
+        counts = export_store(store, args.directory, args.format, args.batch)
+    else:
+        counts = import_files(store, args.files, args.batch)
+    print(f"{args.command}: {counts['consultations']:,} consultations, {counts['checkins']:,} check-ins "
+          f"in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Progress across all patients, aggregated and downsampled for the clinician dashboard.
+
+A browser cannot chart every raw check-in of hundreds of patients.
+`cohort_progress` reads the store once and reduces it to one row per patient
+and two cohort-wide daily series. Every series is cut to a fixed point budget
+with LTTB (largest triangle, three buckets), which keeps the peaks and dips
+that taking every n-th point would miss. The page then charts only the
+reduced series.
+"""
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .store import ProgressStore
+
+POINT_BUDGET = 60  # points per charted series
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the `n` points of (x, y) that LTTB keeps; every index if there are no more than `n` points.
+
+    The first and last points are always kept. The rest are split into n - 2
+    equal buckets. From each bucket, the point kept is the one forming the
+    largest triangle with the previously kept point and the mean of the next
+    bucket.
+    """
+    size = len(x)
+    if size <= n:
+        return np.arange(size)
+    if n < 3:
+        return np.array([0, size - 1][:max(n, 0)], dtype=np.int64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)  # n - 2 buckets over the points between the ends
+    # mean of the bucket after each one (the last looks ahead to the final point), from prefix sums
+    ahead = np.r_[edges[1:], size]
+    sx, sy = np.r_[0.0, np.cumsum(x)], np.r_[0.0, np.cumsum(y)]
+    width = ahead[1:] - ahead[:-1]
+    cxs = ((sx[ahead[1:]] - sx[ahead[:-1]]) / width).tolist()
+    cys = ((sy[ahead[1:]] - sy[ahead[:-1]]) / width).tolist()
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, size - 1
+    a = 0
+    for i, lo, hi in zip(range(n - 2), edges[:-1].tolist(), edges[1:].tolist()):
+        ax, ay, cx, cy = x[a], y[a], cxs[i], cys[i]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def downsample(series: pd.Series, n: int = POINT_BUDGET) -> pd.Series:
+    """`series` (date-indexed) cut to at most `n` points with LTTB."""
+    if len(series) <= n:
+        return series
+    x = series.index.values.astype("datetime64[D]").astype(np.int64)
+    return series.iloc[lttb(x, series.to_numpy(), n)]
+
+
+class CohortProgress(NamedTuple):
+    patients: pd.DataFrame  # one row per patient with check-ins, worst latest severity first
+    trends: Dict[str, pd.Series]  # patient -> downsampled severity series
+    severity: pd.Series  # mean severity per day, over the patients who checked in that day
+    adherence: pd.Series  # % of that day's check-ins with medicines taken
+    checkins: int  # raw points the store holds
+    points: int  # points in the downsampled series
+
+
+def cohort_progress(store: ProgressStore, budget: int = POINT_BUDGET) -> CohortProgress:
+    """Aggregate every patient's check-ins in `store`; each series is cut to `budget` points."""
+    rows = store.all_checkins()
+    people = {p: (name, risk) for p, name, risk, _, _ in store.all_consultations()}
+    if not rows:
+        return _empty()
+    patient, day, rating, taken = zip(*rows)
+    return _aggregate(np.array(patient, dtype=object), np.array(day, dtype="datetime64[D]"),
+                      np.array(rating, dtype=np.float64), np.array(taken, dtype=np.float64), people, budget)
+
+
+def archive_progress(directory: str, budget: int = POINT_BUDGET) -> CohortProgress:
+    """cohort_progress over an `epidemiccare.columnar` export in `directory`, instead of the store.
+
+    The Arrow files are memory-mapped. Patients are handled as dictionary
+    codes, and the date and rating columns go to NumPy without passing
+    through Python objects.
+    """
+    from .columnar import open_table, table_path  # pyarrow: only when reading an archive
+
+    checkins = open_table(table_path(directory, "checkins"))
+    consultations = open_table(table_path(directory, "consultations"))
+    people = dict(zip(consultations.column("patient").to_pylist(),
+                      zip(consultations.column("name").to_pylist(), consultations.column("risk").to_pylist())))
+    if not checkins.num_rows:
+        return _empty()
+    patients = checkins.column("patient").dictionary_encode().combine_chunks()
+    code = patients.indices.to_numpy()
+    day = checkins.column("date").to_numpy()
+    rating = checkins.column("rating").to_numpy().astype(np.float64)
+    taken = checkins.column("taken").to_numpy().astype(np.float64)
+    # codes follow first appearance, so an export (patient, then date order) has them non-decreasing
+    if not np.all((code[1:] > code[:-1]) | ((code[1:] == code[:-1]) & (day[1:] > day[:-1]))):
+        order = np.lexsort((day, code))
+        code, day, rating, taken = code[order], day[order], rating[order], taken[order]
+    return _aggregate(code, day, rating, taken, people, budget, names=np.array(patients.dictionary.to_pylist(), dtype=object))
+
+
+_COLUMNS = ["name", "risk", "days", "first", "last", "latest", "mean", "peak", "adherence", "trend"]
+
+
+def _empty() -> CohortProgress:
+    empty = pd.Series(dtype=np.float64, index=pd.DatetimeIndex([], name="date"))
+    return CohortProgress(pd.DataFrame(columns=_COLUMNS, index=pd.Index([], name="patient")), {}, empty, empty, 0, 0)
+
+
+def _aggregate(patient: np.ndarray, day: np.ndarray, rating: np.ndarray, taken: np.ndarray, people: Dict, budget: int,
+               names: Optional[np.ndarray] = None) -> CohortProgress:
+    # `patient` holds each row's patient id, or a code into `names`; rows arrive
+    # grouped by patient, so each patient is one contiguous run
+    starts = np.flatnonzero(np.r_[True, patient[1:] != patient[:-1]])
+    ends = np.r_[starts[1:], len(patient)]
+    days = ends - starts
+    ids = patient[starts] if names is None else names[patient[starts]]
+    x = day.astype(np.int64)
+    trends, spark = {}, []
+    for p, lo, hi in zip(ids, starts, ends):
+        keep = lo + lttb(x[lo:hi], rating[lo:hi], budget)
+        trends[p] = pd.Series(rating[keep], index=pd.DatetimeIndex(day[keep], name="date"), name="severity")
+        spark.append(rating[keep].tolist())
+    patients = pd.DataFrame({
+        "name": [people.get(p, (None, None))[0] for p in ids],
+        "risk": [people.get(p, (None, None))[1] for p in ids],
+        "days": days,
+        "first": day[starts],
+        "last": day[ends - 1],
+        "latest": rating[ends - 1],
+        "mean": np.add.reduceat(rating, starts) / days,
+        "peak": np.maximum.reduceat(rating, starts),
+        "adherence": 100 * np.add.reduceat(taken, starts) / days,
+        "trend": spark,
+    }, index=pd.Index(ids, name="patient"))
+    patients = patients.sort_values(["latest", "mean"], ascending=False, kind="stable")
+
+    dates, at = np.unique(day, return_inverse=True)
+    counts = np.bincount(at)
+    index = pd.DatetimeIndex(dates, name="date")
+    severity = downsample(pd.Series(np.bincount(at, rating) / counts, index=index, name="mean severity"), budget)
+    adherence = downsample(pd.Series(100 * np.bincount(at, taken) / counts, index=index, name="adherence %"), budget)
+    points = sum(map(len, trends.values())) + len(severity) + len(adherence)
+    return CohortProgress(patients, trends, severity, adherence, len(patient), points)
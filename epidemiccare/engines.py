@@ -0,0 +1,41 @@
+"""Diagnosis engines by name, so the ranking can change without touching the pages.
+
+An engine is a callable with generate_diagnosis's signature that returns its
+tuples: (disease, match_pct, description, precautions, weight). Callers
+fetch one with `get_engine()`. EPIDEMICCARE_DIAGNOSIS picks the default:
+"rules" (generate_diagnosis, the default) or "probabilistic" (the naive-Bayes
+matrix engine in `probabilistic`). `register_engine` adds more.
+"""
+import functools
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .catalogue import CATALOGUE
+from .triage import generate_diagnosis
+
+DiagnosisEngine = Callable[..., List[Tuple]]
+ENGINES: Dict[str, Callable[[], DiagnosisEngine]] = {}
+
+
+def register_engine(name: str, factory: Callable[[], DiagnosisEngine]):
+    """Make `factory()` available as engine `name`; it is called once, on first use."""
+    ENGINES[name] = factory
+    get_engine.cache_clear()
+
+
+@functools.lru_cache(maxsize=None)
+def get_engine(name: Optional[str] = None) -> DiagnosisEngine:
+    name = name or os.environ.get("EPIDEMICCARE_DIAGNOSIS") or "rules"
+    if name not in ENGINES:
+        raise ValueError(f"unknown diagnosis engine {name!r}; choose from {sorted(ENGINES)}")
+    return ENGINES[name]()
+
+
+def _probabilistic() -> DiagnosisEngine:
+    from .probabilistic import ProbabilisticEngine  # NumPy/pandas: only loaded when chosen
+
+    return ProbabilisticEngine(CATALOGUE).generate_diagnosis
+
+
+register_engine("rules", lambda: generate_diagnosis)
+register_engine("probabilistic", _probabilistic)
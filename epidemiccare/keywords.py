@@ -0,0 +1,91 @@
+"""Single-pass keyword matching for the free-text `other_symptoms` answer."""
+from typing import Dict, List, Set
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"  # what `\w` means for str patterns
+
+class KeywordIndex:
+    """Aho-Corasick automaton over every disease keyword.
+
+    `hits(text)` scans the text once and returns, per disease, how many of its
+    keywords occur with a word boundary on both sides — the same count the old
+    per-keyword `re.search(rf"\\b{re.escape(kw)}\\b", text)` loop produced — so
+    the cost depends on the text length, not on how many keywords exist.
+    """
+
+    def __init__(self, diseases: Dict[str, Dict]):
+        self.names = list(diseases)
+        self.keywords: List[str] = []            # keyword id -> keyword
+        self._lengths: List[int] = []            # keyword id -> length
+        self._owners: List[List[str]] = []       # keyword id -> diseases listing it (once per listing)
+        ids: Dict[str, int] = {}
+        for disease, info in diseases.items():
+            for kw in info["keywords"]:
+                if not kw:
+                    continue
+                if kw not in ids:
+                    ids[kw] = len(self._lengths)
+                    self.keywords.append(kw); self._lengths.append(len(kw)); self._owners.append([])
+                self._owners[ids[kw]].append(disease)
+
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for kw, kid in ids.items():
+            state = 0
+            for ch in kw:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto); goto[state][ch] = nxt
+                    goto.append({}); out.append([])
+                state = nxt
+            out[state].append(kid)
+
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:  # breadth-first, so fail links always point at finished states
+            for ch, nxt in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f][ch] if state and ch in goto[f] else 0
+                out[nxt] = out[nxt] + out[fail[nxt]]
+                queue.append(nxt)
+        self._goto, self._fail, self._out = goto, fail, out
+        self._alphabet = frozenset(ch for kw in ids for ch in kw)
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def owners(self, kid: int) -> List[str]:
+        """Diseases listing keyword `kid`, once per listing."""
+        return self._owners[kid]
+
+    def found(self, text: str) -> Set[int]:
+        """Ids of the keywords that occur in `text` as whole words."""
+        goto, fail, out, lengths, alphabet = self._goto, self._fail, self._out, self._lengths, self._alphabet
+        found = set()
+        state = 0
+        last = len(text) - 1
+        for i, ch in enumerate(text):
+            if ch not in alphabet:
+                state = 0; continue
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for kid in out[state]:
+                if kid in found:
+                    continue
+                start = i - lengths[kid] + 1
+                # `\b` holds where word-ness changes; outside the text counts as non-word
+                before = start > 0 and _is_word_char(text[start-1])
+                after = i < last and _is_word_char(text[i+1])
+                if before != _is_word_char(text[start]) and after != _is_word_char(ch):
+                    found.add(kid)
+        return found
+
+    def hits(self, text: str) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for kid in self.found(text):
+            for disease in self._owners[kid]:
+                counts[disease] = counts.get(disease, 0) + 1
+        return counts
@@ -0,0 +1,236 @@
+"""Opt-in process metrics in the Prometheus text exposition format.
+
+Set EPIDEMICCARE_METRICS=1 to turn metrics on. They are then served at
+http://127.0.0.1:$EPIDEMICCARE_METRICS_PORT/metrics (default port 9464).
+If EPIDEMICCARE_METRICS_FILE is set, they are also written to that file every
+few seconds, for node_exporter's textfile collector.
+
+When metrics are off, `instrumented` returns the function it decorates
+unchanged and `timer` returns a shared no-op context manager. Recording
+calls (`inc`, `observe`) return at once. Instrumented code then costs
+nothing beyond a flag check.
+"""
+import bisect
+import contextlib
+import functools
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+ENABLED = os.environ.get("EPIDEMICCARE_METRICS", "").lower() in ("1", "true", "yes", "on")
+
+TIME_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+BYTES_BUCKETS = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+_lock = threading.Lock()
+_metrics: Dict[str, "_Metric"] = {}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self.values: Dict[LabelKey, object] = {}
+
+    def _lines(self) -> List[str]:
+        raise NotImplementedError
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [*key, extra] if extra else list(key)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not ENABLED:
+            return
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def _lines(self):
+        values = self.values or {(): 0}  # an unlabelled counter is exported from the start
+        return [f"{self.name}{_labels(k)} {v}" for k, v in values.items()]
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        if not ENABLED:
+            return
+        with _lock:
+            self.values[tuple(sorted(labels.items()))] = value
+
+    def _lines(self):
+        return [f"{self.name}{_labels(k)} {v}" for k, v in self.values.items()]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = TIME_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        if not ENABLED:
+            return
+        key = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]  # buckets, +Inf, sum
+            counts[i] += 1
+            counts[-1] += value
+
+    def _lines(self):
+        lines = []
+        for key, counts in self.values.items():
+            total = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts[:-1]):
+                total += n
+                lines.append(f"{self.name}_bucket{_labels(key, ('le', bound))} {total}")
+            lines.append(f"{self.name}_sum{_labels(key)} {counts[-1]}")
+            lines.append(f"{self.name}_count{_labels(key)} {total}")
+        return lines
+
+def _register(metric):
+    with _lock:
+        return _metrics.setdefault(metric.name, metric)  # re-imports (Streamlit reruns) reuse the first
+
+def counter(name: str, help: str) -> Counter:
+    return _register(Counter(name, help))
+
+def gauge(name: str, help: str) -> Gauge:
+    return _register(Gauge(name, help))
+
+def histogram(name: str, help: str, buckets: Sequence[float] = TIME_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help, buckets))
+
+def render() -> str:
+    """Every registered metric in the Prometheus text format (version 0.0.4)."""
+    out = []
+    with _lock:
+        for m in _metrics.values():
+            out += [f"# HELP {m.name} {m.help}", f"# TYPE {m.name} {m.kind}", *m._lines()]
+    return "\n".join(out) + "\n"
+
+# -------------------- TIMING --------------------
+_NULL = contextlib.nullcontext()
+
+class _Timer:
+    __slots__ = ("hist", "labels", "t0")
+
+    def __init__(self, hist: Histogram, labels: Dict):
+        self.hist, self.labels = hist, labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0, **self.labels)
+
+def timer(hist: Histogram, **labels):
+    """`with timer(h, page="home"):` observes the block's duration in `h`."""
+    return _Timer(hist, labels) if ENABLED else _NULL
+
+SCORING_SECONDS = histogram("epidemiccare_scoring_seconds", "Time per call of the triage scoring functions.")
+
+def instrumented(name: str):
+    """Time every call of the decorated function in SCORING_SECONDS{function=name}; a no-op when off."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                SCORING_SECONDS.observe(time.perf_counter() - t0, function=name)
+        return wrapper
+    return decorate
+
+# -------------------- SIZES --------------------
+def deep_sizeof(obj) -> int:
+    """Approximate bytes reachable from `obj` (containers, instance dicts and slots; each object once)."""
+    seen = set()
+    stack, size = [obj], 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, type):
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys()); stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        else:
+            if hasattr(o, "__dict__"):
+                stack.append(vars(o))
+            for cls in type(o).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    if slot != "__weakref__" and hasattr(o, slot):
+                        stack.append(getattr(o, slot))
+    return size
+
+# -------------------- EXPORT --------------------
+_exporter_started = False
+
+def _write_file(path: str, interval: float):
+    while True:
+        with open(path + ".tmp", "w") as f:
+            f.write(render())
+        os.replace(path + ".tmp", path)  # the collector never sees a half-written file
+        time.sleep(interval)
+
+def start_exporter(port: Optional[int] = None, path: Optional[str] = None, interval: float = 5.0) -> bool:
+    """Start the /metrics endpoint and/or file writer once per process; False when metrics are off."""
+    global _exporter_started
+    if not ENABLED:
+        return False
+    with _lock:
+        if _exporter_started:
+            return True
+        _exporter_started = True
+    port = port if port is not None else int(os.environ.get("EPIDEMICCARE_METRICS_PORT", 9464))
+    path = path or os.environ.get("EPIDEMICCARE_METRICS_FILE")
+    if port:
+        import http.server  # only paid for when metrics are on
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            server = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        except OSError as e:  # metrics must never take the app down
+            print(f"epidemiccare.metrics: cannot serve on port {port}: {e}", file=sys.stderr)
+        else:
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    if path:
+        threading.Thread(target=_write_file, args=(path, interval), name="metrics-file", daemon=True).start()
+    return True
@@ -0,0 +1,92 @@
+"""Care plans per risk level, with disease-specific adjustments, precomputed once."""
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+
+from . import metrics
+
+@dataclass(frozen=True)
+class TreatmentPlan:
+    """An immutable care plan; plans are precomputed once and shared by every caller."""
+    medication: Tuple[str, ...]
+    rest: str
+    diet: str
+    monitoring: str
+    follow_up: str
+    duration: str
+    isolation: str
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+    def as_dict(self) -> Dict:
+        return {**asdict(self), "medication": list(self.medication)}
+
+BASE_PLANS: Dict[str, Dict] = {
+    "high": {
+        "medication": [
+            "Use over-the-counter symptom relief as directed (e.g., fever reducers).",
+            "Only start antivirals/antibiotics if prescribed by a clinician."
+        ],
+        "rest": "Prioritize full rest and avoid exertion.",
+        "diet": "2–3 liters fluids/day if not restricted; warm soups; balanced meals.",
+        "monitoring": "Check temperature 2–4x/day. If available, monitor SpO₂. Watch for breathing difficulty, confusion, persistent chest pain.",
+        "follow_up": "Seek medical advice within 24 hours or sooner if worsening.",
+        "duration": "About 7–14 days depending on recovery.",
+        "isolation": "Home isolation; mask around others; improve ventilation; separate utensils if feasible."
+    },
+    "medium": {
+        "medication": [
+            "Use OTC symptom relief as directed (e.g., acetaminophen for fever).",
+            "Decongestants, throat lozenges may help."
+        ],
+        "rest": "Adequate rest; avoid strenuous activity.",
+        "diet": "1.5–2 liters fluids/day; fruit/vegetable-rich diet; warm beverages.",
+        "monitoring": "Check symptoms twice daily.",
+        "follow_up": "Teleconsult in 48 hours or earlier if worsening.",
+        "duration": "5–10 days.",
+        "isolation": "Limit close contact; mask in shared spaces."
+    },
+    "low": {
+        "medication": [
+            "OTC remedies as needed and as directed.",
+            "Saline nasal spray, honey-lemon for cough may provide comfort."
+        ],
+        "rest": "Resume light activities as tolerated; ensure good sleep.",
+        "diet": "Normal diet with extra fluids.",
+        "monitoring": "Observe for new or worsening symptoms.",
+        "follow_up": "Consult if not improving after ~5 days.",
+        "duration": "3–7 days.",
+        "isolation": "Basic hygiene and courtesy masking if coughing/sneezing."
+    }
+}
+
+PLAN_ADJUSTED_DISEASES = ("COVID-19", "Influenza", "Dengue Fever", "Mpox (Monkeypox)")
+
+def _adjust_plan(plan: Dict, top_disease: Optional[str]) -> Dict:
+    if top_disease == "COVID-19":
+        plan["monitoring"] += " Consider pulse-ox checks if available."
+        plan["isolation"] = "Isolate at home; typical isolation ~10 days from symptom onset (follow local guidance)."
+    elif top_disease == "Influenza":
+        plan["medication"].insert(0, "Antivirals can help if started early — consult promptly.")
+    elif top_disease == "Dengue Fever":
+        plan["medication"].append("Avoid NSAIDs unless advised by a clinician.")
+        plan["monitoring"] = "Hydrate well; seek care urgently for bleeding, severe abdominal pain, persistent vomiting, or drowsiness."
+    elif top_disease == "Mpox (Monkeypox)":
+        plan["isolation"] = "Avoid close contact; cover lesions; isolate until lesions crust/heal."
+
+    return plan
+
+def _build_plan_table() -> Dict[Tuple[str, Optional[str]], TreatmentPlan]:
+    # every (risk, top_disease) combination that yields a distinct plan
+    table = {}
+    for risk, base in BASE_PLANS.items():
+        for disease in (None, *PLAN_ADJUSTED_DISEASES):
+            plan = _adjust_plan({**base, "medication": list(base["medication"])}, disease)
+            table[(risk, disease)] = TreatmentPlan(**{**plan, "medication": tuple(plan["medication"])})
+    return table
+
+PLAN_TABLE = _build_plan_table()
+
+@metrics.instrumented("build_treatment_plan")
+def build_treatment_plan(risk: str, top_disease: Optional[str]) -> TreatmentPlan:
+    return PLAN_TABLE.get((risk, top_disease)) or PLAN_TABLE[(risk, None)]
@@ -0,0 +1,221 @@
+"""Naive-Bayes diagnosis: the catalogue compiled into log-likelihood matrices.
+
+`generate_diagnosis` ranks by integer weights summed disease by disease.
+This engine compiles the catalogue once into a matrix. Each row is one
+answer feature: every (symptom key, answer) pair for the STEPS choice
+questions, plus every catalogue keyword. Each column is one disease. Scoring
+a patient is then one vector-matrix product; a batch is one matrix-matrix
+product per block of rows. The result is a posterior probability per
+disease.
+
+The model is naive Bayes. A disease that lists a symptom key makes the
+answers follow LISTED_ANSWER; otherwise they follow UNLISTED_ANSWER. A
+mentioned keyword adds KEYWORD_LLR per listing. The prior is uniform unless
+`priors` says otherwise. Naive Bayes is over-confident, so `calibrate` fits
+a softmax temperature to labelled records.
+
+Rows keep generate_diagnosis's tuple format, and match_pct and weight are
+computed exactly as the rule engine computes them. Only the order differs.
+`predict` adds the probabilities.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+from .batch import _answer_columns, _batch_column, _batch_len
+from .catalogue import Catalogue
+
+ANSWERS = ("Yes", "Not sure", "No")
+LISTED_ANSWER = {"Yes": 0.75, "Not sure": 0.15, "No": 0.10}  # P(answer | disease lists the symptom)
+UNLISTED_ANSWER = {"Yes": 0.20, "Not sure": 0.10, "No": 0.70}  # P(answer | it does not)
+KEYWORD_LLR = math.log(0.30 / 0.01)  # log P(mention | listed) / P(mention | not listed)
+BLOCK_CELLS = 1 << 22  # rows x diseases scored at once in a batch
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    z = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return z / z.sum(axis=-1, keepdims=True)
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indexes of each row's `k` highest scores, best first; ties keep catalogue order."""
+    d = scores.shape[1]
+    if k >= d:
+        return np.argsort(-scores, axis=1, kind="stable")
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    vals = np.take_along_axis(scores, part, axis=1)
+    order = np.lexsort((part, -vals), axis=1)
+    top = np.take_along_axis(part, order, axis=1)
+    # argpartition picks arbitrarily among scores tied at the cut: in those rows, keep the
+    # scores above the cut (already first in `top`) and fill up with the lowest tied indexes
+    kth = vals.min(axis=1, keepdims=True)
+    rows = np.flatnonzero((scores == kth).sum(axis=1) > (vals == kth).sum(axis=1))
+    if len(rows):
+        tied = scores[rows] == kth[rows]
+        above = k - (vals[rows] == kth[rows]).sum(axis=1)
+        r, c = np.nonzero(tied & (np.cumsum(tied, axis=1) <= (k - above)[:, None]))
+        first = np.r_[0, np.cumsum(k - above)[:-1]]
+        top[rows[r], above[r] + np.arange(len(c)) - first[r]] = c
+    return top
+
+
+class ProbabilisticEngine:
+    """A catalogue compiled for naive-Bayes scoring.
+
+    `generate_diagnosis(symptoms, top_k)` is a drop-in for the rule engine.
+    `predict` returns (disease, probability, match_pct) rows, and
+    `predict_batch` scores an intake table.
+    """
+
+    def __init__(self, catalogue: Catalogue, priors: Optional[Dict[str, float]] = None, temperature: float = 1.0):
+        self.catalogue = catalogue
+        self.names = list(catalogue.diseases)
+        self.temperature = temperature
+        d = len(self.names)
+        self.symptom_keys = list(catalogue.by_symptom)
+        counts = np.zeros((len(self.symptom_keys), d))  # times each disease lists each key
+        for i, k in enumerate(self.symptom_keys):
+            for disease in catalogue.by_symptom[k]:
+                counts[i, catalogue.position[disease]] += 1
+        listed = counts > 0
+        # rows: (key, answer) one-hot features; one product gives log-likelihood, match and weight together
+        loglik, match, weight = [], [], []
+        for i in range(len(self.symptom_keys)):
+            for answer in ANSWERS:
+                loglik.append(np.where(listed[i], math.log(LISTED_ANSWER[answer]), math.log(UNLISTED_ANSWER[answer])))
+                match.append(counts[i] * {"Yes": 1, "Not sure": 0.5, "No": 0}[answer])
+                weight.append(counts[i] * {"Yes": 2, "Not sure": 1, "No": 0}[answer])
+        self._answers = np.hstack([np.array(loglik).reshape(-1, d), np.array(match).reshape(-1, d), np.array(weight).reshape(-1, d)])
+        # keyword listings, kept as small integers: (keywords, diseases) is the big block
+        index = catalogue.keywords
+        self._keywords = np.zeros((len(index), d), dtype=np.uint8)
+        for kid in range(len(index)):
+            for disease in index.owners(kid):
+                self._keywords[kid, catalogue.position[disease]] += 1
+        prior = np.full(d, 1.0 / d) if priors is None else np.array([priors.get(n, 0.0) for n in self.names])
+        with np.errstate(divide="ignore"):
+            self._bias = np.log(prior / prior.sum())
+        self._n_keys = np.array([len(catalogue.diseases[n]["symptom_keys"]) or 1 for n in self.names], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    # ---- features ----
+    def _answer_vector(self, symptoms: Dict) -> np.ndarray:
+        x = np.zeros(3 * len(self.symptom_keys))
+        for i, k in enumerate(self.symptom_keys):
+            ans = symptoms.get(k)
+            if ans in ANSWERS:
+                x[3 * i + ANSWERS.index(ans)] = 1
+        return x
+
+    def _answer_matrix(self, data, n: int) -> np.ndarray:
+        x = np.zeros((n, 3 * len(self.symptom_keys)))
+        for i, k in enumerate(self.symptom_keys):
+            col = _batch_column(data, k, n)
+            yes, unsure = _answer_columns(col)
+            x[:, 3 * i], x[:, 3 * i + 1] = yes, unsure
+            x[:, 3 * i + 2] = (col == "No").to_numpy(dtype=bool, na_value=False)
+        return x
+
+    def _keyword_counts(self, text: str) -> np.ndarray:
+        found = list(self.catalogue.keywords.found(text.lower()))
+        return self._keywords[found].sum(axis=0, dtype=np.int64)  # the non-zero rows of the keyword product
+
+    def _keyword_matrix(self, other: pd.Series) -> np.ndarray:
+        # each distinct free-text answer is matched once, as in batch._keyword_hits_batch
+        codes, uniques = pd.factorize(other.astype(object).fillna(""))
+        counts = np.zeros((len(uniques) + 1, len(self.names)), dtype=np.int64)  # last row: no text
+        for u, text in enumerate(uniques):
+            counts[u] = self._keyword_counts(text)
+        return counts[codes]
+
+    # `answered` is the answer features times self._answers: log-likelihood, match and weight
+    # blocks side by side; `keywords` counts the mentioned keywords each disease lists
+    def _logits(self, answered: np.ndarray, keywords: np.ndarray) -> np.ndarray:
+        # rounded so equal evidence ties exactly, whichever order BLAS summed it in
+        logits = np.round(self._bias + answered[..., :len(self.names)] + KEYWORD_LLR * keywords, 9)
+        return logits / self.temperature
+
+    def _match_weight(self, answered: np.ndarray, keywords: np.ndarray, cols: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """match_pct and weight of diseases `cols`, computed as the rule engine computes them."""
+        d = len(self.names)
+        matches = np.take_along_axis(answered[..., d:2 * d], cols, axis=-1)
+        match_pct = np.minimum(100, np.round(100 * (matches / self._n_keys[cols]))).astype(np.int64)
+        weight = np.rint(np.take_along_axis(answered[..., 2 * d:], cols, axis=-1)).astype(np.int64)
+        return match_pct, weight + np.take_along_axis(keywords, cols, axis=-1)
+
+    def scores(self, symptoms: Dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(logits, match_pct, weight) for every disease, in catalogue order."""
+        keywords = self._keyword_counts(symptoms.get("other_symptoms") or "")
+        answered = self._answer_vector(symptoms) @ self._answers
+        return (self._logits(answered, keywords), *self._match_weight(answered, keywords, np.arange(len(self.names))))
+
+    # ---- one patient ----
+    def predict(self, symptoms: Dict, top_k: Optional[int] = None) -> List[Tuple[str, float, int]]:
+        """(disease, probability, match_pct), most probable first."""
+        logits, match_pct, _ = self.scores(symptoms)
+        prob = _softmax(logits)
+        return [(self.names[j], float(prob[j]), int(match_pct[j]))
+                for j in _top(logits[None], top_k or len(self.names))[0]]
+
+    @metrics.instrumented("probabilistic_diagnosis")
+    def generate_diagnosis(self, symptoms: Dict, top_k: Optional[int] = None) -> List[Tuple]:
+        """generate_diagnosis's tuples, ranked by posterior probability."""
+        logits, match_pct, weight = self.scores(symptoms)
+        diseases = self.catalogue.diseases
+        return [(self.names[j], int(match_pct[j]), diseases[self.names[j]]["description"],
+                 diseases[self.names[j]]["precautions"], int(weight[j]))
+                for j in _top(logits[None], top_k or len(self.names))[0]]
+
+    # ---- batches ----
+    def _blocks(self, data):
+        n = _batch_len(data)
+        answers = self._answer_matrix(data, n)
+        keywords = self._keyword_matrix(_batch_column(data, "other_symptoms", n))
+        step = max(1, BLOCK_CELLS // (3 * len(self.names)))
+        for lo in range(0, n, step):
+            yield lo, answers[lo:lo + step] @ self._answers, keywords[lo:lo + step]
+
+    def predict_batch(self, data, top_k: Optional[int] = None) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Column-wise predict: (names, ranked, probability, match_pct, weight), the last three in ranked order.
+
+        Shaped like batch.generate_diagnosis_batch's result, with the probabilities added.
+        """
+        n, k = _batch_len(data), min(top_k or len(self.names), len(self.names))
+        ranked = np.zeros((n, k), dtype=np.int64)
+        prob, match_pct, weight = np.zeros((n, k)), np.zeros((n, k), dtype=np.int64), np.zeros((n, k), dtype=np.int64)
+        for lo, answered, keywords in self._blocks(data):
+            logits = self._logits(answered, keywords)
+            rows = slice(lo, lo + len(logits))
+            ranked[rows] = top = _top(logits, k)
+            peak = logits.max(axis=1, keepdims=True)
+            log_norm = peak + np.log(np.exp(logits - peak).sum(axis=1, keepdims=True))
+            prob[rows] = np.exp(np.take_along_axis(logits, top, axis=1) - log_norm)
+            match_pct[rows], weight[rows] = self._match_weight(answered, keywords, top)
+        return self.names, ranked, prob, match_pct, weight
+
+    def calibrate(self, data, labels: Sequence[str], temperatures: Optional[Sequence[float]] = None) -> float:
+        """Set `temperature` to the one that best predicts `labels` (negative log-likelihood), and return it.
+
+        `labels` holds one confirmed disease name per record of `data`.
+        """
+        truth = np.array([self.catalogue.position[name] for name in labels])
+        grid = np.geomspace(0.05, 20, 121) if temperatures is None else np.asarray(temperatures, dtype=np.float64)
+        nll = np.zeros(len(grid))
+        saved, self.temperature = self.temperature, 1.0
+        try:
+            for lo, answered, keywords in self._blocks(data):
+                logits = self._logits(answered, keywords)
+                true = logits[np.arange(len(logits)), truth[lo:lo + len(logits)]]
+                top = logits.max(axis=1)
+                for t, temperature in enumerate(grid):
+                    log_norm = top / temperature + np.log(np.exp((logits - top[:, None]) / temperature).sum(axis=1))
+                    nll[t] += (log_norm - true / temperature).sum()
+        finally:
+            self.temperature = saved
+        self.temperature = float(grid[int(nll.argmin())])
+        return self.temperature
@@ -0,0 +1,85 @@
+"""Array-backed daily progress for one patient."""
+import datetime
+from typing import List, Optional
+
+import numpy as np
+
+CHECKIN_SYMPTOMS = ["Fever","Cough","Headache","Fatigue","Body aches","Shortness of breath","Loss of taste/smell","Rash","Nausea/Vomiting"]
+
+class ProgressSeries:
+    """One patient's daily check-ins, kept as date-sorted NumPy columns.
+
+    Arrays are preallocated and grow by doubling. Each append updates the
+    running aggregates (adherent days, per-symptom totals) in place. The
+    Progress page charts straight from the array views, with no rebuild,
+    re-sort or re-count per render.
+    """
+
+    def __init__(self, capacity: int = 32):
+        self.start_date: Optional[datetime.date] = None
+        self.symptoms: List[str] = list(CHECKIN_SYMPTOMS)  # occurrence matrix column order
+        self._index = {s: i for i, s in enumerate(self.symptoms)}
+        self.n = 0
+        self._dates = np.empty(capacity, dtype="datetime64[D]")
+        self._ratings = np.empty(capacity, dtype=np.int16)
+        self._taken = np.empty(capacity, dtype=bool)
+        self._occurrence = np.zeros((capacity, len(self.symptoms)), dtype=bool)
+        self.taken_days = 0
+        self.symptom_totals = np.zeros(len(self.symptoms), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _grow(self, rows: int, cols: int):
+        cap = max(len(self._dates), 1)
+        while cap < rows:
+            cap *= 2
+        if cap > len(self._dates) or cols > self._occurrence.shape[1]:
+            for name in ("_dates", "_ratings", "_taken"):
+                old = getattr(self, name)
+                new = np.empty(cap, dtype=old.dtype); new[:self.n] = old[:self.n]
+                setattr(self, name, new)
+            occ = np.zeros((cap, cols), dtype=bool); occ[:self.n, :self._occurrence.shape[1]] = self._occurrence[:self.n]
+            self._occurrence = occ
+            self.symptom_totals = np.concatenate([self.symptom_totals, np.zeros(cols - len(self.symptom_totals), dtype=np.int64)])
+
+    def append(self, date: datetime.date, rating: int, symptoms: List[str], taken: bool):
+        """Record a check-in; a second check-in for the same date replaces the first."""
+        for s in symptoms:
+            if s not in self._index:
+                self._index[s] = len(self.symptoms); self.symptoms.append(s)
+        self._grow(self.n + 1, len(self.symptoms))
+        day = np.datetime64(date, "D")
+        pos = self.n if not self.n or day > self._dates[self.n-1] else int(np.searchsorted(self._dates[:self.n], day))
+        if pos < self.n and self._dates[pos] == day:
+            self.taken_days -= int(self._taken[pos]); self.symptom_totals -= self._occurrence[pos]
+        else:
+            for arr in (self._dates, self._ratings, self._taken, self._occurrence):
+                arr[pos+1:self.n+1] = arr[pos:self.n]  # shift later days (rare: out-of-order imports)
+            self.n += 1
+        row = np.zeros(self._occurrence.shape[1], dtype=bool)
+        row[[self._index[s] for s in symptoms]] = True
+        self._dates[pos], self._ratings[pos], self._taken[pos], self._occurrence[pos] = day, rating, bool(taken), row
+        self.taken_days += int(bool(taken)); self.symptom_totals += row
+
+    def has(self, date: datetime.date) -> bool:
+        day = np.datetime64(date, "D")
+        pos = int(np.searchsorted(self._dates[:self.n], day))
+        return pos < self.n and self._dates[pos] == day
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self._dates[:self.n]
+
+    @property
+    def ratings(self) -> np.ndarray:
+        return self._ratings[:self.n]
+
+    @property
+    def taken(self) -> np.ndarray:
+        return self._taken[:self.n]
+
+    @property
+    def occurrence(self) -> np.ndarray:
+        """(days, symptoms) matrix, columns in `self.symptoms` order."""
+        return self._occurrence[:self.n, :len(self.symptoms)]
@@ -0,0 +1,121 @@
+"""Nightly re-assessment of patients from their recent check-ins.
+
+    python -m epidemiccare.reassess [--db epidemiccare.db] [--all]
+
+A finished consultation's risk level never sees later check-ins. This job
+re-scores patients from their consultation answers brought up to date with
+their last RECENT_CHECKINS check-ins:
+
+- Check-in symptoms that match a consultation question set that answer to
+  "Yes". Questions none of the recent check-ins mention become "No".
+- Other check-in symptoms are added to `other_symptoms`, where the diagnosis
+  keywords see them.
+- The mean recent severity rating adds SEVERITY_POINTS to the risk score.
+
+Only queued patients are read. The store queues a patient whenever one of
+their check-ins is written (a trigger on `checkins`), so a run costs nothing
+for patients who have not checked in since the last run. A patient who checks
+in again while the job runs stays queued for the next run: a run stops at
+the queue's end as it was when the run started. --all queues every
+patient with a consultation, e.g. after the rules change.
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .engines import get_engine
+from .store import ProgressStore
+from .triage import assess_risk, risk_level
+
+RECENT_CHECKINS = 3
+TOP_K = 3
+# check-in symptom -> consultation question it answers
+CHECKIN_KEYS: Dict[str, str] = {"Fever": "fever", "Cough": "cough_breathing", "Shortness of breath": "cough_breathing",
+                                "Body aches": "body_aches", "Fatigue": "fatigue", "Loss of taste/smell": "loss_taste_smell"}
+SEVERITY_POINTS: List[Tuple[int, int]] = [(8, 3), (6, 1)]  # (minimum mean recent rating, points), first match wins
+
+
+def current_symptoms(symptoms: Dict, checkins: List[Tuple]) -> Dict:
+    """The consultation answers updated with `checkins` (date, rating, symptoms, taken), most recent last."""
+    if not checkins:
+        return symptoms
+    reported = {s for _, _, names, _ in checkins for s in names}
+    out = dict(symptoms)
+    for key in set(CHECKIN_KEYS.values()):
+        out[key] = "Yes" if any(CHECKIN_KEYS[s] == key for s in reported if s in CHECKIN_KEYS) else "No"
+    extra = sorted(s.lower() for s in reported if s not in CHECKIN_KEYS)
+    if extra:
+        out["other_symptoms"] = ", ".join(filter(None, [symptoms.get("other_symptoms") or "", *extra]))
+    return out
+
+
+def severity_points(checkins: List[Tuple]) -> int:
+    if not checkins:
+        return 0
+    mean = sum(r for _, r, _, _ in checkins) / len(checkins)
+    for min_rating, pts in SEVERITY_POINTS:
+        if mean >= min_rating:
+            return pts
+    return 0
+
+
+def reassess(symptoms: Dict, checkins: List[Tuple], diagnose: Optional[Callable] = None) -> Tuple[str, int, Dict, List[Tuple]]:
+    """(risk, score, detail, possible) for a consultation plus recent check-ins.
+
+    `detail` is assess_risk's, plus a "severity" entry.
+    """
+    current = current_symptoms(symptoms, checkins)
+    _, score, detail = assess_risk(current)
+    detail["severity"] = severity_points(checkins)
+    score += detail["severity"]
+    return risk_level(score), score, detail, (diagnose or get_engine())(current, top_k=TOP_K)
+
+
+def run(store: ProgressStore, batch: int = 1000, today: Optional[datetime.date] = None, log=sys.stderr) -> Dict[str, int]:
+    """Re-assess every queued patient; returns counts of patients re-assessed and of risk levels that rose or fell."""
+    today = today or datetime.date.today()
+    diagnose = get_engine()
+    order = {"low": 0, "medium": 1, "high": 2}
+    counts = {"reassessed": 0, "skipped": 0, "risk_up": 0, "risk_down": 0}
+    t0, after, end = time.perf_counter(), 0, store.queue_end()
+    while True:
+        page = store.queued(after, batch, upto=end)
+        if not page:
+            break
+        after = page[-1][0]
+        consultations, checkins = store.reassessment_inputs([p for _, p in page], RECENT_CHECKINS)
+        rows = []
+        for _, patient in page:
+            if patient not in consultations:
+                counts["skipped"] += 1  # check-ins without a consultation to build on
+                continue
+            symptoms, before, _ = consultations[patient]
+            risk, score, detail, possible = reassess(symptoms, checkins.get(patient, []), diagnose)
+            rows.append((patient, today, risk, score, detail, possible))
+            change = order.get(risk, 0) - order.get(before, 0)
+            counts["risk_up"] += change > 0
+            counts["risk_down"] += change < 0
+        store.save_reassessments(rows, [seq for seq, _ in page])
+        counts["reassessed"] += len(rows)
+    print(f"{counts['reassessed']:,} patients re-assessed ({counts['risk_up']:,} risk up, {counts['risk_down']:,} down, "
+          f"{counts['skipped']:,} skipped) in {time.perf_counter() - t0:.1f}s", file=log)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--db", default=os.environ.get("EPIDEMICCARE_DB", "epidemiccare.db"))
+    parser.add_argument("--all", action="store_true", help="re-assess every patient with a consultation, not just the queued ones")
+    parser.add_argument("--batch", type=int, default=1000, help="patients read and written per transaction")
+    args = parser.parse_args(argv)
+    store = ProgressStore(args.db)
+    if args.all:
+        store.queue_all()
+    run(store, args.batch)
+
+
+if __name__ == "__main__":
+    main()
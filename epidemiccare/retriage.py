@@ -0,0 +1,244 @@
+"""Re-triage stored intake records on every core, in input order, resumably.
+
+    python -m epidemiccare.retriage archive.ndjson [more.csv ...] --out results.ndjson [--workers N]
+
+Run this after changing the rules in `triage` or the disease catalogue to
+re-score archives. Inputs are cut into shards: byte ranges of about
+--shard-mb for plain CSV/NDJSON (aligned to line starts, so records must not
+span lines), Parquet row groups, and whole compressed files. A process pool
+scores the shards with the batch engine. Each worker builds the risk table and
+catalogue indexes once, when it starts.
+
+Output is NDJSON with one line per input record, in input order whatever the
+worker count: `id` (when the input has that column), risk, score, detail and
+the top-3 `possible` diseases. Finished shards are appended in order and
+recorded in `<out>.checkpoint.json`. After an interruption, the same command
+resumes from the last appended shard.
+"""
+import argparse
+import concurrent.futures
+import io
+import json
+import os
+import shutil
+import sys
+import time
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .batch import assess_risk_batch, generate_diagnosis_batch
+from .cohort import _text_column, detect_format, read_chunks
+from .risk_table import get_risk_table
+from .triage import RISK_FACTORS
+
+TOP_K = 3
+ID_COLUMN = "id"
+_ENCODER = json.JSONEncoder(separators=(",", ":"), default=str)  # one encoder for every row
+
+
+class Shard(NamedTuple):
+    path: str
+    fmt: str
+    start: int  # byte offset, or first row group for Parquet
+    end: Optional[int]  # exclusive; None reads to the end of the file
+
+
+def plan_shards(paths: List[str], shard_bytes: int) -> List[Shard]:
+    shards = []
+    for path in paths:
+        fmt = detect_format(path)
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            groups = pq.ParquetFile(path).metadata.num_row_groups
+            shards += [Shard(path, fmt, g, g + 1) for g in range(groups)]
+        elif os.path.splitext(path)[1].lower() in (".csv", ".ndjson", ".jsonl", ".json"):
+            size = os.path.getsize(path)
+            shards += [Shard(path, fmt, start, min(start + shard_bytes, size)) for start in range(0, size, shard_bytes)]
+        else:  # compressed: no random access, one shard per file
+            shards.append(Shard(path, fmt, 0, None))
+    return shards
+
+
+def _read_range(path: str, start: int, end: int, header: bool) -> bytes:
+    """The lines whose first byte lies in [start, end); with `header`, prefixed by the file's first line."""
+    with open(path, "rb") as f:
+        head = f.readline() if header and start > 0 else b""
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()  # finish the line that began before `start`
+        pos = f.tell()
+        if pos >= end:
+            return head
+        data = f.read(end - pos)
+        if data and not data.endswith(b"\n"):
+            data += f.readline()
+        return head + data
+
+
+def _shard_chunks(shard: Shard, chunk_size: int):
+    if shard.fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(shard.path)
+        for batch in parquet.iter_batches(batch_size=chunk_size, row_groups=range(shard.start, shard.end)):
+            yield batch.to_pandas()
+    elif shard.end is None:
+        yield from read_chunks(shard.path, chunk_size, shard.fmt, extra=[ID_COLUMN])
+    else:
+        data = _read_range(shard.path, shard.start, shard.end, header=shard.fmt == "csv")
+        if data.strip():
+            yield from read_chunks(io.BytesIO(data), chunk_size, shard.fmt, extra=[ID_COLUMN])
+
+
+def result_lines(chunk) -> List[bytes]:
+    """One NDJSON line per record of `chunk`, as retriage writes them; a missing id is written as null."""
+    if "other_symptoms" in chunk:
+        chunk = chunk.assign(other_symptoms=_text_column(chunk["other_symptoms"]))
+    levels, scores, detail = assess_risk_batch(chunk)
+    names, ranked, match_pct, weight = generate_diagnosis_batch(chunk, top_k=TOP_K)
+    detail_rows = np.column_stack([detail[k] for k in RISK_FACTORS]).tolist()
+    ids = [None if pd.isna(v) else v for v in chunk[ID_COLUMN].tolist()] if ID_COLUMN in chunk else None
+    ranked, match_pct, weight, scores = ranked.tolist(), match_pct.tolist(), weight.tolist(), scores.tolist()
+    lines = []
+    for i in range(len(chunk)):
+        row = {"risk": levels[i], "score": scores[i], "detail": dict(zip(RISK_FACTORS, detail_rows[i])),
+               "possible": [{"disease": names[j], "match": m, "weight": w} for j, m, w in zip(ranked[i], match_pct[i], weight[i])]}
+        if ids is not None:
+            row = {"id": ids[i], **row}
+        lines.append(_ENCODER.encode(row).encode())
+    return lines
+
+
+def _init_worker():
+    get_risk_table()  # build and verify once per process, not per shard
+
+
+def run_shard(shard: Shard, part: str, chunk_size: int) -> int:
+    """Score one shard into `part` (written under a temporary name, then renamed); returns its record count."""
+    records = 0
+    with open(part + ".tmp", "wb") as f:
+        for chunk in _shard_chunks(shard, chunk_size):
+            lines = result_lines(chunk)
+            if lines:
+                f.write(b"\n".join(lines) + b"\n")
+            records += len(lines)
+    os.replace(part + ".tmp", part)
+    return records
+
+
+class Checkpoint:
+    """How many shards of a run are already in the output, saved atomically after each append."""
+
+    def __init__(self, path: str, inputs: List, shards: int, shard_bytes: int):
+        self.path = path
+        self.key = {"inputs": inputs, "shards": shards, "shard_bytes": shard_bytes}
+        self.written = 0
+        self.output_size = 0
+        self.records = 0
+
+    def load(self) -> bool:
+        """Pick up a previous run of the same job; False if there is none."""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            saved = json.load(f)
+        if saved["key"] != json.loads(json.dumps(self.key)):
+            raise ValueError(f"{self.path} belongs to a different run (inputs or shard size changed); "
+                             "delete it or pass --restart")
+        self.written, self.output_size, self.records = saved["written"], saved["output_size"], saved["records"]
+        return True
+
+    def save(self):
+        with open(self.path + ".tmp", "w") as f:
+            json.dump({"key": self.key, "written": self.written, "output_size": self.output_size, "records": self.records}, f)
+        os.replace(self.path + ".tmp", self.path)
+
+
+def retriage(paths: List[str], out: str, workers: Optional[int] = None, shard_mb: float = 32,
+             chunk_size: int = 50_000, restart: bool = False, log=sys.stderr) -> int:
+    """Re-score `paths` into `out`; returns the number of records written."""
+    shard_bytes = max(1, int(shard_mb * 2**20))
+    shards = plan_shards(paths, shard_bytes)
+    inputs = [[os.path.abspath(p), os.path.getsize(p), os.stat(p).st_mtime_ns] for p in paths]
+    checkpoint = Checkpoint(out + ".checkpoint.json", inputs, len(shards), shard_bytes)
+    parts_dir = out + ".parts"
+    if restart and os.path.exists(checkpoint.path):
+        os.remove(checkpoint.path)
+    resumed = checkpoint.load()
+    if resumed and not os.path.exists(out):
+        raise ValueError(f"{checkpoint.path} exists but {out} is gone; pass --restart")
+    if not resumed:
+        shutil.rmtree(parts_dir, ignore_errors=True)  # leftovers of some other run
+    os.makedirs(parts_dir, exist_ok=True)
+
+    def part(i: int) -> str:
+        return os.path.join(parts_dir, f"{i:06d}.ndjson")
+
+    output = open(out, "r+b" if resumed else "wb")
+    output.truncate(checkpoint.output_size)  # drop anything appended after the last checkpoint
+    output.seek(checkpoint.output_size)
+    if resumed:
+        print(f"resuming at shard {checkpoint.written}/{len(shards)} ({checkpoint.records:,} records done)", file=log)
+
+    t0, already = time.perf_counter(), checkpoint.records
+    done = {i for i in range(checkpoint.written, len(shards)) if os.path.exists(part(i))}  # finished before the interruption
+    pool = concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker)
+    try:
+        futures = {pool.submit(run_shard, shards[i], part(i), chunk_size): i
+                   for i in range(checkpoint.written, len(shards)) if i not in done}
+        pending = set(futures)
+        while checkpoint.written < len(shards):
+            # append every shard that is next in input order; the rest wait on disk
+            while checkpoint.written in done:
+                i = checkpoint.written
+                with open(part(i), "rb") as f:
+                    data = f.read()
+                output.write(data)
+                output.flush()
+                os.fsync(output.fileno())
+                checkpoint.written, checkpoint.output_size = i + 1, output.tell()
+                checkpoint.records += data.count(b"\n")
+                checkpoint.save()
+                os.remove(part(i))
+            if checkpoint.written == len(shards):
+                break
+            finished, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                future.result()  # re-raise worker errors here
+                done.add(futures[future])
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        output.close()
+        raise
+    pool.shutdown()
+    output.close()
+    os.remove(checkpoint.path)
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    elapsed = time.perf_counter() - t0
+    print(f"{checkpoint.records:,} records in {len(shards)} shards, {elapsed:.1f}s "
+          f"({(checkpoint.records - already) / max(elapsed, 1e-9):,.0f} records/s)", file=log)
+    return checkpoint.records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("paths", nargs="+", metavar="FILE")
+    parser.add_argument("--out", required=True, help="NDJSON results, one line per input record")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--shard-mb", type=float, default=32, help="target shard size for CSV/NDJSON")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="records scored per batch inside a shard")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint and start over")
+    args = parser.parse_args(argv)
+    try:
+        retriage(args.paths, args.out, args.workers, args.shard_mb, args.chunk_size, args.restart)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    except KeyboardInterrupt:
+        parser.exit(130, "interrupted; run the same command again to resume\n")
+
+
+if __name__ == "__main__":
+    main()
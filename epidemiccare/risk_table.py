@@ -0,0 +1,120 @@
+"""assess_risk precomputed over its whole (finite) input space."""
+import functools
+import itertools
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from . import metrics
+from .triage import (AGE_POINTS, CONDITIONS_POINTS, RISK_FACTORS, RISK_LEVELS, RISK_WEIGHTS, SPO2_POINTS,
+                     assess_risk, not_sure_points)
+
+# assess_risk only looks at bucketed inputs (age band, conditions yes/no, each
+# answer as Yes / Not sure / anything else, SpO₂ band), so every outcome fits
+# in a small table indexed by a mixed-radix code over those buckets.
+RISK_LEVEL_NAMES: List[str] = ["low", *(level for _, level in reversed(RISK_LEVELS))]
+RISK_RADIX: List[int] = [len(AGE_POINTS) + 1, 2, *([3] * len(RISK_WEIGHTS)), len(SPO2_POINTS) + 1]  # one digit per RISK_FACTORS entry
+
+def _band(value, bands: List[Tuple[int, int]], below: bool) -> int:
+    # index of the first matching band, len(bands) when none matches or the value isn't numeric
+    if isinstance(value, (int, float)):
+        for i, (t, _) in enumerate(bands):
+            if value < t if below else value >= t:
+                return i
+    return len(bands)
+
+def _answer_digit(ans) -> int:
+    return 1 if ans == "Yes" else 2 if ans == "Not sure" else 0
+
+# place value of each RISK_RADIX digit, and each answer's contribution to the code
+_STRIDES: List[int] = [int(np.prod(RISK_RADIX[i + 1:])) for i in range(len(RISK_RADIX))]
+_ANSWER_CODES: List[Tuple[str, Dict[str, int]]] = [
+    (k, {ans: _answer_digit(ans) * stride for ans in ("Yes", "Not sure")}) for k, stride in zip(RISK_WEIGHTS, _STRIDES[2:-1])]
+
+def risk_code(symptoms: Dict) -> int:
+    """The table row for `symptoms`; the answers must be hashable (strings, None, numbers)."""
+    code = _band(symptoms.get("age"), AGE_POINTS, below=False) * _STRIDES[0]
+    if symptoms.get("conditions"):
+        code += _STRIDES[1]
+    for k, codes in _ANSWER_CODES:
+        code += codes.get(symptoms.get(k), 0)
+    return code + _band(symptoms.get("spo2"), SPO2_POINTS, below=True)
+
+def build_risk_table() -> np.ndarray:
+    """Enumerate every assess_risk outcome.
+
+    Row `risk_code(symptoms)` holds the detail points in RISK_FACTORS order,
+    then the score, then the level as an index into RISK_LEVEL_NAMES.
+    """
+    points = [[p for _, p in AGE_POINTS] + [0], [0, CONDITIONS_POINTS]]
+    points += [[0, w, not_sure_points(w)] for w in RISK_WEIGHTS.values()]
+    points.append([p for _, p in SPO2_POINTS] + [0])
+    digits = np.indices(RISK_RADIX).reshape(len(RISK_RADIX), -1)  # row-major order == risk_code order
+    detail = np.stack([np.asarray(p)[d] for p, d in zip(points, digits)], axis=1)
+    score = detail.sum(axis=1)
+    level = np.zeros_like(score)
+    for i, (min_score, _) in enumerate(reversed(RISK_LEVELS), start=1):
+        level[score >= min_score] = i
+    return np.column_stack([detail, score, level]).astype(np.int16)
+
+def _risk_samples() -> List[List]:
+    # per digit of RISK_RADIX, sample inputs for each digit value, including both edges of every band
+    def band_samples(bands, below, extra):
+        edges = [t for t, _ in bands]
+        out = []
+        for i, t in enumerate(edges):
+            if below:
+                out.append([float(np.nextafter(t, -np.inf)), edges[i-1] if i else 0])
+            else:
+                out.append([t, float(np.nextafter(edges[i-1], -np.inf)) if i else t + 100])
+        out.append([None, "n/a", extra(edges[-1])])
+        return out
+    samples = [band_samples(AGE_POINTS, False, lambda t: float(np.nextafter(t, -np.inf))), [[None, ""], ["asthma"]]]
+    samples += [[[None, "No", "maybe"], ["Yes"], ["Not sure"]] for _ in RISK_WEIGHTS]
+    samples.append(band_samples(SPO2_POINTS, True, lambda t: t))
+    return samples
+
+_unmetered_assess_risk = getattr(assess_risk, "__wrapped__", assess_risk)  # verification is not scoring traffic
+
+def verify_risk_table(table: np.ndarray) -> List[Tuple[Dict, Tuple, Tuple]]:
+    """Check every table row against assess_risk; returns (symptoms, expected, got) per mismatch."""
+    keys = ["age", "conditions", *RISK_WEIGHTS, "spo2"]
+    samples = _risk_samples()
+    mismatches = []
+    for digits in itertools.product(*(range(r) for r in RISK_RADIX)):
+        options = [samples[f][d] for f, d in enumerate(digits)]
+        for variant in range(max(len(o) for o in options)):
+            symptoms = {k: o[variant % len(o)] for k, o in zip(keys, options)}
+            row = table[risk_code(symptoms)].tolist()
+            got = (RISK_LEVEL_NAMES[row[-1]], row[-2], dict(zip(RISK_FACTORS, row)))
+            expected = _unmetered_assess_risk(symptoms)
+            if got != expected:
+                mismatches.append((symptoms, expected, got))
+    return mismatches
+
+@functools.lru_cache(maxsize=None)
+def get_risk_table() -> np.ndarray:
+    """The verified table, built on first use and then shared by the process."""
+    table = build_risk_table()
+    mismatches = verify_risk_table(table)
+    if mismatches:
+        raise RuntimeError(f"risk table disagrees with assess_risk for {len(mismatches)} inputs, e.g. {mismatches[0]}")
+    return table
+
+@functools.lru_cache(maxsize=None)
+def get_risk_results() -> List[Tuple[str, int, Dict]]:
+    """get_risk_table() as assess_risk's own (level, score, detail) results, one per code.
+
+    Building and verifying the table takes a few hundred milliseconds; call
+    this at startup so no request pays for it.
+    """
+    return [(RISK_LEVEL_NAMES[row[-1]], row[-2], dict(zip(RISK_FACTORS, row))) for row in get_risk_table().tolist()]
+
+@metrics.instrumented("assess_risk_lookup")
+def assess_risk_lookup(symptoms: Dict) -> Tuple[str, int, Dict]:
+    """assess_risk as a single index into get_risk_results()."""
+    try:
+        level, score, detail = get_risk_results()[risk_code(symptoms)]
+    except TypeError:  # an unhashable answer; assess_risk compares instead
+        return _unmetered_assess_risk(symptoms)
+    return level, score, dict(detail)  # callers may add to the detail
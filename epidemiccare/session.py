@@ -0,0 +1,180 @@
+"""Compact per-session records: chat history and the triage result.
+
+A server holds one of each per live session. Neither copies static text:
+chat messages that match a known message (a STEPS prompt or choice, or a
+line registered with `intern_message`) are stored as small integer ids. A
+triage result keeps disease ids into the shared catalogue and rebuilds the
+shared TreatmentPlan on access. Chat history beyond `cap` messages is
+spilled to a per-session file and read back only when asked for.
+"""
+import array
+import json
+import os
+import sys
+import tempfile
+import uuid
+import weakref
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .catalogue import CATALOGUE
+from .plans import TreatmentPlan, build_treatment_plan
+from .steps import STEPS
+from .triage import RISK_FACTORS
+
+# -------------------- MESSAGES --------------------
+_MESSAGES: List[str] = []
+_MESSAGE_IDS: Dict[str, int] = {}
+
+def intern_message(text: str) -> int:
+    """Register a static message (once per process) and return its id."""
+    mid = _MESSAGE_IDS.get(text)
+    if mid is None:
+        mid = _MESSAGE_IDS[text] = len(_MESSAGES)
+        _MESSAGES.append(text)
+    return mid
+
+for _step in STEPS:
+    intern_message(_step["prompt"])
+    for _choice in _step.get("choices", ()):
+        intern_message(_choice)
+
+# -------------------- CHAT LOG --------------------
+SENDERS = ("doctor", "user")
+_SENDER_IDS = {s: i for i, s in enumerate(SENDERS)}
+CHAT_MEMORY_CAP = 200  # messages kept in RAM per session; older ones live in the spill file
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class ChatLog:
+    """Append-only chat history that reads like a list of (sender, message) tuples.
+
+    Each message costs one byte for the sender and a list slot for either an
+    interned message id or the message's own string. Once more than `cap`
+    messages are held, the oldest half is appended to a spill file (NDJSON,
+    with one offset per message kept for random access). The file is removed
+    when the log is closed or garbage-collected.
+    """
+    __slots__ = ("cap", "spill_dir", "_senders", "_texts", "_offsets", "_path", "_finalizer", "__weakref__")
+
+    def __init__(self, cap: int = CHAT_MEMORY_CAP, spill_dir: Optional[str] = None):
+        self.cap = max(2, cap)
+        self.spill_dir = spill_dir or os.environ.get("EPIDEMICCARE_SPILL_DIR") or tempfile.gettempdir()
+        self._senders = bytearray()
+        self._texts: List[Union[int, str]] = []
+        self._offsets = array.array("Q")  # file offset of every spilled message
+        self._path: Optional[str] = None
+        self._finalizer = None
+
+    def append(self, sender: str, message: str):
+        self._senders.append(_SENDER_IDS[sender])
+        mid = _MESSAGE_IDS.get(message)
+        self._texts.append(message if mid is None else mid)
+        if len(self._texts) > self.cap:
+            self._spill(len(self._texts) // 2)
+
+    def _spill(self, count: int):
+        if self._path is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._path = os.path.join(self.spill_dir, f"epidemiccare-chat-{uuid.uuid4().hex}.ndjson")
+            self._finalizer = weakref.finalize(self, _remove, self._path)
+        with open(self._path, "ab") as f:
+            offset = f.tell()
+            for sender, text in zip(self._senders[:count], self._texts[:count]):
+                line = json.dumps([sender, _MESSAGES[text] if isinstance(text, int) else text]).encode() + b"\n"
+                self._offsets.append(offset)
+                offset += len(line)
+                f.write(line)
+        del self._senders[:count]
+        del self._texts[:count]
+
+    def close(self):
+        """Forget the history and delete the spill file."""
+        if self._finalizer is not None:
+            self._finalizer()
+        self._senders.clear(); self._texts.clear()
+        self._offsets = array.array("Q")
+        self._path = self._finalizer = None
+
+    @property
+    def spilled(self) -> int:
+        return len(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets) + len(self._texts)
+
+    def _message(self, i: int) -> Tuple[str, str]:
+        text = self._texts[i]
+        return SENDERS[self._senders[i]], _MESSAGES[text] if isinstance(text, int) else text
+
+    def _read_spilled(self, start: int, stop: int) -> List[Tuple[str, str]]:
+        with open(self._path, "rb") as f:
+            f.seek(self._offsets[start])
+            data = f.read(self._offsets[stop] - self._offsets[start]) if stop < len(self._offsets) else f.read()
+        return [(SENDERS[s], m) for s, m in map(json.loads, data.splitlines())]
+
+    def __getitem__(self, index):
+        n, spilled = len(self), len(self._offsets)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(n)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            out = self._read_spilled(start, min(stop, spilled)) if start < min(stop, spilled) else []
+            return out + [self._message(i - spilled) for i in range(max(start, spilled), stop)]
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("chat index out of range")
+        return self._message(index - spilled) if index >= spilled else self._read_spilled(index, index + 1)[0]
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return iter(self[:])
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+# -------------------- TRIAGE RESULT --------------------
+_DISEASE_NAMES = list(CATALOGUE.diseases)
+
+class TriageResult:
+    """A finished consultation's outcome, holding only ids and numbers.
+
+    Reads like the dict the pages used before (`result["possible"]`, ...):
+    `possible` is rebuilt as generate_diagnosis tuples that reference the
+    shared catalogue, and `plan` is the shared TreatmentPlan for the risk
+    level and top disease.
+    """
+    __slots__ = ("risk", "score", "_detail", "_possible")
+
+    def __init__(self, risk: str, score: int, detail: Dict, possible: List[Tuple]):
+        self.risk = sys.intern(risk)
+        self.score = int(score)
+        self._detail = tuple(int(detail.get(k, 0)) for k in RISK_FACTORS)
+        # (disease id, match %, weight); diseases no longer in the catalogue are dropped
+        self._possible = tuple((CATALOGUE.position[d], int(pct), int(w)) for d, pct, _, _, w in possible
+                               if d in CATALOGUE.position)
+
+    @property
+    def detail(self) -> Dict[str, int]:
+        return dict(zip(RISK_FACTORS, self._detail))
+
+    @property
+    def possible(self) -> List[Tuple]:
+        out = []
+        for j, pct, weight in self._possible:
+            info = CATALOGUE.diseases[_DISEASE_NAMES[j]]
+            out.append((_DISEASE_NAMES[j], pct, info["description"], info["precautions"], weight))
+        return out
+
+    @property
+    def plan(self) -> TreatmentPlan:
+        return build_treatment_plan(self.risk, _DISEASE_NAMES[self._possible[0][0]] if self._possible else None)
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+    def __repr__(self) -> str:
+        return f"TriageResult(risk={self.risk!r}, score={self.score}, possible={[_DISEASE_NAMES[j] for j, _, _ in self._possible]})"
@@ -0,0 +1,15 @@
+"""The consultation script: one entry per question, in the order they are asked."""
+from typing import Dict, List
+
+STEPS: List[Dict] = [
+    {"key":"name", "prompt":"What is your name?", "kind":"text"},
+    {"key":"age", "prompt":"How old are you?", "kind":"number", "min":0, "max":120},
+    {"key":"conditions", "prompt":"Do you have any pre-existing medical conditions? (optional)", "kind":"text"},
+    {"key":"fever", "prompt":"Have you had a fever in the last 48 hours?", "kind":"choice", "choices":["Yes","No","Not sure"]},
+    {"key":"cough_breathing", "prompt":"Any cough or difficulty breathing?", "kind":"choice", "choices":["Yes","No","Not sure"]},
+    {"key":"body_aches", "prompt":"Any body aches or joint pain?", "kind":"choice", "choices":["Yes","No","Not sure"]},
+    {"key":"loss_taste_smell", "prompt":"Have you noticed any loss of taste or smell?", "kind":"choice", "choices":["Yes","No","Not sure"]},
+    {"key":"fatigue", "prompt":"Are you experiencing fatigue or unusual tiredness?", "kind":"choice", "choices":["Yes","No","Not sure"]},
+    {"key":"other_symptoms", "prompt":"Any other symptoms you'd like to mention? (e.g., headache, rash, nausea)", "kind":"text"},
+    {"key":"spo2", "prompt":"If you have a pulse oximeter, what is your oxygen saturation (SpO₂ %)? (optional)", "kind":"number", "min":70, "max":100}
+]
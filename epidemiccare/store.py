@@ -0,0 +1,331 @@
+"""Durable SQLite storage for consultations, daily check-ins and re-assessments."""
+import atexit
+import datetime
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .steps import STEPS
+from .triage import RISK_FACTORS
+
+_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS consultations (
+    patient     TEXT PRIMARY KEY,
+    symptoms    TEXT NOT NULL,
+    risk        TEXT NOT NULL,
+    score       INTEGER NOT NULL,
+    detail      TEXT NOT NULL,
+    possible    TEXT NOT NULL,
+    start_date  TEXT
+);
+CREATE TABLE IF NOT EXISTS checkins (
+    patient     TEXT NOT NULL,
+    date        TEXT NOT NULL,
+    rating      INTEGER NOT NULL,
+    symptoms    TEXT NOT NULL,
+    taken       INTEGER NOT NULL,
+    PRIMARY KEY (patient, date)
+) WITHOUT ROWID;
+-- patients with check-ins the nightly re-assessment has not seen; a new check-in
+-- replaces the patient's row, so `seq` tells a run whether it was marked again meanwhile
+CREATE TABLE IF NOT EXISTS reassess_queue (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient     TEXT NOT NULL UNIQUE
+);
+-- holds a row only inside an import_checkins transaction, which queues its patients itself
+CREATE TABLE IF NOT EXISTS bulk_import (
+    active      INTEGER NOT NULL
+);
+DROP TRIGGER IF EXISTS checkin_marks_patient;  -- the unconditional version of the trigger below
+CREATE TRIGGER IF NOT EXISTS checkin_queues_patient AFTER INSERT ON checkins
+WHEN NOT EXISTS (SELECT 1 FROM bulk_import) BEGIN
+    INSERT OR REPLACE INTO reassess_queue (patient) VALUES (NEW.patient);
+END;
+CREATE TABLE IF NOT EXISTS reassessments (
+    patient     TEXT PRIMARY KEY,
+    date        TEXT NOT NULL,
+    risk        TEXT NOT NULL,
+    score       INTEGER NOT NULL,
+    detail      TEXT NOT NULL,
+    possible    TEXT NOT NULL
+);
+"""
+# Statements are module constants so sqlite3's per-connection statement cache
+# reuses the prepared statement instead of re-parsing SQL on every call.
+_SQL_SAVE_CONSULTATION = "INSERT OR REPLACE INTO consultations VALUES (?, ?, ?, ?, ?, ?, ?)"
+_SQL_LOAD_CONSULTATION = "SELECT symptoms, risk, score, detail, possible, start_date FROM consultations WHERE patient = ?"
+_SQL_SAVE_CHECKIN = "INSERT OR REPLACE INTO checkins VALUES (?, ?, ?, ?, ?)"
+_SQL_HAS_CHECKIN = "SELECT 1 FROM checkins WHERE patient = ? AND date = ?"
+_SQL_CHECKINS = "SELECT date, rating, symptoms, taken FROM checkins WHERE patient = ? ORDER BY date"
+_SQL_ALL_CONSULTATIONS = "SELECT patient, json_extract(symptoms, '$.name'), risk, score, start_date FROM consultations"
+_SQL_ALL_CHECKINS = "SELECT patient, date, rating, taken FROM checkins ORDER BY patient, date"  # primary-key order: no sort
+_SQL_DELETE_CONSULTATION = "DELETE FROM consultations WHERE patient = ?"
+_SQL_DELETE_CHECKINS = "DELETE FROM checkins WHERE patient = ?"
+_SQL_DELETE_QUEUED = "DELETE FROM reassess_queue WHERE patient = ?"
+_SQL_DELETE_REASSESSMENT = "DELETE FROM reassessments WHERE patient = ?"
+_SQL_QUEUE = "SELECT seq, patient FROM reassess_queue WHERE seq > ? AND seq <= ? ORDER BY seq LIMIT ?"
+_SQL_QUEUE_END = "SELECT COALESCE(MAX(seq), 0) FROM reassess_queue"
+_SQL_QUEUE_ALL = "INSERT OR REPLACE INTO reassess_queue (patient) SELECT patient FROM consultations"
+_SQL_DEQUEUE = "DELETE FROM reassess_queue WHERE seq = ?"
+_SQL_RECENT_CHECKINS = """
+SELECT patient, date, rating, symptoms, taken FROM (
+    SELECT *, row_number() OVER (PARTITION BY patient ORDER BY date DESC) AS age FROM checkins
+    WHERE patient IN (SELECT value FROM json_each(?))
+) WHERE age <= ? ORDER BY patient, date"""
+_SQL_CONSULTATIONS_IN = "SELECT patient, symptoms, risk, score FROM consultations WHERE patient IN (SELECT value FROM json_each(?))"
+_SQL_SAVE_REASSESSMENT = "INSERT OR REPLACE INTO reassessments VALUES (?, ?, ?, ?, ?, ?)"
+_SQL_LOAD_REASSESSMENT = "SELECT date, risk, score, detail, possible FROM reassessments WHERE patient = ?"
+# bulk export/import (epidemiccare.columnar): answers and points travel as plain columns and
+# SQLite takes the JSON apart or builds it; an unanswered key is exported and imported as NULL
+_KEYS = [s["key"] for s in STEPS]
+_SQL_EXPORT_CONSULTATIONS = (
+    "SELECT patient, " + ", ".join(f"json_extract(symptoms, '$.{k}')" for k in _KEYS) + ", risk, score, "
+    + ", ".join(f"json_extract(detail, '$.{k}')" for k in RISK_FACTORS) + ", possible, start_date FROM consultations ORDER BY patient")
+_SQL_QUEUE_PATIENTS = "INSERT OR REPLACE INTO reassess_queue (patient) SELECT DISTINCT value FROM json_each(?)"
+_SQL_EXPORT_CHECKINS = "SELECT patient, date, rating, symptoms, taken FROM checkins ORDER BY patient, date"
+_SQL_IMPORT_CONSULTATION = (
+    "INSERT OR REPLACE INTO consultations VALUES (?, json_object("
+    + ", ".join(f"'{k}', ?" for k in _KEYS) + "), ?, ?, json_object("
+    + ", ".join(f"'{k}', ?" for k in RISK_FACTORS) + "), ?, ?)")
+
+class ProgressStore:
+    """SQLite store for consultations and daily check-ins, keyed by patient id.
+
+    The database runs in WAL mode so readers never block the writer. Connections
+    come from a per-process pool. Check-ins are buffered and written in batches:
+    a batch is committed once `batch_size` rows are pending or `flush_interval`
+    seconds after the first one, whichever comes first. Lookups consult the
+    pending buffer before the (patient, date) primary-key index.
+    """
+
+    def __init__(self, path: str, pool_size: int = 8, batch_size: int = 256, flush_interval: float = 0.25):
+        self.path = path
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._pending: Dict[Tuple[str, str], Tuple] = {}
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        with self.connection() as conn:
+            conn.executescript(_STORE_SCHEMA)
+        atexit.register(self.flush)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None, cached_statements=64)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:  # a failed write must not hand the next user an open transaction and its lock
+                conn.rollback()
+            raise
+        finally:
+            if self._pool.qsize() < self.pool_size:
+                self._pool.put(conn)
+            else:
+                conn.close()
+
+    # ---- consultations ----
+    def save_consultation(self, patient: str, symptoms: Dict, plan: Dict, start_date: Optional[datetime.date]):
+        row = (patient, json.dumps(symptoms), plan["risk"], plan["score"], json.dumps(plan["detail"]),
+               json.dumps(plan["possible"]), start_date.isoformat() if start_date else None)
+        with self.connection() as conn:
+            conn.execute("BEGIN")
+            conn.execute(_SQL_SAVE_CONSULTATION, row)
+            conn.execute(_SQL_DELETE_REASSESSMENT, (patient,))  # it re-assessed the previous consultation
+            conn.execute("COMMIT")
+
+    def load_consultation(self, patient: str) -> Optional[Dict]:
+        with self.connection() as conn:
+            row = conn.execute(_SQL_LOAD_CONSULTATION, (patient,)).fetchone()
+        if row is None:
+            return None
+        symptoms, risk, score, detail, possible, start_date = row
+        return {"symptoms": json.loads(symptoms), "risk": risk, "score": score, "detail": json.loads(detail),
+                "possible": [tuple(p) for p in json.loads(possible)],
+                "start_date": datetime.date.fromisoformat(start_date) if start_date else None}
+
+    def delete_patient(self, patient: str):
+        self.flush()
+        with self.connection() as conn:
+            conn.execute("BEGIN")
+            conn.execute(_SQL_DELETE_CONSULTATION, (patient,))
+            conn.execute(_SQL_DELETE_CHECKINS, (patient,))
+            conn.execute(_SQL_DELETE_QUEUED, (patient,))
+            conn.execute(_SQL_DELETE_REASSESSMENT, (patient,))
+            conn.execute("COMMIT")
+
+    # ---- check-ins ----
+    def add_checkin(self, patient: str, date: datetime.date, rating: int, symptoms: List[str], taken: bool):
+        row = (patient, date.isoformat(), int(rating), json.dumps(symptoms), int(bool(taken)))
+        with self._lock:
+            self._pending[(patient, row[1])] = row
+            full = len(self._pending) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows = list(self._pending.values())
+            if self._timer is not None:
+                self._timer.cancel(); self._timer = None
+            if not rows:
+                return
+            # write under the lock so a lookup never misses a row that has left
+            # the buffer but is not committed yet
+            with self.connection() as conn:
+                conn.execute("BEGIN")
+                conn.executemany(_SQL_SAVE_CHECKIN, rows)
+                conn.execute("COMMIT")
+            self._pending.clear()
+
+    def has_checkin(self, patient: str, date: datetime.date) -> bool:
+        key = (patient, date.isoformat())
+        with self._lock:
+            if key in self._pending:
+                return True
+        with self.connection() as conn:
+            return conn.execute(_SQL_HAS_CHECKIN, key).fetchone() is not None
+
+    def checkins(self, patient: str) -> List[Tuple[datetime.date, int, List[str], bool]]:
+        self.flush()
+        with self.connection() as conn:
+            rows = conn.execute(_SQL_CHECKINS, (patient,)).fetchall()
+        return [(datetime.date.fromisoformat(d), r, json.loads(s), bool(t)) for d, r, s, t in rows]
+
+    # ---- all patients ----
+    def all_consultations(self) -> List[Tuple[str, Optional[str], str, int, Optional[str]]]:
+        """(patient, name, risk, score, start date) for every saved consultation."""
+        with self.connection() as conn:
+            return conn.execute(_SQL_ALL_CONSULTATIONS).fetchall()
+
+    def all_checkins(self) -> List[Tuple[str, str, int, int]]:
+        """(patient, ISO date, rating, taken) for every check-in, ordered by patient then date."""
+        self.flush()
+        with self.connection() as conn:
+            return conn.execute(_SQL_ALL_CHECKINS).fetchall()
+
+    # ---- bulk export / import ----
+    def _fetch(self, sql: str, batch: int) -> Iterator[List[Tuple]]:
+        with self.connection() as conn:
+            cursor = conn.execute(sql)
+            while True:
+                rows = cursor.fetchmany(batch)
+                if not rows:
+                    return
+                yield rows
+
+    def export_consultations(self, batch: int = 65536) -> Iterator[List[Tuple]]:
+        """Every consultation in patient order, `batch` rows at a time.
+
+        A row is (patient, *STEPS answers, risk, score, *RISK_FACTORS points, possible JSON, ISO start date).
+        """
+        return self._fetch(_SQL_EXPORT_CONSULTATIONS, batch)
+
+    def export_checkins(self, batch: int = 65536) -> Iterator[List[Tuple]]:
+        """Every check-in as (patient, ISO date, rating, symptoms JSON, taken), in patient then date order."""
+        self.flush()
+        return self._fetch(_SQL_EXPORT_CHECKINS, batch)
+
+    def import_consultations(self, rows: Sequence[Tuple]):
+        """Write export_consultations-shaped rows in one transaction, replacing the patients' consultations.
+
+        SQLite builds the symptoms and detail JSON from the answer and point columns.
+        """
+        with self.connection() as conn:
+            conn.execute("BEGIN")
+            conn.executemany(_SQL_IMPORT_CONSULTATION, rows)
+            conn.executemany(_SQL_DELETE_REASSESSMENT, [(r[0],) for r in rows])
+            conn.execute("COMMIT")
+
+    def import_checkins(self, rows: Sequence[Tuple]):
+        """Write export_checkins-shaped rows in one transaction; the patients are queued for re-assessment.
+
+        The queue trigger would fire once per row. A row in `bulk_import`
+        turns it off for the transaction, and each patient is queued once
+        instead. The row is gone again at COMMIT (or ROLLBACK), so no other
+        writer ever sees it.
+        """
+        self.flush()
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT INTO bulk_import VALUES (1)")
+                conn.executemany(_SQL_SAVE_CHECKIN, rows)
+                conn.execute(_SQL_QUEUE_PATIENTS, (json.dumps(list({r[0]: None for r in rows})),))
+                conn.execute("DELETE FROM bulk_import")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")  # also takes the bulk_import row back
+                raise
+
+    # ---- re-assessment ----
+    def queued(self, after: int = 0, limit: int = 1000, upto: Optional[int] = None) -> List[Tuple[int, str]]:
+        """(seq, patient) of patients with check-ins not yet re-assessed, oldest mark first, from seq `after` on.
+
+        `upto` (see queue_end) leaves out patients marked since then.
+        """
+        self.flush()
+        with self.connection() as conn:
+            return conn.execute(_SQL_QUEUE, (after, 2**63 - 1 if upto is None else upto, limit)).fetchall()
+
+    def queue_end(self) -> int:
+        """The newest queue seq, 0 if the queue is empty; later marks get higher seqs."""
+        self.flush()
+        with self.connection() as conn:
+            return conn.execute(_SQL_QUEUE_END).fetchone()[0]
+
+    def queue_all(self) -> int:
+        """Queue every patient with a consultation, e.g. after the rules changed; returns how many."""
+        with self.connection() as conn:
+            return conn.execute(_SQL_QUEUE_ALL).rowcount
+
+    def reassessment_inputs(self, patients: List[str], recent: int) -> Tuple[Dict[str, Tuple[Dict, str, int]], Dict[str, List[Tuple]]]:
+        """Consultation (symptoms, risk, score) and last `recent` check-ins (date order) of each of `patients`."""
+        ids = json.dumps(patients)
+        with self.connection() as conn:
+            consultations = {p: (json.loads(s), r, sc) for p, s, r, sc in conn.execute(_SQL_CONSULTATIONS_IN, (ids,))}
+            checkins: Dict[str, List[Tuple]] = {}
+            for p, d, r, s, t in conn.execute(_SQL_RECENT_CHECKINS, (ids, recent)):
+                checkins.setdefault(p, []).append((datetime.date.fromisoformat(d), r, json.loads(s), bool(t)))
+        return consultations, checkins
+
+    def save_reassessments(self, rows: List[Tuple[str, datetime.date, str, int, Dict, List]], done: List[int]):
+        """Store re-assessments and take the `done` queue entries off, in one transaction.
+
+        An entry re-queued since it was read has a new seq, so it stays queued
+        (past the run's queue_end, so for the next run).
+        """
+        data = [(p, d.isoformat(), risk, score, json.dumps(detail), json.dumps(possible))
+                for p, d, risk, score, detail, possible in rows]
+        with self.connection() as conn:
+            conn.execute("BEGIN")
+            conn.executemany(_SQL_SAVE_REASSESSMENT, data)
+            conn.executemany(_SQL_DEQUEUE, [(seq,) for seq in done])
+            conn.execute("COMMIT")
+
+    def load_reassessment(self, patient: str) -> Optional[Dict]:
+        with self.connection() as conn:
+            row = conn.execute(_SQL_LOAD_REASSESSMENT, (patient,)).fetchone()
+        if row is None:
+            return None
+        date, risk, score, detail, possible = row
+        return {"date": datetime.date.fromisoformat(date), "risk": risk, "score": score,
+                "detail": json.loads(detail), "possible": [tuple(p) for p in json.loads(possible)]}
@@ -0,0 +1,94 @@
+"""Per-patient risk scoring and diagnosis ranking."""
+import heapq
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+from . import metrics
+from .catalogue import CATALOGUE
+
+# Shared by assess_risk and the batch engine; edit here to change scoring.
+AGE_POINTS: List[Tuple[int, int]] = [(60, 2), (40, 1)]  # (minimum age, points), first match wins
+CONDITIONS_POINTS = 2
+RISK_WEIGHTS: Dict[str, int] = {"fever":2, "cough_breathing":3, "body_aches":1, "loss_taste_smell":2, "fatigue":1}
+SPO2_POINTS: List[Tuple[int, int]] = [(90, 5), (94, 4), (96, 2)]  # (SpO₂ below, points), first match wins
+RISK_LEVELS: List[Tuple[int, str]] = [(9, "high"), (5, "medium")]  # (minimum score, level); anything lower is "low"
+RISK_FACTORS: List[str] = ["age", "conditions", *RISK_WEIGHTS, "spo2"]  # order of assess_risk's detail dict
+
+def not_sure_points(weight: int) -> int:
+    return max(1, int(round(weight*0.5)))
+
+def risk_level(score: int) -> str:
+    for min_score, level in RISK_LEVELS:
+        if score >= min_score:
+            return level
+    return "low"
+
+@metrics.instrumented("assess_risk")
+def assess_risk(symptoms: Dict) -> Tuple[str, int, Dict]:
+    score = 0; detail = {}
+
+    age = symptoms.get("age")
+    detail["age"] = 0
+    if isinstance(age, (int, float)):
+        for min_age, pts in AGE_POINTS:
+            if age >= min_age:
+                detail["age"] = pts; break
+    score += detail["age"]
+
+    if symptoms.get("conditions"):
+        score += CONDITIONS_POINTS; detail["conditions"] = CONDITIONS_POINTS
+    else:
+        detail["conditions"] = 0
+
+    for k, w in RISK_WEIGHTS.items():
+        ans = symptoms.get(k)
+        if ans == "Yes":
+            score += w; detail[k] = w
+        elif ans == "Not sure":
+            n = not_sure_points(w)
+            score += n; detail[k] = n
+        else:
+            detail[k] = 0
+
+    spo2 = symptoms.get("spo2")
+    detail["spo2"] = 0
+    if isinstance(spo2, (int, float)):
+        for below, pts in SPO2_POINTS:
+            if spo2 < below:
+                detail["spo2"] = pts; break
+    score += detail["spo2"]
+
+    return risk_level(score), score, detail
+
+@metrics.instrumented("generate_diagnosis")
+def generate_diagnosis(symptoms: Dict, top_k: Optional[int] = None) -> List[Tuple]:
+    other = (symptoms.get("other_symptoms") or "").lower()
+    diseases = CATALOGUE.diseases
+    weight = CATALOGUE.keywords.hits(other)
+    matches = {}
+    for k, users in CATALOGUE.by_symptom.items():
+        ans = symptoms.get(k)
+        if ans == "Yes":
+            m, w = 1, 2
+        elif ans == "Not sure":
+            m, w = 0.5, 1
+        else:
+            continue
+        for disease in users:
+            matches[disease] = matches.get(disease, 0) + m
+            weight[disease] = weight.get(disease, 0) + w
+
+    # only diseases with a hit have weight > 0; rank those through a heap (ties keep
+    # catalogue order), then pad with untouched diseases, which all tie at zero
+    n = len(diseases) if top_k is None else min(top_k, len(diseases))
+    position = CATALOGUE.position
+    ranked = heapq.nlargest(n, weight, key=lambda d: (weight[d], -position[d]))
+    if len(ranked) < n:
+        ranked += itertools.islice((d for d in diseases if d not in weight), n - len(ranked))
+
+    possible = []
+    for disease in ranked:
+        info = diseases[disease]
+        match_pct = min(100, int(round(100 * (matches.get(disease, 0) / (len(info["symptom_keys"]) or 1)))))
+        possible.append((disease, match_pct, info["description"], info["precautions"], weight.get(disease, 0)))
+    return possible
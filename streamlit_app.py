@@ -1,11 +1,22 @@
 # app.py
 import streamlit as st
-import pandas as pd
 import datetime
-import time
-import random
-import re
-from typing import List, Dict, Tuple, Optional  # Optional for Py<3.10 compatibility
+import functools
+import os
+import textwrap
+import threading
+import uuid
+from typing import List, Dict, Optional  # Optional for Py<3.10 compatibility
+
+# Scoring, catalogue, plans and storage live in the Streamlit-free `epidemiccare` package.
+# NumPy loads at startup (ProgressSeries and the risk table are arrays); pandas is
+# only imported by the pages that chart.
+from epidemiccare import STEPS, metrics
+from epidemiccare.engines import get_engine
+from epidemiccare.progress import CHECKIN_SYMPTOMS, ProgressSeries
+from epidemiccare.risk_table import assess_risk_lookup, get_risk_results
+from epidemiccare.session import ChatLog, TriageResult, intern_message
+from epidemiccare.store import ProgressStore
 
 # -------------------- PAGE CONFIG --------------------
 st.set_page_config(
@@ -16,20 +27,14 @@ st.set_page_config(
 )
 
 # --------- UTIL: compatibility for older Streamlit versions ---------
-def ui_toggle(label, value=False):
+def ui_toggle(label, value=False, **kwargs):
     try:
-        return st.toggle(label, value=value)  # Streamlit >= 1.25
+        return st.toggle(label, value=value, **kwargs)  # Streamlit >= 1.25
     except Exception:
-        return st.checkbox(label, value=value)  # Fallback
-
-def do_rerun():
-    try:
-        st.rerun()  # Streamlit >= 1.28
-    except Exception:
-        st.experimental_rerun()  # Fallback
+        return st.checkbox(label, value=value, **kwargs)  # Fallback
 
 # -------------------- THEME / CSS --------------------
-st.markdown("""
+CSS = """
 <style>
 .block-container { padding-top: 1.5rem !important; }
 .ec-card { background:#fff;border-radius:16px;padding:1rem 1.2rem;box-shadow:0 6px 18px rgba(0,0,0,0.08);margin-bottom:1rem; }
@@ -42,8 +47,75 @@ st.markdown("""
 .stButton > button { background:#0074D9 !important;color:#fff !important;border:none;border-radius:10px;padding:.55rem 1rem; }
 .stButton > button:hover { background:#005BB7 !important; }
 .ec-footer { font-size:.85rem;opacity:.75;margin-top:.75rem; }
+.ec-caption { font-size:.875rem;opacity:.6; }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# -------------------- STATIC HTML --------------------
+# Sections that never change are built once per process and sent as one
+# element each, instead of one st.markdown/st.subheader per line and per
+# card wrapper. Elements of at least global.minCachedMessageSize bytes
+# (.streamlit/config.toml) are then sent to a browser that already holds them
+# as a short hash reference; see benchmarks/bench_deltas.py.
+def card(body: str, title: Optional[str] = None) -> str:
+    """Markdown `body` inside an .ec-card; the blank lines keep it parsed as markdown inside the <div>."""
+    head = f"### {title}\n\n" if title else ""
+    return f'<div class="ec-card">\n\n{head}{textwrap.dedent(body).strip()}\n\n</div>'
+
+@st.cache_resource(show_spinner=False)
+def static_html() -> Dict[str, str]:
+    return {
+        "css": CSS,
+        "footer": '<div class="ec-footer">© 2025 EpidemicCare AI — Educational use only.</div>',
+        "home_hero": (
+            '<div class="ec-hero">\n'
+            '<div style="font-size:3rem;line-height:1">🩺</div>\n'
+            '<h1>EpidemicCare AI</h1>\n'
+            '<p class="ec-kicker">Your intelligent assistant for epidemic symptom check, care guidance, and progress tracking.</p>\n'
+            '</div>'),
+        "home_how": card("- Answer a short consultation.\n- Review your risk & possible conditions.\n- Get a personalized care plan.\n- Track daily progress.", "How it works"),
+        "home_tips": card("- Wash hands often.\n- Mask when ill or in crowds.\n- Stay hydrated.\n- Follow local health guidance.", "Quick Tips"),
+        "home_start": card("Click below to begin your consultation.", "Get Started"),
+        "resources_left": "\n".join([
+            card("""
+                - **Early care matters:** rest, fluids, monitor warning signs.
+                - **Prevention:** hand hygiene, masking in crowds, ventilation, vaccinations per local guidance.
+                - **When to seek urgent care:** breathing trouble, SpO₂ < **94%** (if measured), chest pain, confusion, blue/gray lips or nailbeds, severe dehydration, persistent high fever.
+            """, "Understanding Epidemic Illness"),
+            card("""
+                1. Sit and rest your hand at heart level for 5 minutes.  
+                2. Remove nail polish or false nails.  
+                3. Clip the oximeter to your fingertip; keep still for ~30–60 seconds.  
+                4. Record the **highest stable** value.  
+                > Typical healthy readings are ~96–99% at sea level; trends over time matter.
+            """, "Using a Pulse Oximeter (SpO₂)"),
+        ]),
+        "resources_right": "\n".join([
+            card("""
+                - **Emergency:** Use your local emergency number.  
+                - **Poison Help:** Local poison control center.  
+                - **Mental Health:** Local crisis hotline or text services in your country.
+
+                <p class="ec-caption">Numbers vary by country; check your local health authority website.</p>
+            """, "General Helplines"),
+            card("""
+                - This app is for **education & guidance** only and does **not** replace professional medical advice, diagnosis, or treatment.  
+                - Always follow instructions from licensed healthcare professionals and local health authorities.
+            """, "Important Notes"),
+        ]),
+    }
+
+st.markdown(static_html()["css"], unsafe_allow_html=True)
+
+# -------------------- METRICS --------------------
+# Off unless EPIDEMICCARE_METRICS=1; see epidemiccare/metrics.py for the endpoint.
+PAGE_RENDER_SECONDS = metrics.histogram("epidemiccare_page_render_seconds", "Time to render one page, per rerun.")
+SCRIPT_RUNS = metrics.counter("epidemiccare_script_runs_total", "Script executions (reruns) over all sessions.")
+SESSIONS = metrics.counter("epidemiccare_sessions_total", "Sessions started; script_runs_total / sessions_total is reruns per session.")
+SPEAK_CALLS = metrics.counter("epidemiccare_speak_calls_total", "speak() invocations.")
+SESSION_STATE_BYTES = metrics.histogram("epidemiccare_session_state_bytes", "Approximate st.session_state size at the end of a rerun.",
+                                        metrics.BYTES_BUCKETS)
+metrics.start_exporter()
 
 # -------------------- SESSION STATE --------------------
 def ensure_state():
@@ -52,341 +124,232 @@ def ensure_state():
     ss.setdefault("authenticated", True)
     ss.setdefault("user_data", {})
     ss.setdefault("symptoms", {})
-    ss.setdefault("chat_history", [])
+    ss.setdefault("chat_history", ChatLog())
+    ss.setdefault("chat_page_html", {})
+    ss.setdefault("chat_pages_shown", 1)
     ss.setdefault("current_idx", 0)
-    ss.setdefault("treatment_plan", {})
-    ss.setdefault("progress_data", {"start_date": None, "daily_rating": [], "symptoms_track": [], "medication_taken": []})
+    ss.setdefault("treatment_plan", None)
+    ss.setdefault("progress_data", ProgressSeries())
     ss.setdefault("voice_enabled", True)
     ss.setdefault("last_spoken_n", -1)
+    ss.setdefault("speech_queue", [])
+    ss.setdefault("speech_last", None)
+    ss.setdefault("speech_seq", 0)
+    ss.setdefault("script_runs", 0)
 ensure_state()
-
-# -------------------- CONSULTATION STEPS --------------------
-STEPS: List[Dict] = [
-    {"key":"name", "prompt":"What is your name?", "kind":"text"},
-    {"key":"age", "prompt":"How old are you?", "kind":"number", "min":0, "max":120},
-    {"key":"conditions", "prompt":"Do you have any pre-existing medical conditions? (optional)", "kind":"text"},
-    {"key":"fever", "prompt":"Have you had a fever in the last 48 hours?", "kind":"choice", "choices":["Yes","No","Not sure"]},
-    {"key":"cough_breathing", "prompt":"Any cough or difficulty breathing?", "kind":"choice", "choices":["Yes","No","Not sure"]},
-    {"key":"body_aches", "prompt":"Any body aches or joint pain?", "kind":"choice", "choices":["Yes","No","Not sure"]},
-    {"key":"loss_taste_smell", "prompt":"Have you noticed any loss of taste or smell?", "kind":"choice", "choices":["Yes","No","Not sure"]},
-    {"key":"fatigue", "prompt":"Are you experiencing fatigue or unusual tiredness?", "kind":"choice", "choices":["Yes","No","Not sure"]},
-    {"key":"other_symptoms", "prompt":"Any other symptoms you'd like to mention? (e.g., headache, rash, nausea)", "kind":"text"},
-    {"key":"spo2", "prompt":"If you have a pulse oximeter, what is your oxygen saturation (SpO₂ %)? (optional)", "kind":"number", "min":70, "max":100}
-]
-
-# -------------------- DISEASE INFO --------------------
-DISEASES = {
-    "Influenza": {
-        "symptom_keys": ["fever", "cough_breathing", "body_aches", "fatigue"],
-        "keywords": ["sore throat", "chills", "body aches", "myalgia", "congestion"],
-        "description": "A viral infection affecting the respiratory system.",
-        "precautions": ["Rest", "Fluids", "Over-the-counter symptom relief as directed", "Consult a clinician if symptoms worsen"]
-    },
-    "COVID-19": {
-        "symptom_keys": ["fever", "cough_breathing", "loss_taste_smell", "fatigue"],
-        "keywords": ["sore throat", "congestion", "headache", "chills"],
-        "description": "An infectious disease caused by SARS-CoV-2.",
-        "precautions": ["Isolate when ill", "Rest and hydrate", "Consult a clinician", "Consider pulse-ox monitoring if available"]
-    },
-    "Dengue Fever": {
-        "symptom_keys": ["fever", "body_aches", "fatigue"],
-        "keywords": ["rash", "severe headache", "retro-orbital pain", "nausea", "vomiting"],
-        "description": "A mosquito-borne viral illness common in tropical regions.",
-        "precautions": ["Hydration", "Rest", "Avoid NSAIDs unless advised", "Seek medical care if bleeding or severe pain occurs"]
-    },
-    "Common Cold": {
-        "symptom_keys": ["cough_breathing", "fatigue"],
-        "keywords": ["runny nose", "sneezing", "congestion", "sore throat"],
-        "description": "A mild viral infection of the upper respiratory tract.",
-        "precautions": ["Rest", "Hydration", "Symptom relief as directed"]
-    },
-    "Mpox (Monkeypox)": {
-        "symptom_keys": ["fever", "fatigue"],
-        "keywords": ["rash", "lesions", "swollen lymph nodes", "lymphadenopathy", "chills"],
-        "description": "A viral disease that can cause rash and systemic symptoms.",
-        "precautions": ["Avoid close contact", "Cover lesions", "Consult a clinician", "Isolation until lesions crust and heal"]
-    }
-}
+st.session_state.script_runs += 1  # one per script execution; see benchmarks/bench_consult_reruns.py
+SCRIPT_RUNS.inc()
+if st.session_state.script_runs == 1:
+    SESSIONS.inc()
 
 # -------------------- VOICE (BROWSER TTS) --------------------
-def speak(text: str, autostart: bool = False, rate: float = 1.0, pitch: float = 1.0):
-    # Use browser Web Speech API. Avoid f-strings with braces to prevent syntax issues.
-    safe = (text or "").replace("\\", "\\\\").replace("`", "\\`")
-    auto_js = "true" if autostart else "false"
-    js = """
-    <div>
-      <button onclick="speakNow()" style="border:none;border-radius:10px;padding:6px 10px;margin:6px 0;background:#0074D9;color:white;cursor:pointer;">🔊 Speak</button>
-    </div>
-    <script>
-      const txt = `__SAFE__`;
-      function speakNow(){ 
-        try {
-          const u = new SpeechSynthesisUtterance(txt);
-          u.rate = __RATE__;
-          u.pitch = __PITCH__;
-          u.lang = 'en-US';
-          window.speechSynthesis.cancel();
-          window.speechSynthesis.speak(u);
-        } catch(e) { console.log(e); }
-      }
-      if (__AUTO__) {
-        setTimeout(() => {
-          try {
-            const u = new SpeechSynthesisUtterance(txt);
-            u.rate = __RATE__;
-            u.pitch = __PITCH__;
-            u.lang = 'en-US';
-            window.speechSynthesis.cancel();
-            window.speechSynthesis.speak(u);
-          } catch(e) {}
-        }, 100);
-      }
-    </script>
-    """
-    js = js.replace("__SAFE__", safe).replace("__RATE__", str(rate)).replace("__PITCH__", str(pitch)).replace("__AUTO__", auto_js)
-    st.components.v1.html(js, height=80)
+# One long-lived component per session, mounted in the sidebar on every page
+# while voice is on (with voice off nothing is queued or mounted): speak() only
+# queues text, and speech_player() hands the queued entries to the iframe once,
+# then clears the queue. Entries are never sent twice, so a remounted iframe
+# cannot repeat old prompts; the last one is passed on its own for the replay
+# button.
+SPEECH_QUEUE_LEN = 5
+_speech_component = st.components.v1.declare_component(
+    "speech", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "speech"))
+
+def speak(text: str, rate: float = 1.0, pitch: float = 1.0):
+    ss = st.session_state
+    SPEAK_CALLS.inc()
+    ss.speech_seq += 1
+    ss.speech_queue = (ss.speech_queue + [{"id": ss.speech_seq, "text": text or "", "rate": rate, "pitch": pitch}])[-SPEECH_QUEUE_LEN:]
+
+def speech_player():
+    ss = st.session_state
+    if ss.speech_queue:
+        ss.speech_last = ss.speech_queue[-1]
+    queue, ss.speech_queue = ss.speech_queue, []
+    if ss.voice_enabled:
+        _speech_component(queue=queue, last=ss.speech_last, key="speech", default=None)
 
 # -------------------- CHAT HELPERS --------------------
+# Fixed lines are interned so every session's ChatLog stores them as small ids.
+MSG_ANALYZING = "Thanks. I'm analyzing your answers…"
+MSG_PLAN_READY = "I've prepared a personalized care plan for you. You can review it under **Treatment Plan**."
+MSG_SKIPPED = "(skipped)"
+for _msg in (MSG_ANALYZING, MSG_PLAN_READY, MSG_SKIPPED):
+    intern_message(_msg)
+
 def add_doctor(msg: str):
-    st.session_state.chat_history.append(("doctor", msg))
+    st.session_state.chat_history.append("doctor", msg)
 
 def add_user(msg: str):
-    st.session_state.chat_history.append(("user", msg))
+    st.session_state.chat_history.append("user", msg)
 
-def show_chat():
-    for sender, message in st.session_state.chat_history[-250:]:
-        if sender == "doctor":
-            st.markdown(f'<div class="ec-doctor"><b>Dr. AI:</b> {message}</div>', unsafe_allow_html=True)
-        else:
-            st.markdown(f'<div class="ec-user"><b>You:</b> {message}</div>', unsafe_allow_html=True)
-
-# -------------------- RISK & DIAGNOSIS --------------------
-def assess_risk(symptoms: Dict) -> Tuple[str, int, Dict]:
-    score = 0; detail = {}
-
-    age = symptoms.get("age")
-    if isinstance(age, (int, float)):
-        if age >= 60:
-            score += 2; detail["age"] = 2
-        elif age >= 40:
-            score += 1; detail["age"] = 1
-        else:
-            detail["age"] = 0
-    else:
-        detail["age"] = 0
+CHAT_PAGE_SIZE = 50  # chat history is rendered and paged in blocks of this many messages
 
-    if symptoms.get("conditions"):
-        score += 2; detail["conditions"] = 2
-    else:
-        detail["conditions"] = 0
-
-    weights = {"fever":2, "cough_breathing":3, "body_aches":1, "loss_taste_smell":2, "fatigue":1}
-    for k, w in weights.items():
-        ans = symptoms.get(k)
-        if ans == "Yes":
-            score += w; detail[k] = w
-        elif ans == "Not sure":
-            n = max(1, int(round(w*0.5)))
-            score += n; detail[k] = n
-        else:
-            detail[k] = 0
-
-    spo2 = symptoms.get("spo2")
-    if isinstance(spo2, (int, float)):
-        if spo2 < 90:
-            score += 5; detail["spo2"] = 5
-        elif spo2 < 94:
-            score += 4; detail["spo2"] = 4
-        elif spo2 < 96:
-            score += 2; detail["spo2"] = 2
-        else:
-            detail["spo2"] = 0
-    else:
-        detail["spo2"] = 0
-
-    level = "high" if score >= 9 else "medium" if score >= 5 else "low"
-    return level, score, detail
-
-def generate_diagnosis(symptoms: Dict) -> List[Tuple]:
-    other = (symptoms.get("other_symptoms") or "").lower()
-    possible = []
-    for disease, info in DISEASES.items():
-        matches = 0; weight = 0
-        for k in info["symptom_keys"]:
-            ans = symptoms.get(k)
-            if ans == "Yes":
-                matches += 1; weight += 2
-            elif ans == "Not sure":
-                matches += 0.5; weight += 1
-        kw_hits = 0
-        for kw in info["keywords"]:
-            if re.search(rf"\b{re.escape(kw)}\b", other):
-                kw_hits += 1
-        weight += kw_hits
-        match_pct = min(100, int(round(100 * (matches / (len(info["symptom_keys"]) or 1)))))
-        possible.append((disease, match_pct, info["description"], info["precautions"], weight))
-    possible.sort(key=lambda x: x[4], reverse=True)
-    return possible
-
-def build_treatment_plan(risk: str, top_disease: Optional[str]) -> Dict:
-    plans = {
-        "high": {
-            "medication": [
-                "Use over-the-counter symptom relief as directed (e.g., fever reducers).",
-                "Only start antivirals/antibiotics if prescribed by a clinician."
-            ],
-            "rest": "Prioritize full rest and avoid exertion.",
-            "diet": "2–3 liters fluids/day if not restricted; warm soups; balanced meals.",
-            "monitoring": "Check temperature 2–4x/day. If available, monitor SpO₂. Watch for breathing difficulty, confusion, persistent chest pain.",
-            "follow_up": "Seek medical advice within 24 hours or sooner if worsening.",
-            "duration": "About 7–14 days depending on recovery.",
-            "isolation": "Home isolation; mask around others; improve ventilation; separate utensils if feasible."
-        },
-        "medium": {
-            "medication": [
-                "Use OTC symptom relief as directed (e.g., acetaminophen for fever).",
-                "Decongestants, throat lozenges may help."
-            ],
-            "rest": "Adequate rest; avoid strenuous activity.",
-            "diet": "1.5–2 liters fluids/day; fruit/vegetable-rich diet; warm beverages.",
-            "monitoring": "Check symptoms twice daily.",
-            "follow_up": "Teleconsult in 48 hours or earlier if worsening.",
-            "duration": "5–10 days.",
-            "isolation": "Limit close contact; mask in shared spaces."
-        },
-        "low": {
-            "medication": [
-                "OTC remedies as needed and as directed.",
-                "Saline nasal spray, honey-lemon for cough may provide comfort."
-            ],
-            "rest": "Resume light activities as tolerated; ensure good sleep.",
-            "diet": "Normal diet with extra fluids.",
-            "monitoring": "Observe for new or worsening symptoms.",
-            "follow_up": "Consult if not improving after ~5 days.",
-            "duration": "3–7 days.",
-            "isolation": "Basic hygiene and courtesy masking if coughing/sneezing."
-        }
-    }
-    plan = plans[risk].copy()
+def render_message(sender: str, message: str) -> str:
+    if sender == "doctor":
+        return f'<div class="ec-doctor"><b>Dr. AI:</b> {message}</div>'
+    return f'<div class="ec-user"><b>You:</b> {message}</div>'
 
-    if top_disease == "COVID-19":
-        plan["monitoring"] += " Consider pulse-ox checks if available."
-        plan["isolation"] = "Isolate at home; typical isolation ~10 days from symptom onset (follow local guidance)."
-    elif top_disease == "Influenza":
-        plan["medication"].insert(0, "Antivirals can help if started early — consult promptly.")
-    elif top_disease == "Dengue Fever":
-        plan["medication"].append("Avoid NSAIDs unless advised by a clinician.")
-        plan["monitoring"] = "Hydrate well; seek care urgently for bleeding, severe abdominal pain, persistent vomiting, or drowsiness."
-    elif top_disease == "Mpox (Monkeypox)":
-        plan["isolation"] = "Avoid close contact; cover lesions; isolate until lesions crust/heal."
+def _pages_html(history: ChatLog, first: int, full: int) -> List[str]:
+    # full pages never change, so each visible one is rendered once and kept
+    # while it stays visible; pages scrolled out of view are dropped
+    cache = st.session_state.chat_page_html
+    for i in [i for i in cache if not first <= i < full]:
+        del cache[i]
+    for i in range(first, full):
+        if i not in cache:
+            cache[i] = "\n".join(render_message(s, m) for s, m in history[i * CHAT_PAGE_SIZE:(i + 1) * CHAT_PAGE_SIZE])
+    return [cache[i] for i in range(first, full)]
 
-    return plan
+def _show_earlier_messages():
+    st.session_state.chat_pages_shown += 1
+
+def show_chat():
+    """Render the visible chat window as two HTML blocks.
+
+    The first holds the most recent full pages. Its bytes only change when a
+    page fills up or older history is requested, so Streamlit can send a cached
+    reference instead of resending it. The second holds the partial last page.
+    """
+    history = st.session_state.chat_history
+    full = len(history) // CHAT_PAGE_SIZE
+    first = max(0, full - st.session_state.chat_pages_shown)
+    if first:
+        st.button(f"Show earlier messages ({first * CHAT_PAGE_SIZE} more)", key="chat_earlier", on_click=_show_earlier_messages)
+    if full > first:
+        st.markdown("\n".join(_pages_html(history, first, full)), unsafe_allow_html=True)
+    tail = history[full * CHAT_PAGE_SIZE:]
+    st.markdown("\n".join(render_message(s, m) for s, m in tail), unsafe_allow_html=True)
+
+# -------------------- SCORING --------------------
+@st.cache_resource(show_spinner=False)
+def warm_risk_table():
+    # once per process, off the script thread: the first finished consultation
+    # then finds the verified table ready instead of building it
+    threading.Thread(target=get_risk_results, name="warm-risk-table", daemon=True).start()
+warm_risk_table()
+
+# -------------------- PERSISTENCE --------------------
+@st.cache_resource(show_spinner=False)
+def get_store() -> ProgressStore:
+    return ProgressStore(os.environ.get("EPIDEMICCARE_DB", "epidemiccare.db"))
+
+def load_patient():
+    """Tie the session to a patient id kept in the URL and restore their saved data once."""
+    ss = st.session_state
+    if "patient_id" in ss:
+        return
+    ss.patient_id = st.query_params.get("patient") or uuid.uuid4().hex
+    st.query_params["patient"] = ss.patient_id
+    store = get_store()
+    saved = store.load_consultation(ss.patient_id)
+    if saved:
+        ss.symptoms = saved["symptoms"]
+        ss.current_idx = len(STEPS)
+        ss.treatment_plan = TriageResult(saved["risk"], saved["score"], saved["detail"], saved["possible"])
+        ss.progress_data.start_date = saved["start_date"]
+    for date, rating, symptoms, taken in store.checkins(ss.patient_id):
+        ss.progress_data.append(date, rating, symptoms, taken)
+
+load_patient()
 
 # -------------------- PAGES --------------------
 def page_home():
-    st.markdown('<div class="ec-hero">', unsafe_allow_html=True)
-    st.markdown('<div style="font-size:3rem;line-height:1">🩺</div>', unsafe_allow_html=True)
-    st.markdown('<h1>EpidemicCare AI</h1>', unsafe_allow_html=True)
-    st.markdown('<p class="ec-kicker">Your intelligent assistant for epidemic symptom check, care guidance, and progress tracking.</p>', unsafe_allow_html=True)
-    st.markdown('</div>', unsafe_allow_html=True)
-
+    html = static_html()
+    st.markdown(html["home_hero"], unsafe_allow_html=True)
     col1, col2, col3 = st.columns([1.2,1,1])
-    with col1:
-        st.markdown('<div class="ec-card">', unsafe_allow_html=True)
-        st.subheader("How it works")
-        st.markdown("- Answer a short consultation.\n- Review your risk & possible conditions.\n- Get a personalized care plan.\n- Track daily progress.")
-        st.markdown('</div>', unsafe_allow_html=True)
-    with col2:
-        st.markdown('<div class="ec-card">', unsafe_allow_html=True)
-        st.subheader("Quick Tips")
-        st.markdown("- Wash hands often.\n- Mask when ill or in crowds.\n- Stay hydrated.\n- Follow local health guidance.")
-        st.markdown('</div>', unsafe_allow_html=True)
+    col1.markdown(html["home_how"], unsafe_allow_html=True)
+    col2.markdown(html["home_tips"], unsafe_allow_html=True)
     with col3:
-        st.markdown('<div class="ec-card">', unsafe_allow_html=True)
-        st.subheader("Get Started")
-        st.markdown("Click below to begin your consultation.")
-        if st.button("Start Consultation ➜"):
-            st.session_state.page = "consult"
-            do_rerun()
-        st.markdown('</div>', unsafe_allow_html=True)
+        st.markdown(html["home_start"], unsafe_allow_html=True)
+        st.button("Start Consultation ➜", on_click=go_to, args=("consult",))
+
+def go_to(page: str):
+    st.session_state.page = page
+
+def reset_conversation():
+    st.session_state.chat_history.close()
+    st.session_state.chat_history = ChatLog()
+    st.session_state.chat_page_html = {}
+    st.session_state.chat_pages_shown = 1
+    st.session_state.current_idx = 0
+    st.session_state.symptoms = {}
+    st.session_state.treatment_plan = None
+    st.session_state.progress_data = ProgressSeries()
+    get_store().delete_patient(st.session_state.patient_id)
+
+def finish_consultation():
+    add_doctor(MSG_ANALYZING)
+    risk, score, detail = assess_risk_lookup(st.session_state.symptoms)
+    possible = get_engine()(st.session_state.symptoms, top_k=3)  # EPIDEMICCARE_DIAGNOSIS picks the engine
+    st.session_state.treatment_plan = TriageResult(risk, score, detail, possible)
+    if not st.session_state.progress_data.start_date:
+        st.session_state.progress_data.start_date = datetime.date.today()
+    get_store().save_consultation(st.session_state.patient_id, st.session_state.symptoms,
+                                  st.session_state.treatment_plan, st.session_state.progress_data.start_date)
+    add_doctor(MSG_PLAN_READY)
+
+def submit_step(idx: int):
+    # on_click callback: runs before the rerun the submit triggers, so the
+    # answer is already recorded when the script draws the next step
+    step = STEPS[idx]
+    val = st.session_state[f"in_{step['key']}"]
+    if step["kind"] == "text":
+        add_user(val if val else MSG_SKIPPED)
+        st.session_state.symptoms[step["key"]] = val.strip() if val else ""
+    elif step["kind"] == "number":
+        add_user(str(val))
+        st.session_state.symptoms[step["key"]] = int(val)
+    else:
+        add_user(val)
+        st.session_state.symptoms[step["key"]] = val
+    st.session_state.current_idx = idx + 1
+    if idx + 1 < len(STEPS):
+        add_doctor(STEPS[idx + 1]["prompt"])
+    else:
+        finish_consultation()
 
 def page_consult():
     st.markdown('<h2 class="ec-title">EpidemicCare AI Doctor</h2>', unsafe_allow_html=True)
 
     with st.sidebar:
         st.markdown("### ⚙️ Settings")
-        st.session_state.voice_enabled = ui_toggle("Doctor voice", value=st.session_state.voice_enabled)
+        # keyed, so the widget keeps its identity when its default flips; the setting
+        # outlives the widget, which is only rendered on this page
+        ui_toggle("Doctor voice", value=st.session_state.voice_enabled, key="voice_toggle",
+                  on_change=lambda: st.session_state.update(voice_enabled=st.session_state.voice_toggle))
         st.caption("Uses your browser's speech synthesis.")
         st.markdown("---")
-        if st.button("↻ Reset Conversation"):
-            st.session_state.chat_history = []
-            st.session_state.current_idx = 0
-            st.session_state.symptoms = {}
-            st.session_state.treatment_plan = {}
-            st.session_state.progress_data = {"start_date": None, "daily_rating": [], "symptoms_track": [], "medication_taken": []}
-            do_rerun()
+        st.button("↻ Reset Conversation", on_click=reset_conversation)
 
     with st.container():
+        idx = st.session_state.current_idx
+        history = st.session_state.chat_history
+        if idx < len(STEPS) and (not history or history[-1] != ("doctor", STEPS[idx]["prompt"])):
+            add_doctor(STEPS[idx]["prompt"])  # first step, or after a reset
         show_chat()
 
-        idx = st.session_state.current_idx
+        last = len(history) - 1
+        if st.session_state.voice_enabled and last > st.session_state.last_spoken_n and history[-1][0] == "doctor":
+            speak(history[-1][1].replace("**", ""))
+            st.session_state.last_spoken_n = last
+
         if idx < len(STEPS):
             step = STEPS[idx]
-            prompt = step["prompt"]
-
-            if not st.session_state.chat_history or st.session_state.chat_history[-1][0] != "doctor" or st.session_state.chat_history[-1][1] != prompt:
-                add_doctor(prompt)
-
-            if st.session_state.voice_enabled and len(st.session_state.chat_history)-1 > st.session_state.last_spoken_n:
-                speak(prompt, autostart=True)
-                st.session_state.last_spoken_n = len(st.session_state.chat_history)-1
-
             st.markdown('<div class="ec-card">', unsafe_allow_html=True)
-            if step["kind"] == "text":
-                val = st.text_input("Your answer", key=f"in_{step['key']}", label_visibility="collapsed")
-                if st.button("Submit", key=f"btn_{idx}"):
-                    add_user(val if val else "(skipped)")
-                    st.session_state.symptoms[step["key"]] = val.strip() if val else ""
-                    st.session_state.current_idx += 1
-                    do_rerun()
-
-            elif step["kind"] == "number":
-                minv = step.get("min", 0); maxv = step.get("max", 120)
-                val = st.number_input("Your answer", min_value=minv, max_value=maxv, step=1, key=f"in_{step['key']}", label_visibility="collapsed")
-                if st.button("Submit", key=f"btn_{idx}"):
-                    add_user(str(val))
-                    st.session_state.symptoms[step["key"]] = int(val)
-                    st.session_state.current_idx += 1
-                    do_rerun()
-
-            elif step["kind"] == "choice":
-                choices = step["choices"]
-                val = st.radio("Choose one", choices, key=f"in_{step['key']}", label_visibility="collapsed")
-                if st.button("Submit", key=f"btn_{idx}"):
-                    add_user(val)
-                    st.session_state.symptoms[step["key"]] = val
-                    st.session_state.current_idx += 1
-                    do_rerun()
+            with st.form(key=f"step_{idx}"):
+                if step["kind"] == "text":
+                    st.text_input("Your answer", key=f"in_{step['key']}", label_visibility="collapsed")
+                elif step["kind"] == "number":
+                    minv = step.get("min", 0); maxv = step.get("max", 120)
+                    st.number_input("Your answer", min_value=minv, max_value=maxv, step=1, key=f"in_{step['key']}", label_visibility="collapsed")
+                elif step["kind"] == "choice":
+                    st.radio("Choose one", step["choices"], key=f"in_{step['key']}", label_visibility="collapsed")
+                st.form_submit_button("Submit", on_click=submit_step, args=(idx,))
             st.markdown('</div>', unsafe_allow_html=True)
-        else:
-            add_doctor("Thanks. I'm analyzing your answers…")
-            risk, score, detail = assess_risk(st.session_state.symptoms)
-            possible = generate_diagnosis(st.session_state.symptoms)
-            top = possible[0][0] if possible else None
-            plan = build_treatment_plan(risk, top)
-            st.session_state.treatment_plan = {"risk": risk, "score": score, "detail": detail, "possible": possible, "plan": plan}
-            if not st.session_state.progress_data["start_date"]:
-                st.session_state.progress_data["start_date"] = datetime.date.today()
-            add_doctor("I've prepared a personalized care plan for you. You can review it under **Treatment Plan**.")
-            if st.session_state.voice_enabled and len(st.session_state.chat_history)-1 > st.session_state.last_spoken_n:
-                speak("I've prepared a personalized care plan for you. You can review it under Treatment Plan.", autostart=True)
-                st.session_state.last_spoken_n = len(st.session_state.chat_history)-1
-
+        elif st.session_state.treatment_plan:
             colA, colB = st.columns([1,1])
             with colA:
                 st.success(f"Risk Level: **{st.session_state.treatment_plan['risk'].upper()}**  | Score: {st.session_state.treatment_plan['score']}")
-                if st.button("View Treatment Plan ➜"):
-                    st.session_state.page = "plan"; do_rerun()
+                st.button("View Treatment Plan ➜", on_click=go_to, args=("plan",))
             with colB:
                 st.info("This app provides educational guidance and is **not** a medical diagnosis. Seek professional care if you're concerned.")
 
@@ -396,8 +359,7 @@ def page_plan():
     data = st.session_state.treatment_plan
     if not data:
         st.warning("Please complete the consultation first.")
-        if st.button("Go to Consultation"):
-            st.session_state.page = "consult"; do_rerun()
+        st.button("Go to Consultation", on_click=go_to, args=("consult",))
         return
 
     risk = data["risk"]; score = data["score"]; possible = data["possible"]; plan = data["plan"]
@@ -441,17 +403,40 @@ def page_plan():
         st.markdown('</div>', unsafe_allow_html=True)
 
     st.markdown('<div class="ec-card">', unsafe_allow_html=True)
-    if st.button("Start Progress Tracking"):
-        st.session_state.page = "progress"; do_rerun()
+    st.button("Start Progress Tracking", on_click=go_to, args=("progress",))
+    ss = st.session_state
+    st.download_button("Download triage result (Arrow)", functools.partial(_triage_arrow, ss.patient_id, dict(ss.symptoms), data,
+                                                                           ss.progress_data.start_date),
+                       file_name="triage.arrow", mime=ARROW_MIME, on_click="ignore")
     st.markdown('</div>', unsafe_allow_html=True)
 
+# Downloads are built when clicked (Streamlit calls `data`), never on a plain rerun; pyarrow loads then too.
+ARROW_MIME = "application/vnd.apache.arrow.file"
+
+def _triage_arrow(patient: str, symptoms: Dict, result: TriageResult, start_date) -> bytes:
+    from epidemiccare.columnar import consultation_table, to_ipc_bytes
+    return to_ipc_bytes(consultation_table(patient, symptoms, result, start_date))
+
+def _progress_arrow(patient: str, progress: ProgressSeries) -> bytes:
+    from epidemiccare.columnar import checkins_table, to_ipc_bytes
+    return to_ipc_bytes(checkins_table(patient, progress))
+
+def save_checkin():
+    ss = st.session_state
+    today = datetime.date.today()
+    ss.progress_data.append(today, ss.checkin_rating, list(ss.checkin_symptoms), ss.checkin_taken)
+    get_store().add_checkin(ss.patient_id, today, ss.checkin_rating, list(ss.checkin_symptoms), ss.checkin_taken)
+    ss.checkin_saved = True
+
 def page_progress():
+    import numpy as np  # deferred: only this page charts, so other pages never pay for pandas
+    import pandas as pd
+
     st.markdown('<h2 class="ec-title">Your Progress Tracking</h2>', unsafe_allow_html=True)
 
     if not st.session_state.treatment_plan:
         st.warning("Complete the consultation to generate a plan before tracking progress.")
-        if st.button("Go to Consultation"):
-            st.session_state.page = "consult"; do_rerun()
+        st.button("Go to Consultation", on_click=go_to, args=("consult",))
         return
 
     col1, col2 = st.columns([1.05,0.95])
@@ -459,26 +444,30 @@ def page_progress():
         st.markdown('<div class="ec-card">', unsafe_allow_html=True)
         st.subheader("Daily Check-in")
         today = datetime.date.today()
-        already = any(d["date"] == today for d in st.session_state.progress_data["daily_rating"])
+        already = get_store().has_checkin(st.session_state.patient_id, today)
         if not already:
-            rating = st.slider("How are your symptoms today? (1 = very mild, 10 = very severe)", 1, 10, 5)
-            sym = st.multiselect("Current symptoms",
-                                 ["Fever","Cough","Headache","Fatigue","Body aches","Shortness of breath","Loss of taste/smell","Rash","Nausea/Vomiting"])
-            taken = st.checkbox("I took my medicines as directed today")
-            if st.button("Save Today's Progress"):
-                st.session_state.progress_data["daily_rating"].append({"date": today, "rating": rating})
-                st.session_state.progress_data["symptoms_track"].append({"date": today, "symptoms": sym})
-                st.session_state.progress_data["medication_taken"].append({"date": today, "taken": bool(taken)})
-                st.success("Saved!"); time.sleep(0.6); do_rerun()
+            with st.form(key="checkin"):
+                st.slider("How are your symptoms today? (1 = very mild, 10 = very severe)", 1, 10, 5, key="checkin_rating")
+                st.multiselect("Current symptoms", CHECKIN_SYMPTOMS, key="checkin_symptoms")
+                st.checkbox("I took my medicines as directed today", key="checkin_taken")
+                st.form_submit_button("Save Today's Progress", on_click=save_checkin)
         else:
+            if st.session_state.pop("checkin_saved", False):
+                st.success("Saved!")
             st.info("You've already checked in today. Come back tomorrow.")
+        latest = get_store().load_reassessment(st.session_state.patient_id)  # written by the nightly epidemiccare.reassess
+        if latest:
+            st.caption(f"Re-assessed {latest['date']:%b %d} from your recent check-ins: risk {latest['risk'].upper()} "
+                       f"(score {latest['score']}); at consultation: {st.session_state.treatment_plan['risk'].upper()}.")
         st.markdown('</div>', unsafe_allow_html=True)
 
         st.markdown('<div class="ec-card">', unsafe_allow_html=True)
         st.subheader("Symptom Severity Over Time")
-        if st.session_state.progress_data["daily_rating"]:
-            df = pd.DataFrame(st.session_state.progress_data["daily_rating"]).sort_values("date")
-            st.line_chart(df.set_index("date")["rating"])
+        progress = st.session_state.progress_data
+        if len(progress):
+            st.line_chart(pd.Series(progress.ratings, index=pd.Index(progress.dates, name="date"), name="rating"))
+            st.download_button("Download progress (Arrow)", functools.partial(_progress_arrow, st.session_state.patient_id, progress),
+                               file_name="progress.arrow", mime=ARROW_MIME, on_click="ignore")
         else:
             st.caption("No data yet.")
         st.markdown('</div>', unsafe_allow_html=True)
@@ -486,97 +475,130 @@ def page_progress():
     with col2:
         st.markdown('<div class="ec-card">', unsafe_allow_html=True)
         st.subheader("Medication Adherence")
-        med = st.session_state.progress_data["medication_taken"]
-        if med:
-            adherence = sum(1 for x in med if x["taken"])
-            total = len(med)
+        if len(progress):
+            adherence = progress.taken_days
+            total = len(progress)
             st.markdown(f"**Adherence:** {adherence}/{total} days ({(adherence/total)*100:.0f}%)")
-            dfA = pd.DataFrame({"date":[x["date"] for x in med],
-                                "adherence":[1 if x["taken"] else 0 for x in med]}).sort_values("date")
-            st.bar_chart(dfA.set_index("date"))
+            st.bar_chart(pd.DataFrame({"adherence": progress.taken.astype(np.int8)}, index=pd.Index(progress.dates, name="date")))
         else:
             st.caption("No data yet.")
         st.markdown('</div>', unsafe_allow_html=True)
 
         st.markdown('<div class="ec-card">', unsafe_allow_html=True)
         st.subheader("Symptom Occurrence")
-        hist = st.session_state.progress_data["symptoms_track"]
-        if hist and any(x["symptoms"] for x in hist):
-            rows = []
-            for entry in hist:
-                for s in entry["symptoms"]:
-                    rows.append({"date": entry["date"], "symptom": s})
-            dfS = pd.DataFrame(rows)
-            pivot = pd.crosstab(dfS["date"], dfS["symptom"])
+        if progress.symptom_totals.any():
+            # same shape as the old crosstab: days with a symptom x symptoms seen, alphabetical
+            cols = sorted(np.flatnonzero(progress.symptom_totals), key=lambda i: progress.symptoms[i])
+            occ = progress.occurrence[:, cols]
+            days = occ.any(axis=1)
+            pivot = pd.DataFrame(occ[days].astype(np.int64), index=pd.Index(progress.dates[days], name="date"),
+                                 columns=pd.Index([progress.symptoms[i] for i in cols], name="symptom"))
             st.bar_chart(pivot)
         else:
             st.caption("No symptom selections yet.")
         st.markdown('</div>', unsafe_allow_html=True)
 
-def page_resources():
-    st.markdown('<h2 class="ec-title">Health Resources</h2>', unsafe_allow_html=True)
+# -------------------- CLINICIAN DASHBOARD --------------------
+# Listed in the navigation only when EPIDEMICCARE_DASHBOARD=1: it shows every patient in the store.
+DASHBOARD_ENABLED = os.environ.get("EPIDEMICCARE_DASHBOARD", "").lower() in ("1", "true", "yes", "on")
+DASHBOARD_TTL = 60  # seconds an aggregated view is served before the store is read again
+DASHBOARD_COMPARE_MAX = 10
+# a directory written by `python -m epidemiccare.columnar export`: the dashboard memory-maps it instead of reading the store
+DASHBOARD_ARCHIVE = os.environ.get("EPIDEMICCARE_DASHBOARD_ARCHIVE")
+
+@st.cache_data(ttl=DASHBOARD_TTL, show_spinner="Aggregating patient progress…")
+def cohort_view(budget: int):
+    from epidemiccare.dashboard import archive_progress, cohort_progress  # deferred, like page_progress's pandas
+    return archive_progress(DASHBOARD_ARCHIVE, budget) if DASHBOARD_ARCHIVE else cohort_progress(get_store(), budget)
+
+def page_dashboard():
+    import pandas as pd
+
+    st.markdown('<h2 class="ec-title">Clinician Dashboard</h2>', unsafe_allow_html=True)
+    head = st.columns([3, 1.2, 0.8])
+    budget = head[1].select_slider("Points per chart", [30, 60, 120, 240], value=60)
+    if head[2].button("Refresh"):
+        cohort_view.clear()
+    view = cohort_view(budget)
+    patients = view.patients
+    if not len(patients):
+        st.info("No check-ins recorded yet.")
+        return
+
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("Patients", f"{len(patients):,}")
+    k2.metric("Check-ins", f"{view.checkins:,}")
+    k3.metric("Mean latest severity", f"{patients['latest'].mean():.1f}")
+    k4.metric("Mean adherence", f"{patients['adherence'].mean():.0f}%")
+    st.caption(f"Charts carry {view.points:,} of {view.checkins:,} points (LTTB, at most {budget} per series); "
+               f"figures are at most {DASHBOARD_TTL}s old.")
+
     col1, col2 = st.columns(2)
     with col1:
         st.markdown('<div class="ec-card">', unsafe_allow_html=True)
-        st.subheader("Understanding Epidemic Illness")
-        st.markdown("""
-- **Early care matters:** rest, fluids, monitor warning signs.
-- **Prevention:** hand hygiene, masking in crowds, ventilation, vaccinations per local guidance.
-- **When to seek urgent care:** breathing trouble, SpO₂ < **94%** (if measured), chest pain, confusion, blue/gray lips or nailbeds, severe dehydration, persistent high fever.
-        """)
+        st.subheader("Mean Severity per Day")
+        st.line_chart(view.severity)
         st.markdown('</div>', unsafe_allow_html=True)
-
-        st.markdown('<div class="ec-card">', unsafe_allow_html=True)
-        st.subheader("Using a Pulse Oximeter (SpO₂)")
-        st.markdown("""
-1. Sit and rest your hand at heart level for 5 minutes.  
-2. Remove nail polish or false nails.  
-3. Clip the oximeter to your fingertip; keep still for ~30–60 seconds.  
-4. Record the **highest stable** value.  
-> Typical healthy readings are ~96–99% at sea level; trends over time matter.
-        """)
-        st.markdown('</div>', unsafe_allow_html=True)
-
     with col2:
         st.markdown('<div class="ec-card">', unsafe_allow_html=True)
-        st.subheader("General Helplines")
-        st.markdown("""
-- **Emergency:** Use your local emergency number.  
-- **Poison Help:** Local poison control center.  
-- **Mental Health:** Local crisis hotline or text services in your country.
-        """)
-        st.caption("Numbers vary by country; check your local health authority website.")
+        st.subheader("Medication Adherence per Day")
+        st.line_chart(view.adherence)
         st.markdown('</div>', unsafe_allow_html=True)
 
-        st.markdown('<div class="ec-card">', unsafe_allow_html=True)
-        st.subheader("Important Notes")
-        st.markdown("""
-- This app is for **education & guidance** only and does **not** replace professional medical advice, diagnosis, or treatment.  
-- Always follow instructions from licensed healthcare professionals and local health authorities.
-        """)
-        st.markdown('</div>', unsafe_allow_html=True)
+    def label(p: str) -> str:
+        name = patients.at[p, "name"]
+        return f"{name} ({p[:8]})" if name else p[:8]
+
+    st.markdown('<div class="ec-card">', unsafe_allow_html=True)
+    st.subheader("Patients")
+    st.caption("Worst latest severity first.")
+    st.dataframe(patients, column_config={
+        "name": "Name", "risk": "Risk", "days": "Days", "first": "First check-in", "last": "Last check-in",
+        "latest": st.column_config.NumberColumn("Latest", format="%d"),
+        "mean": st.column_config.NumberColumn("Mean", format="%.1f"),
+        "peak": st.column_config.NumberColumn("Peak", format="%d"),
+        "adherence": st.column_config.ProgressColumn("Adherence", format="%.0f%%", min_value=0, max_value=100),
+        "trend": st.column_config.LineChartColumn("Severity trend", y_min=1, y_max=10),
+    })
+    compare = st.multiselect("Compare severity", list(patients.index), format_func=label,
+                             max_selections=DASHBOARD_COMPARE_MAX, key="dashboard_compare")
+    if compare:
+        st.line_chart(pd.DataFrame({label(p): view.trends[p] for p in compare}))
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def page_resources():
+    html = static_html()
+    st.markdown('<h2 class="ec-title">Health Resources</h2>', unsafe_allow_html=True)
+    col1, col2 = st.columns(2)
+    col1.markdown(html["resources_left"], unsafe_allow_html=True)
+    col2.markdown(html["resources_right"], unsafe_allow_html=True)
 
 # -------------------- NAV / ROUTER --------------------
 with st.sidebar:
     st.markdown("## 🩺 EpidemicCare AI")
+    nav = {"Home":"home","Consultation":"consult","Treatment Plan":"plan","Progress":"progress","Resources":"resources"}
+    if DASHBOARD_ENABLED:
+        nav["Clinician Dashboard"] = "dashboard"
     page = st.radio(
         "Navigation",
-        ["Home","Consultation","Treatment Plan","Progress","Resources"],
-        index=["home","consult","plan","progress","resources"].index(st.session_state.page)
-        if st.session_state.page in ["home","consult","plan","progress","resources"] else 0
+        list(nav),
+        index=list(nav.values()).index(st.session_state.page)
+        if st.session_state.page in nav.values() else 0
     )
-    st.session_state.page = {"Home":"home","Consultation":"consult","Treatment Plan":"plan","Progress":"progress","Resources":"resources"}[page]
-
-if st.session_state.page == "home":
-    page_home()
-elif st.session_state.page == "consult":
-    page_consult()
-elif st.session_state.page == "plan":
-    page_plan()
-elif st.session_state.page == "progress":
-    page_progress()
-else:
-    page_resources()
+    st.session_state.page = nav[page]
+    speech_slot = st.empty()  # filled after the page, so this rerun's prompts go out with it; empty with voice off
+
+PAGES = {"home": page_home, "consult": page_consult, "plan": page_plan, "progress": page_progress}
+if DASHBOARD_ENABLED:
+    PAGES["dashboard"] = page_dashboard
+render_page = PAGES.get(st.session_state.page, page_resources)
+with metrics.timer(PAGE_RENDER_SECONDS, page=render_page.__name__):
+    render_page()
+with speech_slot:
+    speech_player()  # same key and slot every rerun and on every page, so the iframe stays mounted while voice is on
 
 # -------------------- FOOTER --------------------
-st.markdown('<div class="ec-footer">© 2025 EpidemicCare AI — Educational use only.</div>', unsafe_allow_html=True)
+st.markdown(static_html()["footer"], unsafe_allow_html=True)
+
+if metrics.ENABLED:
+    SESSION_STATE_BYTES.observe(metrics.deep_sizeof(st.session_state.to_dict()))
@@ -0,0 +1,20 @@
+import asyncio
+
+from epidemiccare.api import handle
+
+
+async def _exchange(request: bytes) -> bytes:
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    async with server:
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        writer.write(request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 10)
+        writer.close()
+        return response
+
+
+def test_non_integer_content_length_is_a_400():
+    response = asyncio.run(_exchange(b"POST /triage HTTP/1.1\r\nHost: x\r\nContent-Length: ten\r\n\r\n{}"))
+    assert response.startswith(b"HTTP/1.1 400 Bad Request\r\n")
+    assert b"Content-Length" in response.split(b"\r\n\r\n", 1)[1]
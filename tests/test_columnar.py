@@ -0,0 +1,17 @@
+import datetime
+
+import pyarrow as pa
+import pytest
+
+from epidemiccare.columnar import CHECKINS_SCHEMA, import_batch
+from epidemiccare.store import ProgressStore
+
+
+def test_import_rejects_null_rating(tmp_path):
+    store = ProgressStore(str(tmp_path / "store.db"))
+    batch = pa.RecordBatch.from_pydict({"patient": ["p1", "p2"], "date": [datetime.date(2026, 1, 1)] * 2,
+                                        "rating": [5, None], "symptoms": [[], ["Fever"]], "taken": [True, None]},
+                                       CHECKINS_SCHEMA)
+    with pytest.raises(ValueError, match="'rating'.*row 1"):
+        import_batch(store, batch)
+    assert store.checkins("p1") == []
@@ -0,0 +1,30 @@
+import datetime
+import io
+
+from epidemiccare import reassess
+from epidemiccare.store import ProgressStore
+
+PLAN = {"risk": "low", "score": 0, "detail": {}, "possible": []}
+DAY = datetime.date(2026, 1, 1)
+
+
+def test_patient_requeued_during_a_run_waits_for_the_next(tmp_path, monkeypatch):
+    store = ProgressStore(str(tmp_path / "store.db"))
+    for patient in ("p1", "p2"):
+        store.save_consultation(patient, {"age": 40, "fever": "Yes"}, PLAN, DAY)
+        store.add_checkin(patient, DAY, 5, ["Fever"], True)
+    inputs, pages = store.reassessment_inputs, []
+
+    def checkin_meanwhile(patients, recent):  # p1 checks in again after its first page was read
+        pages.append(patients)
+        if len(pages) == 1:
+            store.add_checkin("p1", DAY + datetime.timedelta(days=1), 8, ["Cough"], True)
+        return inputs(patients, recent)
+    monkeypatch.setattr(store, "reassessment_inputs", checkin_meanwhile)
+
+    counts = reassess.run(store, batch=1, today=DAY, log=io.StringIO())
+    assert counts["reassessed"] == 2 and pages == [["p1"], ["p2"]]
+    assert [p for _, p in store.queued()] == ["p1"]
+    monkeypatch.undo()
+    assert reassess.run(store, batch=1, today=DAY, log=io.StringIO())["reassessed"] == 1
+    assert store.queued() == []
@@ -0,0 +1,13 @@
+import json
+
+from epidemiccare.retriage import ID_COLUMN, Shard, run_shard
+
+
+def test_csv_ids_round_trip_as_text(tmp_path):
+    path = tmp_path / "archive.csv"
+    path.write_text("id,age,fever,other_symptoms\n000123,40,Yes,\n,67,No,\n000125,30,Yes,12\n")
+    part = str(tmp_path / "part")
+    assert run_shard(Shard(str(path), "csv", 0, path.stat().st_size), part, chunk_size=2) == 3
+    with open(part) as f:
+        rows = [json.loads(line, parse_constant=lambda c: 1 / 0) for line in f]  # rejects a bare NaN
+    assert [r[ID_COLUMN] for r in rows] == ["000123", None, "000125"]
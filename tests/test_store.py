@@ -0,0 +1,45 @@
+import datetime
+import sqlite3
+
+import pytest
+
+from epidemiccare.store import ProgressStore
+
+PLAN = {"risk": "low", "score": 1, "detail": {"age": 1}, "possible": [("Common Cold", 50, 3)]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ProgressStore(str(tmp_path / "store.db"), pool_size=1)
+
+
+def test_failed_write_releases_its_transaction(store):
+    with pytest.raises(sqlite3.IntegrityError):
+        store.save_consultation("p1", {"fever": "Yes"}, dict(PLAN, risk=None), None)  # risk is NOT NULL
+    store.save_consultation("p1", {"fever": "Yes"}, PLAN, None)
+    other = ProgressStore(store.path)  # its own connections: the failed write must not still hold the lock
+    other.save_consultation("p2", {"fever": "No"}, PLAN, datetime.date(2026, 1, 1))
+    assert store.load_consultation("p1")["risk"] == "low"
+    assert store.load_consultation("p2")["start_date"] == datetime.date(2026, 1, 1)
+
+
+def test_failed_checkin_import_keeps_the_queue_trigger(store):
+    day = datetime.date(2026, 1, 1)
+    with pytest.raises(sqlite3.IntegrityError):
+        store.import_checkins([("p1", day.isoformat(), 5, "[]", True), ("p2", day.isoformat(), None, "[]", True)])
+    assert store.checkins("p1") == [] and store.queued() == []
+    store.add_checkin("p3", day, 4, ["Cough"], True)
+    store.flush()
+    assert [p for _, p in store.queued()] == ["p3"]
+
+
+def test_checkin_import_queues_patients_without_a_schema_change(store):
+    with store.connection() as conn:
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+    day = datetime.date(2026, 1, 1).isoformat()
+    store.import_checkins([("p1", day, 5, "[]", True), ("p2", day, 3, "[]", False), ("p1", "2026-01-02", 4, "[]", True)])
+    ProgressStore(store.path)  # opening the store again changes nothing either
+    with store.connection() as conn:
+        assert conn.execute("PRAGMA schema_version").fetchone()[0] == version
+        assert conn.execute("SELECT COUNT(*) FROM bulk_import").fetchone()[0] == 0
+    assert [p for _, p in store.queued()] == ["p1", "p2"]